@@ -20,10 +20,10 @@ from datetime import datetime
 from dotenv import load_dotenv
 from tabulate import tabulate
 
-from database import Database, User, Wager
+from database import AsyncDatabase, User, Wager
 from admin_recovery_tools import RecoveryTools
 from backup_system import BackupSystem
-from game.solana_ops import get_sol_balance
+from game.solana_ops import get_sol_balances
 from utils.encryption import decrypt_secret
 from security.audit import AuditLogger, AuditSeverity, AuditEventType
 from referrals import get_referral_escrow_balance
@@ -38,7 +38,7 @@ class AdminDashboard:
     """Admin dashboard for fund management and recovery."""
 
     def __init__(self):
-        self.db = Database()
+        self.db = AsyncDatabase()
         self.encryption_key = os.getenv("ENCRYPTION_KEY")
         self.rpc_url = os.getenv("RPC_URL")
         self.treasury_wallet = os.getenv("TREASURY_WALLET")
@@ -139,38 +139,43 @@ class AdminDashboard:
         escrows = []
 
         # Get all open wagers
-        wagers = self.db.get_open_wagers(limit=1000)
+        wagers = await self.db.get_open_wagers(limit=1000)
+
+        # One bulk lookup for every escrow (100 per RPC call)
+        addresses = [
+            address
+            for wager in wagers
+            for address in (wager.creator_escrow_address, wager.acceptor_escrow_address)
+            if address
+        ]
+        try:
+            balances = await get_sol_balances(self.rpc_url, addresses)
+        except Exception as e:
+            logger.error(f"Error checking {len(addresses)} escrow balances: {e}")
+            balances = {}
 
         for wager in wagers:
             # Check creator escrow
-            if wager.creator_escrow_address:
-                try:
-                    balance = await get_sol_balance(self.rpc_url, wager.creator_escrow_address)
-                    escrows.append({
-                        "Type": "Bet (Creator)",
-                        "Wager ID": wager.wager_id[:12] + "...",
-                        "Address": wager.creator_escrow_address[:8] + "..." + wager.creator_escrow_address[-4:],
-                        "Balance": f"{balance:.6f} SOL",
-                        "Status": wager.status,
-                        "User ID": wager.creator_id
-                    })
-                except Exception as e:
-                    logger.error(f"Error checking creator escrow: {e}")
+            if wager.creator_escrow_address in balances:
+                escrows.append({
+                    "Type": "Bet (Creator)",
+                    "Wager ID": wager.wager_id[:12] + "...",
+                    "Address": wager.creator_escrow_address[:8] + "..." + wager.creator_escrow_address[-4:],
+                    "Balance": f"{balances[wager.creator_escrow_address]:.6f} SOL",
+                    "Status": wager.status,
+                    "User ID": wager.creator_id
+                })
 
             # Check acceptor escrow
-            if wager.acceptor_escrow_address:
-                try:
-                    balance = await get_sol_balance(self.rpc_url, wager.acceptor_escrow_address)
-                    escrows.append({
-                        "Type": "Bet (Acceptor)",
-                        "Wager ID": wager.wager_id[:12] + "...",
-                        "Address": wager.acceptor_escrow_address[:8] + "..." + wager.acceptor_escrow_address[-4:],
-                        "Balance": f"{balance:.6f} SOL",
-                        "Status": wager.status,
-                        "User ID": wager.acceptor_id or "N/A"
-                    })
-                except Exception as e:
-                    logger.error(f"Error checking acceptor escrow: {e}")
+            if wager.acceptor_escrow_address in balances:
+                escrows.append({
+                    "Type": "Bet (Acceptor)",
+                    "Wager ID": wager.wager_id[:12] + "...",
+                    "Address": wager.acceptor_escrow_address[:8] + "..." + wager.acceptor_escrow_address[-4:],
+                    "Balance": f"{balances[wager.acceptor_escrow_address]:.6f} SOL",
+                    "Status": wager.status,
+                    "User ID": wager.acceptor_id or "N/A"
+                })
 
         # Check referral escrows (sample first 100 users)
         # In production, you might want to paginate this
@@ -185,22 +190,25 @@ class AdminDashboard:
         user_ids = [row[0] for row in cursor.fetchall()]
         db_conn.close()
 
-        for user_id in user_ids:
-            user = self.db.get_user(user_id)
-            if user and user.referral_payout_escrow_address:
-                try:
-                    balance = await get_referral_escrow_balance(user, self.rpc_url)
-                    if balance > 0:
-                        escrows.append({
-                            "Type": "Referral",
-                            "Wager ID": "N/A",
-                            "Address": user.referral_payout_escrow_address[:8] + "..." + user.referral_payout_escrow_address[-4:],
-                            "Balance": f"{balance:.6f} SOL",
-                            "Status": "Active",
-                            "User ID": user_id
-                        })
-                except Exception as e:
-                    logger.error(f"Error checking referral escrow for user {user_id}: {e}")
+        users = [await self.db.get_user(user_id) for user_id in user_ids]
+        users = [user for user in users if user and user.referral_payout_escrow_address]
+        try:
+            balances = await get_sol_balances(self.rpc_url, [user.referral_payout_escrow_address for user in users])
+        except Exception as e:
+            logger.error(f"Error checking {len(users)} referral escrow balances: {e}")
+            balances = {}
+
+        for user in users:
+            balance = balances.get(user.referral_payout_escrow_address, 0.0)
+            if balance > 0:
+                escrows.append({
+                    "Type": "Referral",
+                    "Wager ID": "N/A",
+                    "Address": user.referral_payout_escrow_address[:8] + "..." + user.referral_payout_escrow_address[-4:],
+                    "Balance": f"{balance:.6f} SOL",
+                    "Status": "Active",
+                    "User ID": user.user_id
+                })
 
         if escrows:
             print("\n" + tabulate(escrows, headers="keys", tablefmt="grid"))
@@ -291,7 +299,7 @@ class AdminDashboard:
             print("\n❌ Invalid user ID.")
             return
 
-        user = self.db.get_user(int(user_id))
+        user = await self.db.get_user(int(user_id))
         if not user:
             print("\n❌ User not found.")
             return
@@ -346,7 +354,7 @@ class AdminDashboard:
 
         user = None
         if search.isdigit():
-            user = self.db.get_user(int(search))
+            user = await self.db.get_user(int(search))
         else:
             # Search by wallet (you'd need to add this to Database class)
             print("\n⚠️  Wallet search not yet implemented. Use User ID for now.")
@@ -395,7 +403,7 @@ class AdminDashboard:
             return
 
         try:
-            data = self.recovery.export_user_data(int(user_id))
+            data = await self.recovery.export_user_data(int(user_id))
 
             filename = f"user_{user_id}_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
 
@@ -431,7 +439,7 @@ class AdminDashboard:
             print("\n❌ Invalid amount.")
             return
 
-        user = self.db.get_user(int(user_id))
+        user = await self.db.get_user(int(user_id))
         if not user or not user.payout_wallet:
             print("\n❌ User not found or no payout wallet set.")
             return
@@ -828,6 +836,7 @@ async def main():
         pass
 
     # Run dashboard
+    dashboard = None
     try:
         dashboard = AdminDashboard()
         await dashboard.main_menu()
@@ -836,6 +845,9 @@ async def main():
     except Exception as e:
         logger.error(f"Dashboard failed: {e}", exc_info=True)
         print(f"\n❌ Dashboard error: {e}")
+    finally:
+        if dashboard:
+            await dashboard.db.close()
 
 
 if __name__ == "__main__":
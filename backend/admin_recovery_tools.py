@@ -13,8 +13,8 @@ import asyncio
 from typing import Optional, List, Dict
 from datetime import datetime
 
-from database import Database, User, Wager, Game
-from game.solana_ops import transfer_sol, get_sol_balance
+from database import AsyncDatabase, User, Wager, Game
+from game.solana_ops import transfer_sol, get_sol_balance, get_sol_balances
 from utils.encryption import decrypt_secret
 from security import audit_logger, AuditEventType, AuditSeverity
 
@@ -24,7 +24,7 @@ logger = logging.getLogger(__name__)
 class RecoveryTools:
     """Admin tools for fund recovery."""
 
-    def __init__(self, db: Database, encryption_key: str, rpc_url: str):
+    def __init__(self, db: AsyncDatabase, encryption_key: str, rpc_url: str):
         self.db = db
         self.encryption_key = encryption_key
         self.rpc_url = rpc_url
@@ -48,7 +48,7 @@ class RecoveryTools:
             Dict with transaction signatures
         """
         # Get wager
-        wagers = self.db.get_open_wagers(limit=1000)
+        wagers = await self.db.get_open_wagers(limit=1000)
         wager = next((w for w in wagers if w.wager_id == wager_id), None)
 
         if not wager:
@@ -123,42 +123,35 @@ class RecoveryTools:
         stuck_escrows = []
 
         # Get all open/accepting wagers
-        wagers = self.db.get_open_wagers(limit=1000)
+        wagers = await self.db.get_open_wagers(limit=1000)
 
+        # (wager, escrow type, address, user key, user id) for every escrow we hold keys for
+        escrows = []
         for wager in wagers:
-            # Check creator escrow
             if wager.creator_escrow_address and wager.creator_escrow_secret:
-                try:
-                    balance = await get_sol_balance(self.rpc_url, wager.creator_escrow_address)
-                    if balance > 0:
-                        stuck_escrows.append({
-                            "wager_id": wager.wager_id,
-                            "type": "creator_escrow",
-                            "address": wager.creator_escrow_address,
-                            "balance": balance,
-                            "creator_id": wager.creator_id,
-                            "status": wager.status,
-                            "created_at": wager.created_at.isoformat(),
-                        })
-                except Exception as e:
-                    logger.error(f"Error checking escrow {wager.creator_escrow_address}: {e}")
-
-            # Check acceptor escrow
+                escrows.append((wager, "creator_escrow", wager.creator_escrow_address, "creator_id", wager.creator_id))
             if wager.acceptor_escrow_address and wager.acceptor_escrow_secret:
-                try:
-                    balance = await get_sol_balance(self.rpc_url, wager.acceptor_escrow_address)
-                    if balance > 0:
-                        stuck_escrows.append({
-                            "wager_id": wager.wager_id,
-                            "type": "acceptor_escrow",
-                            "address": wager.acceptor_escrow_address,
-                            "balance": balance,
-                            "acceptor_id": wager.acceptor_id,
-                            "status": wager.status,
-                            "created_at": wager.created_at.isoformat(),
-                        })
-                except Exception as e:
-                    logger.error(f"Error checking escrow {wager.acceptor_escrow_address}: {e}")
+                escrows.append((wager, "acceptor_escrow", wager.acceptor_escrow_address, "acceptor_id", wager.acceptor_id))
+
+        # One bulk lookup (100 escrows per RPC call) instead of one call per escrow
+        try:
+            balances = await get_sol_balances(self.rpc_url, [escrow[2] for escrow in escrows])
+        except Exception as e:
+            logger.error(f"Error checking {len(escrows)} escrow balances: {e}")
+            return stuck_escrows
+
+        for wager, escrow_type, address, user_key, user_id in escrows:
+            balance = balances.get(address, 0.0)
+            if balance > 0:
+                stuck_escrows.append({
+                    "wager_id": wager.wager_id,
+                    "type": escrow_type,
+                    "address": address,
+                    "balance": balance,
+                    user_key: user_id,
+                    "status": wager.status,
+                    "created_at": wager.created_at.isoformat(),
+                })
 
         return stuck_escrows
 
@@ -182,7 +175,7 @@ class RecoveryTools:
         Returns:
             Transaction signature
         """
-        user = self.db.get_user(user_id)
+        user = await self.db.get_user(user_id)
         if not user:
             raise ValueError(f"User {user_id} not found")
 
@@ -217,7 +210,7 @@ class RecoveryTools:
 
         return tx_sig
 
-    def export_user_data(self, user_id: int) -> Dict:
+    async def export_user_data(self, user_id: int) -> Dict:
         """Export all user data for support/recovery.
 
         Args:
@@ -226,18 +219,18 @@ class RecoveryTools:
         Returns:
             Dict with all user data
         """
-        user = self.db.get_user(user_id)
+        user = await self.db.get_user(user_id)
         if not user:
             raise ValueError(f"User {user_id} not found")
 
         # Get games
-        games = self.db.get_user_games(user_id, limit=1000)
+        games = await self.db.get_user_games(user_id, limit=1000)
 
         # Get wagers
-        wagers = self.db.get_user_wagers(user_id)
+        wagers = await self.db.get_user_wagers(user_id)
 
         # Get transactions
-        transactions = self.db.get_user_transactions(user_id, limit=1000)
+        transactions = await self.db.get_user_transactions(user_id, limit=1000)
 
         return {
             "user": {
@@ -306,7 +299,7 @@ class RecoveryTools:
             "errors": [],
         }
 
-        wagers = self.db.get_open_wagers(limit=10000)
+        wagers = await self.db.get_open_wagers(limit=10000)
         results["total_wagers"] = len(wagers)
 
         for wager in wagers:
@@ -365,7 +358,7 @@ if __name__ == "__main__":
 
     logging.basicConfig(level=logging.INFO)
 
-    db = Database()
+    db = AsyncDatabase()
     encryption_key = os.getenv("ENCRYPTION_KEY")
     rpc_url = os.getenv("RPC_URL")
 
@@ -373,7 +366,10 @@ if __name__ == "__main__":
 
     # Verify all escrows
     async def main():
-        results = await recovery.verify_all_escrows()
+        try:
+            results = await recovery.verify_all_escrows()
+        finally:
+            await db.close()
         print("\nEscrow Verification Results:")
         print(f"Total Wagers: {results['total_wagers']}")
         print(f"Verified Escrows: {results['verified']}")
@@ -3,7 +3,10 @@ FastAPI web backend for Solana Coinflip game.
 Web-only with wallet connect (non-custodial).
 """
 import os
+import asyncio
+import functools
 import logging
+from contextlib import asynccontextmanager
 from typing import List, Optional
 from datetime import datetime, timedelta
 from collections import defaultdict
@@ -15,13 +18,15 @@ from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
 # Import our modules
-from database import Database, User, Game, Wager, GameType, CoinSide, GameStatus, UsedSignature, SupportTicket
+from database import AsyncDatabase, User, Game, Wager, GameType, CoinSide, GameStatus, UsedSignature, SupportTicket
 import uuid
 import secrets
 from game import (
     play_pvp_game_with_escrows,
     generate_wallet,
     get_sol_balance,
+    get_sol_balances,
+    get_lamport_balance,
     transfer_sol,
     get_latest_blockhash,
     verify_deposit_transaction,
@@ -33,6 +38,11 @@ from game import (
     refund_from_escrow,
     check_escrow_balance,
 )
+from game.rpc_clients import close_clients
+from database.pool import close_all_pools
+from database.writer import close_all_writers
+from game.solana_ops import RPC_POLL_MAX_AGE_SECONDS, get_read_stats
+from rpc_manager import get_rpc_manager, RPC_PROBE_INTERVAL_SECONDS
 # All game fees go directly to TREASURY_WALLET
 # Referral commissions are paid from escrow before sweeping
 from utils import (
@@ -66,6 +76,9 @@ from token_config import (
     BASE_FEE_RATE,
 )
 from token_checker import get_holder_status
+from snapshots import VersionedSnapshot
+from leaderboards import Leaderboards, WINDOWS
+from money import to_lamports, to_sol, pro_rata
 
 # Load environment
 load_dotenv()
@@ -79,8 +92,19 @@ RPC_URL = os.getenv("RPC_URL")
 TREASURY_WALLET = os.getenv("TREASURY_WALLET")
 ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY")
 
-# Database
-db = Database()
+# A prepare-accept holds a wager for this long before it is released
+ACCEPTING_TIMEOUT_SECONDS = 60
+ACCEPTING_SWEEP_INTERVAL_SECONDS = int(os.getenv("ACCEPTING_SWEEP_INTERVAL_SECONDS", "10"))
+
+# Expired sessions are rejected on lookup; the purge just keeps the table small
+SESSION_PURGE_INTERVAL_SECONDS = int(os.getenv("SESSION_PURGE_INTERVAL_SECONDS", "3600"))
+
+# Settled games/wagers/transactions older than this move to the archive database
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_INTERVAL_SECONDS = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+
+# Database (async facade - queries run off the event loop)
+db = AsyncDatabase()
 
 # SECURITY: Emergency stop flag
 def is_emergency_stop_enabled() -> bool:
@@ -132,8 +156,31 @@ def check_rate_limit(request: Request, endpoint: str, max_requests: int, window_
     # Add current request
     requests.append(now)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run background tasks for the life of the server, then close RPC clients and the database.
+
+    Queued writes are committed before the connection pools close.
+    """
+    await load_leaderboards()
+    tasks = [
+        asyncio.create_task(sweep_expired_accepting()),
+        asyncio.create_task(purge_expired_sessions()),
+        asyncio.create_task(archive_settled_history()),
+        asyncio.create_task(probe_rpc_endpoints()),
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await close_clients()
+    await db.close()
+    close_all_writers()
+    close_all_pools()
+
+
 # FastAPI app
-app = FastAPI(title="Solana Coinflip API", version="1.0.0")
+app = FastAPI(title="Solana Coinflip API", version="1.0.0", lifespan=lifespan)
 
 # CORS - SECURITY: Restrict to your domain in production
 # Development: allow_origins=["*"]
@@ -302,23 +349,17 @@ class WagerResponse(BaseModel):
 
 # ===== UTILITY FUNCTIONS =====
 
-def wallet_to_user_id(wallet_address: str) -> int:
-    """Convert wallet address to user ID (hash)."""
-    return abs(hash(wallet_address)) % (10 ** 10)
-
-
-def ensure_web_user(wallet_address: str) -> User:
-    """Ensure web user exists."""
-    user_id = wallet_to_user_id(wallet_address)
-    user = db.get_user(user_id)
+async def ensure_web_user(wallet_address: str) -> User:
+    """Ensure web user exists (looked up by wallet; new users get a database-assigned id)."""
+    user = await db.get_user_by_wallet(wallet_address)
 
     if not user:
         user = User(
-            user_id=user_id,
+            user_id=None,
             platform="web",
             connected_wallet=wallet_address,
         )
-        db.save_user(user)
+        await db.save_user(user)
         logger.info(f"Created new web user for wallet {wallet_address}")
 
     return user
@@ -334,25 +375,25 @@ def get_session_token(request: Request) -> Optional[str]:
     return None
 
 
-def get_current_user(request: Request) -> Optional[User]:
+async def get_current_user(request: Request) -> Optional[User]:
     """Get current authenticated user from session."""
     token = get_session_token(request)
     if not token:
         return None
-    return db.get_user_by_session(token)
+    return await db.get_user_by_session(token)
 
 
-def require_auth(request: Request) -> User:
+async def require_auth(request: Request) -> User:
     """Require authenticated user, raise 401 if not."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated. Please login.")
     return user
 
 
-def require_admin(request: Request) -> User:
+async def require_admin(request: Request) -> User:
     """Require authenticated admin user, raise 401/403 if not."""
-    user = get_current_user(request)
+    user = await get_current_user(request)
     if not user:
         raise HTTPException(status_code=401, detail="Not authenticated. Please login.")
     if not user.is_admin:
@@ -361,6 +402,14 @@ def require_admin(request: Request) -> User:
     return user
 
 
+async def paginate(page_query):
+    """Await a keyset page query, turning a bad cursor into a 400."""
+    try:
+        return await page_query
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 def get_tier_progress(total_wagered: float, current_tier: str) -> dict:
     """Calculate progress to next tier."""
     tier_order = ["Starter", "Bronze", "Silver", "Gold", "Diamond"]
@@ -418,7 +467,7 @@ async def register(request: RegisterRequest, http_request: Request):
         raise HTTPException(status_code=400, detail="Invalid email format")
 
     # Check if email already exists
-    if db.email_exists(request.email):
+    if await db.email_exists(request.email):
         raise HTTPException(status_code=400, detail="Email already registered")
 
     # Validate username
@@ -427,7 +476,7 @@ async def register(request: RegisterRequest, http_request: Request):
         raise HTTPException(status_code=400, detail=error)
 
     # Check if username already taken
-    if db.username_exists(request.username):
+    if await db.username_exists(request.username):
         raise HTTPException(status_code=400, detail="Username already taken")
 
     # Validate password
@@ -442,14 +491,14 @@ async def register(request: RegisterRequest, http_request: Request):
     # Handle referral code
     referred_by = None
     if request.referral_code:
-        referrer = db.get_user_by_referral_code(request.referral_code)
+        referrer = await db.get_user_by_referral_code(request.referral_code)
         if referrer:
             referred_by = referrer.user_id
             logger.info(f"New user referred by user {referrer.user_id} (code: {request.referral_code})")
 
     # Generate unique referral code for new user
     user_referral_code = generate_referral_code()
-    while db.get_user_by_referral_code(user_referral_code):
+    while await db.get_user_by_referral_code(user_referral_code):
         user_referral_code = generate_referral_code()
 
     # Create user
@@ -465,22 +514,22 @@ async def register(request: RegisterRequest, http_request: Request):
         referred_by=referred_by,
     )
 
-    # Create session
-    session_token, session_expires = create_session(user)
-    user.session_token = session_token
-    user.session_expires = session_expires
     user.last_login = datetime.utcnow()
 
     # Save user
-    user_id = db.save_user(user)
+    user_id = await db.save_user(user)
     user.user_id = user_id
 
+    # Create session
+    session_token, session_expires = create_session(user)
+    await db.create_session(user_id, session_token, session_expires)
+
     # Update referrer's referral count
     if referred_by:
-        referrer = db.get_user(referred_by)
+        referrer = await db.get_user(referred_by)
         if referrer:
             referrer.total_referrals += 1
-            db.save_user(referrer)
+            await db.save_user(referrer)
 
     logger.info(f"New user registered: {user.email} (ID: {user_id})")
 
@@ -504,7 +553,7 @@ async def login(request: LoginRequest, http_request: Request):
     check_rate_limit(http_request, "login", max_requests=10, window_seconds=60)
 
     # Find user by username
-    user = db.get_user_by_username(request.username.lower())
+    user = await db.get_user_by_username(request.username.lower())
 
     if not user or not user.password_hash:
         raise HTTPException(status_code=401, detail="Invalid username or password")
@@ -513,14 +562,13 @@ async def login(request: LoginRequest, http_request: Request):
     if not verify_password(request.password, user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid username or password")
 
-    # Create new session
+    # Create new session (sessions on other devices stay logged in)
     session_token, session_expires = create_session(user)
-    user.session_token = session_token
-    user.session_expires = session_expires
+    await db.create_session(user.user_id, session_token, session_expires)
+
     user.last_login = datetime.utcnow()
     user.last_active = datetime.utcnow()
-
-    db.save_user(user)
+    await db.save_user(user)
 
     logger.info(f"User logged in: {user.username} ({user.email})")
 
@@ -540,29 +588,63 @@ async def login(request: LoginRequest, http_request: Request):
 
 @app.post("/api/auth/logout")
 async def logout(http_request: Request):
-    """Logout and invalidate session."""
-    user = get_current_user(http_request)
+    """Logout and invalidate this device's session."""
+    user = await get_current_user(http_request)
 
     if user:
-        user.session_token = None
-        user.session_expires = None
-        db.save_user(user)
+        await db.delete_session(get_session_token(http_request))
         logger.info(f"User logged out: {user.email}")
 
     return {"success": True, "message": "Logged out successfully"}
 
 
+async def purge_expired_sessions():
+    """Background task: delete expired sessions."""
+    while True:
+        await asyncio.sleep(SESSION_PURGE_INTERVAL_SECONDS)
+        try:
+            purged = await db.purge_expired_sessions()
+            if purged:
+                logger.info(f"Purged {purged} expired sessions")
+        except Exception as e:
+            logger.error(f"Session purge failed: {e}", exc_info=True)
+
+
+async def archive_settled_history():
+    """Background task: move old settled history out of the hot tables.
+
+    Also drops hourly leaderboard rollups that have left every window.
+    """
+    while True:
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
+        try:
+            await db.archive_settled(datetime.utcnow() - timedelta(days=ARCHIVE_AFTER_DAYS))
+            await db.prune_leaderboard_hours(datetime.utcnow() - timedelta(hours=WINDOWS["7d"]))
+        except Exception as e:
+            logger.error(f"Archiving settled history failed: {e}", exc_info=True)
+
+
+async def probe_rpc_endpoints():
+    """Background task: keep RPC endpoint latency/error stats current, even for idle backups."""
+    while True:
+        try:
+            await get_rpc_manager(RPC_URL).probe()
+        except Exception as e:
+            logger.error(f"RPC endpoint probe failed: {e}", exc_info=True)
+        await asyncio.sleep(RPC_PROBE_INTERVAL_SECONDS)
+
+
 @app.get("/api/auth/me")
 async def get_me(http_request: Request) -> ProfileResponse:
     """Get current authenticated user's profile."""
-    user = require_auth(http_request)
+    user = await require_auth(http_request)
 
     # Update tier based on volume
     tier, fee_rate, _ = calculate_tier(user.total_wagered)
     if tier != user.tier:
         user.tier = tier
         user.tier_fee_rate = fee_rate
-        db.save_user(user)
+        await db.save_user(user)
 
     tier_progress = get_tier_progress(user.total_wagered, user.tier)
 
@@ -582,7 +664,7 @@ async def get_me(http_request: Request) -> ProfileResponse:
             user.token_balance = holder_status['balance']
             user.token_tier = holder_status['tier']
             user.token_balance_checked_at = datetime.utcnow()
-            db.save_user(user)
+            await db.save_user(user)
 
             # Only include in response if they hold tokens
             if holder_status['balance'] > 0:
@@ -630,7 +712,7 @@ async def get_me(http_request: Request) -> ProfileResponse:
 @app.post("/api/profile/update")
 async def update_profile(request: UpdateProfileRequest, http_request: Request):
     """Update user profile settings."""
-    user = require_auth(http_request)
+    user = await require_auth(http_request)
 
     if request.display_name is not None:
         if len(request.display_name) > 50:
@@ -644,7 +726,7 @@ async def update_profile(request: UpdateProfileRequest, http_request: Request):
         user.payout_wallet = request.payout_wallet
 
     user.last_active = datetime.utcnow()
-    db.save_user(user)
+    await db.save_user(user)
 
     return {
         "success": True,
@@ -657,7 +739,7 @@ async def update_profile(request: UpdateProfileRequest, http_request: Request):
 @app.post("/api/profile/referral-code")
 async def update_referral_code(request: UpdateReferralCodeRequest, http_request: Request):
     """Update user's custom referral code (max 16 characters, alphanumeric)."""
-    user = require_auth(http_request)
+    user = await require_auth(http_request)
 
     # Validate referral code format
     new_code = request.referral_code.upper()  # Store as uppercase
@@ -666,14 +748,14 @@ async def update_referral_code(request: UpdateReferralCodeRequest, http_request:
         raise HTTPException(status_code=400, detail=error)
 
     # Check if code is already taken by another user
-    existing_user = db.get_user_by_referral_code(new_code)
+    existing_user = await db.get_user_by_referral_code(new_code)
     if existing_user and existing_user.user_id != user.user_id:
         raise HTTPException(status_code=400, detail="This referral code is already taken")
 
     # Update user's referral code
     old_code = user.referral_code
     user.referral_code = new_code
-    db.save_user(user)
+    await db.save_user(user)
 
     logger.info(f"User {user.user_id} updated referral code from {old_code} to {new_code}")
 
@@ -688,7 +770,7 @@ async def update_referral_code(request: UpdateReferralCodeRequest, http_request:
 @app.get("/api/profile/referrals")
 async def get_referral_stats(http_request: Request):
     """Get user's referral statistics and earnings."""
-    user = require_auth(http_request)
+    user = await require_auth(http_request)
 
     # Get claimable balance if user has escrow
     claimable = 0.0
@@ -724,6 +806,69 @@ async def get_referral_stats(http_request: Request):
     }
 
 
+@app.get("/api/profile/games")
+async def get_game_history(http_request: Request, limit: int = 20, cursor: Optional[str] = None):
+    """Get the current user's game history, newest first.
+
+    Pass the returned `next_cursor` as `cursor` to fetch the next page.
+    """
+    user = await require_auth(http_request)
+
+    games, next_cursor = await paginate(db.get_user_games_page(user.user_id, limit=min(limit, 100), cursor=cursor))
+
+    def my_side(game: Game) -> Optional[str]:
+        side = game.player1_side if game.player1_id == user.user_id else game.player2_side
+        return side.value if side else None
+
+    return {
+        "success": True,
+        "next_cursor": next_cursor,
+        "games": [
+            {
+                "game_id": g.game_id,
+                "game_type": g.game_type.value,
+                "amount": g.amount,
+                "status": g.status.value,
+                "side": my_side(g),
+                "result": g.result.value if g.result else None,
+                "won": g.winner_id == user.user_id if g.winner_id else None,
+                "created_at": g.created_at.isoformat() if g.created_at else None,
+                "completed_at": g.completed_at.isoformat() if g.completed_at else None
+            }
+            for g in games
+        ]
+    }
+
+
+@app.get("/api/profile/transactions")
+async def get_transaction_history(http_request: Request, limit: int = 20, cursor: Optional[str] = None):
+    """Get the current user's transaction history, newest first.
+
+    Pass the returned `next_cursor` as `cursor` to fetch the next page.
+    """
+    user = await require_auth(http_request)
+
+    transactions, next_cursor = await paginate(
+        db.get_user_transactions_page(user.user_id, limit=min(limit, 100), cursor=cursor)
+    )
+
+    return {
+        "success": True,
+        "next_cursor": next_cursor,
+        "transactions": [
+            {
+                "tx_id": t.tx_id,
+                "tx_type": t.tx_type,
+                "amount": t.amount,
+                "signature": t.signature,
+                "game_id": t.game_id,
+                "timestamp": t.timestamp.isoformat() if t.timestamp else None
+            }
+            for t in transactions
+        ]
+    }
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
@@ -735,7 +880,7 @@ async def health_check():
 @app.post("/api/user/connect")
 async def connect_user(request: CreateUserRequest) -> UserResponse:
     """Connect a web3 wallet."""
-    user = ensure_web_user(request.wallet_address)
+    user = await ensure_web_user(request.wallet_address)
 
     return UserResponse(
         user_id=user.user_id,
@@ -752,7 +897,7 @@ async def connect_user(request: CreateUserRequest) -> UserResponse:
 @app.get("/api/user/{wallet_address}")
 async def get_user_stats(wallet_address: str) -> UserResponse:
     """Get user statistics."""
-    user = ensure_web_user(wallet_address)
+    user = await ensure_web_user(wallet_address)
 
     return UserResponse(
         user_id=user.user_id,
@@ -770,7 +915,8 @@ async def get_user_stats(wallet_address: str) -> UserResponse:
 async def get_balance(wallet_address: str):
     """Get wallet SOL balance."""
     try:
-        balance = await get_sol_balance(RPC_URL, wallet_address)
+        # Polled: concurrent lookups of one wallet share a single RPC read
+        balance = await get_sol_balance(RPC_URL, wallet_address, RPC_POLL_MAX_AGE_SECONDS)
         return {"wallet": wallet_address, "balance": balance}
     except Exception as e:
         logger.error(f"Failed to get balance for {wallet_address}: {e}", exc_info=True)
@@ -782,14 +928,14 @@ async def get_balance(wallet_address: str):
 @app.get("/api/game/{game_id}")
 async def get_game(game_id: str) -> GameResponse:
     """Get game details."""
-    game = db.get_game(game_id)
+    game = await db.get_game(game_id)
 
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
 
     winner_wallet = None
     if game.winner_id:
-        winner_user = db.get_user(game.winner_id)
+        winner_user = await db.get_user(game.winner_id)
         if winner_user:
             winner_wallet = winner_user.connected_wallet or winner_user.wallet_address
 
@@ -812,7 +958,7 @@ async def verify_game(game_id: str):
     """Verify game fairness."""
     from game.coinflip import verify_game_result
 
-    game = db.get_game(game_id)
+    game = await db.get_game(game_id)
 
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
@@ -856,7 +1002,7 @@ async def get_recent_games(limit: int = 10) -> List[RecentGameResponse]:
     """
     import hashlib
 
-    games = db.get_recent_games(limit=min(limit, 50))  # Cap at 50
+    games = await db.get_recent_games(limit=min(limit, 50))  # Cap at 50
 
     results = []
     for game in games:
@@ -867,7 +1013,7 @@ async def get_recent_games(limit: int = 10) -> List[RecentGameResponse]:
         winner_wallet = ""
         winner_username = None
         if game.winner_id:
-            winner_user = db.get_user(game.winner_id)
+            winner_user = await db.get_user(game.winner_id)
             if winner_user:
                 winner_wallet = winner_user.connected_wallet or winner_user.payout_wallet or ""
                 winner_username = winner_user.username
@@ -882,7 +1028,7 @@ async def get_recent_games(limit: int = 10) -> List[RecentGameResponse]:
 
             # Fallback: look up by wallet if no username found
             if not winner_username and winner_wallet:
-                wallet_user = db.get_user_by_wallet(winner_wallet)
+                wallet_user = await db.get_user_by_wallet(winner_wallet)
                 if wallet_user and wallet_user.username:
                     winner_username = wallet_user.username
 
@@ -927,6 +1073,119 @@ async def get_recent_games(limit: int = 10) -> List[RecentGameResponse]:
     return results
 
 
+# Incrementally maintained top-K boards, rebuilt from the leaderboard rollup on startup
+leaderboards = Leaderboards()
+
+
+async def load_leaderboards():
+    """Seed the in-memory leaderboards from the leaderboard rollup."""
+    hours = await db.get_leaderboard_hours(datetime.utcnow() - timedelta(hours=WINDOWS["7d"]))
+    all_time = {}
+    for column in ("won", "wagered", "best_win"):
+        for row in await db.get_leaderboard_top(column, leaderboards.size):
+            all_time[row.user_id] = row
+    leaderboards.load(hours, all_time.values())
+
+
+async def build_leaderboard(window: str):
+    """Build one window's leaderboard payload for leaderboard_snapshots."""
+    moved = leaderboards.roll(datetime.utcnow())
+    if moved:
+        # Every window's content shifted, not just this one
+        for other, snapshot in leaderboard_snapshots.items():
+            if other != window:
+                snapshot.invalidate()
+
+    boards = leaderboards.top(window)
+    user_ids = {user_id for entries in boards.values() for user_id, _, _ in entries}
+    users = {user_id: await db.get_user(user_id) for user_id in user_ids}
+
+    def entry(rank: int, user_id: int, lamports: int, game_id: Optional[str]) -> dict:
+        user = users.get(user_id)
+        item = {
+            "rank": rank,
+            "username": user.username if user else None,
+            "wallet": (user.connected_wallet or user.payout_wallet) if user else None,
+            "amount": to_sol(lamports),
+        }
+        if game_id:
+            item["game_id"] = game_id
+        return item
+
+    payload = {
+        "window": window,
+        **{
+            board: [entry(rank, *item) for rank, item in enumerate(entries, 1)]
+            for board, entries in boards.items()
+        },
+    }
+    # Windowed boards change when the hour turns, even without a new game
+    return payload, leaderboards.seconds_until_roll() if WINDOWS[window] else None
+
+
+# Rebuilt after each settlement, and hourly for the moving windows
+leaderboard_snapshots = {
+    window: VersionedSnapshot(f"leaderboard_{window}", functools.partial(build_leaderboard, window))
+    for window in WINDOWS
+}
+
+
+@app.get("/api/games/leaderboard")
+async def get_leaderboard(http_request: Request, window: str = "24h"):
+    """Top winners, top volume and biggest wins for a window (24h, 7d or all).
+
+    Maintained incrementally from game results and served as an ETag snapshot.
+    """
+    snapshot = leaderboard_snapshots.get(window)
+    if snapshot is None:
+        raise HTTPException(status_code=400, detail=f"window must be one of: {', '.join(WINDOWS)}")
+    return await snapshot.respond(http_request)
+
+
+# Days of daily rollups shown by the public stats endpoint
+PUBLIC_STATS_DAYS = 30
+
+
+def seconds_until_utc_midnight() -> float:
+    """Seconds until the current UTC day (and its rollup row) ends."""
+    now = datetime.utcnow()
+    return (datetime.combine(now.date() + timedelta(days=1), datetime.min.time()) - now).total_seconds()
+
+
+async def build_public_stats():
+    """Build the public stats payload for stats_snapshot."""
+    days = await db.get_daily_stats(PUBLIC_STATS_DAYS)
+    players = await db.get_active_player_count(PUBLIC_STATS_DAYS)
+
+    payload = {
+        "window_days": PUBLIC_STATS_DAYS,
+        "totals": {
+            "games": sum(d.games for d in days),
+            "volume": to_sol(sum(to_lamports(d.volume) for d in days)),
+            "players": players,
+        },
+        "days": [
+            {"day": d.day, "games": d.games, "volume": d.volume, "players": d.players}
+            for d in days
+        ],
+    }
+    # The window moves at midnight even without a new game
+    return payload, seconds_until_utc_midnight()
+
+
+# Rebuilt after each settlement (record_game_result) and at UTC midnight
+stats_snapshot = VersionedSnapshot("stats", build_public_stats)
+
+
+@app.get("/api/stats")
+async def get_public_stats(http_request: Request):
+    """Platform volume, game count and unique players per day (last 30 days).
+
+    Read from the daily rollups and served as an ETag snapshot.
+    """
+    return await stats_snapshot.respond(http_request)
+
+
 # === WAGER ENDPOINTS (PVP) ===
 
 @app.post("/api/wager/create")
@@ -949,7 +1208,7 @@ async def create_wager(request: CreateWagerRequest, http_request: Request) -> Wa
         from game.solana_ops import generate_wallet
         from utils import encrypt_secret
 
-        user = ensure_web_user(request.creator_wallet)
+        user = await ensure_web_user(request.creator_wallet)
 
         # Validate side
         if request.side not in ["heads", "tails"]:
@@ -984,7 +1243,8 @@ async def create_wager(request: CreateWagerRequest, http_request: Request) -> Wa
         )
 
         # Save to database
-        db.save_wager(wager)
+        await db.save_wager(wager)
+        open_wagers_snapshot.invalidate()
 
         logger.info(f"Wager created (pending): {wager_id} by {request.creator_wallet} - {request.amount} SOL on {side.value}")
 
@@ -1025,7 +1285,7 @@ async def verify_wager_deposit(wager_id: str, request: VerifyDepositRequest, htt
         from database import UsedSignature
 
         # Get the pending wager
-        wager = db.get_wager(wager_id)
+        wager = await db.get_wager(wager_id)
 
         if not wager:
             raise HTTPException(status_code=404, detail="Wager not found")
@@ -1033,9 +1293,9 @@ async def verify_wager_deposit(wager_id: str, request: VerifyDepositRequest, htt
         if wager.status != "pending_deposit":
             raise HTTPException(status_code=400, detail=f"Wager is not awaiting deposit (status: {wager.status})")
 
-        # SECURITY: Check if signature already used
-        if db.signature_already_used(request.tx_signature):
-            used_sig = db.get_used_signature(request.tx_signature)
+        # SECURITY: Reject known replays before paying for on-chain verification
+        used_sig = await db.get_used_signature(request.tx_signature)
+        if used_sig:
             raise HTTPException(
                 status_code=400,
                 detail=f"Transaction signature already used for {used_sig.used_for}"
@@ -1067,18 +1327,23 @@ async def verify_wager_deposit(wager_id: str, request: VerifyDepositRequest, htt
 
         logger.info(f"[VERIFY] Deposit verified successfully for wager {wager_id}")
 
-        # Record used signature
-        used_sig = UsedSignature(
+        # SECURITY: Claim the signature - atomic, so a concurrent replay can't also pass
+        used_sig = await db.claim_signature(UsedSignature(
             signature=request.tx_signature,
             user_wallet=wager.creator_wallet,
             used_for=f"wager_deposit_{wager_id}",
-        )
-        db.save_used_signature(used_sig)
+        ))
+        if used_sig:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Transaction signature already used for {used_sig.used_for}"
+            )
 
         # Update wager status to open
         wager.status = "open"
         wager.creator_deposit_tx = request.tx_signature
-        db.save_wager(wager)
+        await db.save_wager(wager)
+        open_wagers_snapshot.invalidate()
 
         logger.info(f"[DEPOSIT] Verified deposit for wager {wager_id}: {request.tx_signature}")
 
@@ -1107,57 +1372,69 @@ async def verify_wager_deposit(wager_id: str, request: VerifyDepositRequest, htt
         raise HTTPException(status_code=500, detail="Failed to verify deposit. Please try again.")
 
 
-@app.get("/api/wagers/open")
-async def get_open_wagers() -> List[WagerResponse]:
-    """Get all open wagers."""
-    wagers = db.get_open_wagers(limit=20)
-
-    # Timeout for accepting state (60 seconds)
-    ACCEPTING_TIMEOUT_SECONDS = 60
+async def build_open_wagers():
+    """Build the open wager lobby payload for open_wagers_snapshot."""
+    wagers = await db.get_open_wager_listings(limit=20)
 
+    now = datetime.utcnow()
     result = []
+    stale_in = None  # Seconds until the first accepting hold times out
     for w in wagers:
-        # Get creator's username for display
-        # Try by ID first, then by wallet (handles different user ID systems)
-        creator = db.get_user(w.creator_id)
-        creator_username = creator.username if creator and creator.username else None
-
-        # Fallback: look up by wallet address if no username found
-        if not creator_username and w.creator_wallet:
-            wallet_user = db.get_user_by_wallet(w.creator_wallet)
-            if wallet_user and wallet_user.username:
-                creator_username = wallet_user.username
-
-        # Check if someone is actively accepting this wager (within timeout)
+        # Someone is actively accepting this wager (stale holds are cleared by the sweeper)
         is_accepting = False
-        accepting_by = None
         if w.accepting_at and w.acceptor_wallet:
-            time_since_accept = (datetime.utcnow() - w.accepting_at).total_seconds()
-            if time_since_accept < ACCEPTING_TIMEOUT_SECONDS:
+            remaining = ACCEPTING_TIMEOUT_SECONDS - (now - w.accepting_at).total_seconds()
+            if remaining > 0:
                 is_accepting = True
-                accepting_by = w.acceptor_wallet
-            else:
-                # Timeout expired - clear accepting state
-                w.accepting_at = None
-                w.acceptor_wallet = None
-                w.acceptor_escrow_address = None
-                w.acceptor_escrow_secret = None
-                db.save_wager(w)
+                stale_in = remaining if stale_in is None else min(stale_in, remaining)
 
         result.append(WagerResponse(
             wager_id=w.wager_id,
             id=w.wager_id,  # Frontend uses 'id' for compatibility
             creator_wallet=w.creator_wallet,
-            creator_username=creator_username,
+            creator_username=w.creator_username,
             creator_side=w.creator_side.value,
             amount=w.amount,
             status=w.status,
             created_at=w.created_at.isoformat(),
             is_accepting=is_accepting,
-            accepting_by=accepting_by
-        ))
+            accepting_by=w.acceptor_wallet if is_accepting else None
+        ).model_dump())
+
+    return result, stale_in
 
-    return result
+
+# Rebuilt only after a wager write calls invalidate() (or an accepting hold times out)
+open_wagers_snapshot = VersionedSnapshot("open_wagers", build_open_wagers)
+
+
+@app.get("/api/wagers/open", response_model=List[WagerResponse])
+async def get_open_wagers(http_request: Request):
+    """Get all open wagers.
+
+    Served from a pre-serialized snapshot with a strong ETag - polls with
+    a matching If-None-Match get 304 Not Modified.
+    """
+    return await open_wagers_snapshot.respond(http_request)
+
+
+async def sweep_expired_accepting():
+    """Background task: release wagers whose prepare-accept timed out."""
+    while True:
+        await asyncio.sleep(ACCEPTING_SWEEP_INTERVAL_SECONDS)
+        try:
+            cutoff = datetime.utcnow() - timedelta(seconds=ACCEPTING_TIMEOUT_SECONDS)
+            released = await db.clear_expired_accepting(cutoff)
+            if released:
+                open_wagers_snapshot.invalidate()
+            for wager_id in released:
+                logger.info(f"[ACCEPT-TIMEOUT] Released wager {wager_id}")
+                await manager.broadcast({
+                    "type": "wager_abandon",
+                    "wager_id": wager_id
+                })
+        except Exception as e:
+            logger.error(f"Accepting sweep failed: {e}", exc_info=True)
 
 
 class PrepareAcceptRequest(BaseModel):
@@ -1175,7 +1452,7 @@ async def prepare_accept_wager(wager_id: str, request: PrepareAcceptRequest, htt
 
     try:
         # Get the wager
-        wager = db.get_wager(wager_id)
+        wager = await db.get_wager(wager_id)
         if not wager:
             raise HTTPException(status_code=404, detail="Wager not found")
 
@@ -1201,10 +1478,11 @@ async def prepare_accept_wager(wager_id: str, request: PrepareAcceptRequest, htt
         wager.accepting_at = datetime.utcnow()  # Track when accepting started
 
         logger.info(f"[PREPARE-ACCEPT] BEFORE SAVE - Wager {wager_id}: acceptor_wallet={wager.acceptor_wallet}, escrow={escrow_address}")
-        db.save_wager(wager)
+        await db.save_wager(wager)
+        open_wagers_snapshot.invalidate()
 
         # Verify it was saved
-        saved_wager = db.get_wager(wager_id)
+        saved_wager = await db.get_wager(wager_id)
         logger.info(f"[PREPARE-ACCEPT] AFTER SAVE - Wager {wager_id}: acceptor_wallet={saved_wager.acceptor_wallet}, escrow={saved_wager.acceptor_escrow_address}")
 
         # Broadcast to all clients that someone is accepting this wager
@@ -1235,12 +1513,15 @@ async def check_wager_deposit(wager_id: str, http_request: Request):
 
     Monitors the escrow wallet balance and recent transactions to detect deposits.
     Returns transaction signature if deposit found, null otherwise.
+
+    Every open browser polls this, so its chain reads are coalesced across
+    pollers and may be up to RPC_POLL_MAX_AGE_SECONDS old.
     """
     try:
         from game.solana_ops import check_escrow_deposit
 
         # Get the wager
-        wager = db.get_wager(wager_id)
+        wager = await db.get_wager(wager_id)
         if not wager:
             raise HTTPException(status_code=404, detail="Wager not found")
 
@@ -1256,7 +1537,8 @@ async def check_wager_deposit(wager_id: str, http_request: Request):
                 RPC_URL,
                 wager.creator_escrow_address,
                 wager.creator_wallet,
-                wager.amount
+                wager.amount,
+                max_age=RPC_POLL_MAX_AGE_SECONDS
             )
 
             if tx_sig:
@@ -1279,13 +1561,14 @@ async def check_wager_deposit(wager_id: str, http_request: Request):
 
             # Get escrow balance for debugging
             from game.solana_ops import get_sol_balance
-            current_balance = await get_sol_balance(RPC_URL, wager.acceptor_escrow_address)
+            current_balance = await get_sol_balance(RPC_URL, wager.acceptor_escrow_address, RPC_POLL_MAX_AGE_SECONDS)
 
             tx_sig = await check_escrow_deposit(
                 RPC_URL,
                 wager.acceptor_escrow_address,
                 wager.acceptor_wallet,
-                wager.amount
+                wager.amount,
+                max_age=RPC_POLL_MAX_AGE_SECONDS
             )
 
             if tx_sig:
@@ -1327,7 +1610,7 @@ async def abandon_accept_wager(wager_id: str, request: AbandonAcceptRequest):
     Called when user closes the accept modal without completing the deposit.
     """
     try:
-        wager = db.get_wager(wager_id)
+        wager = await db.get_wager(wager_id)
         if not wager:
             raise HTTPException(status_code=404, detail="Wager not found")
 
@@ -1348,7 +1631,8 @@ async def abandon_accept_wager(wager_id: str, request: AbandonAcceptRequest):
         wager.acceptor_wallet = None
         wager.acceptor_escrow_address = None
         wager.acceptor_escrow_secret = None
-        db.save_wager(wager)
+        await db.save_wager(wager)
+        open_wagers_snapshot.invalidate()
 
         logger.info(f"[ABANDON-ACCEPT] Wager {wager_id} - acceptor {request.acceptor_wallet} abandoned")
 
@@ -1383,16 +1667,16 @@ async def accept_wager_endpoint(wager_id: str, request: AcceptWagerRequest, http
 
     try:
         # Get the logged-in user (not anonymous wallet user!)
-        user = get_current_user(http_request)
+        user = await get_current_user(http_request)
         if not user:
             # Fallback to wallet-based user if not logged in
-            user = ensure_web_user(request.acceptor_wallet)
+            user = await ensure_web_user(request.acceptor_wallet)
             logger.info(f"[WAGER] Using anonymous wallet user for {request.acceptor_wallet}")
         else:
             logger.info(f"[WAGER] Using logged-in user: {user.username} (ID: {user.user_id})")
 
         # Get wager using path parameter
-        wager = db.get_wager(wager_id)
+        wager = await db.get_wager(wager_id)
 
         if not wager:
             raise HTTPException(status_code=404, detail="Wager not found")
@@ -1402,27 +1686,29 @@ async def accept_wager_endpoint(wager_id: str, request: AcceptWagerRequest, http
             raise HTTPException(status_code=400, detail="Cannot accept your own wager")
 
         # Get creator - try by ID first, then by wallet if that fails
-        creator = db.get_user(wager.creator_id)
+        creator = await db.get_user(wager.creator_id)
         if not creator:
             # Fallback: ensure creator exists via wallet (handles old wagers)
-            creator = ensure_web_user(wager.creator_wallet)
+            creator = await ensure_web_user(wager.creator_wallet)
             logger.info(f"[WAGER] Creator not found by ID, created/found via wallet: {wager.creator_wallet}")
 
         # CRITICAL FIX: Ensure both users have connected_wallet set for the game
         # This fixes "One or both players have no wallet" error
         if not creator.connected_wallet:
             creator.connected_wallet = wager.creator_wallet
-            db.save_user(creator)
+            await db.save_user(creator)
             logger.info(f"[WAGER] Set creator connected_wallet to {wager.creator_wallet}")
 
         if not user.connected_wallet:
             user.connected_wallet = request.acceptor_wallet
-            db.save_user(user)
+            await db.save_user(user)
             logger.info(f"[WAGER] Set acceptor connected_wallet to {request.acceptor_wallet}")
 
         # SECURITY: Atomically accept wager (prevents double-acceptance race condition)
-        # This uses an exclusive database lock to ensure only one user can accept
-        accepted = db.atomic_accept_wager(wager_id, user.user_id)
+        # The conditional update runs on the single writer, so only one user can accept
+        accepted = await db.atomic_accept_wager(wager_id, user.user_id)
+        if accepted:
+            open_wagers_snapshot.invalidate()
 
         if not accepted:
             raise HTTPException(
@@ -1431,7 +1717,7 @@ async def accept_wager_endpoint(wager_id: str, request: AcceptWagerRequest, http
             )
 
         # Reload wager to get updated status
-        wager = db.get_wager(wager_id)
+        wager = await db.get_wager(wager_id)
         if not wager:
             # Shouldn't happen, but handle gracefully
             raise HTTPException(status_code=500, detail="Wager disappeared after acceptance")
@@ -1475,7 +1761,7 @@ async def accept_wager_endpoint(wager_id: str, request: AcceptWagerRequest, http
 
         # Play PVP game with isolated escrow wallets
         # All fees go to treasury, referral commissions paid from escrow
-        game = await play_pvp_game_with_escrows(
+        settlement = await play_pvp_game_with_escrows(
             RPC_URL,
             TREASURY_WALLET,
             creator,
@@ -1485,25 +1771,24 @@ async def accept_wager_endpoint(wager_id: str, request: AcceptWagerRequest, http
             user,
             wager.acceptor_escrow_secret,
             wager.acceptor_escrow_address,
-            wager.amount
+            wager.amount,
+            db=db
         )
 
+        game = settlement.game
+
         # Update wager status to accepted/completed
         wager.status = "accepted"
         wager.game_id = game.game_id
-        db.save_wager(wager)
-
-        # Save game
-        db.save_game(game)
 
-        # Update both players' stats
+        # Mirror the stat increments on the in-memory users (for logs/response)
         creator.games_played += 1
         creator.total_wagered += wager.amount
         user.games_played += 1
         user.total_wagered += wager.amount
 
         won = (game.winner_id == user.user_id)
-        payout = (wager.amount * 2) * 0.98
+        payout = to_sol(settlement.payout)
 
         if won:
             user.games_won += 1
@@ -1517,8 +1802,20 @@ async def accept_wager_endpoint(wager_id: str, request: AcceptWagerRequest, http
         logger.info(f"📊 Updating stats for {user.username} - Games: {user.games_played}, Wagered: {user.total_wagered}, Won: {user.games_won}")
         logger.info(f"📊 Updating stats for {creator.username} - Games: {creator.games_played}, Wagered: {creator.total_wagered}, Won: {creator.games_won}")
 
-        db.save_user(creator)
-        db.save_user(user)
+        # Save game, wager and both players' stats in one transaction
+        all_time = await db.record_game_result(
+            game, wager, settlement.payout, settlement.fee, settlement.winner_tier,
+            settlement.referrer_id, settlement.referral_commission
+        )
+        open_wagers_snapshot.invalidate()
+        stats_snapshot.invalidate()
+
+        leaderboards.record(
+            game.completed_at or datetime.utcnow(), game.game_id, (game.player1_id, game.player2_id),
+            game.winner_id, to_lamports(game.amount), settlement.payout, all_time
+        )
+        for snapshot in leaderboard_snapshots.values():
+            snapshot.invalidate()
 
         logger.info(f"✅ Stats saved for both players")
 
@@ -1560,7 +1857,8 @@ async def accept_wager_endpoint(wager_id: str, request: AcceptWagerRequest, http
         if 'wager' in locals():
             wager.status = "open"
             wager.acceptor_id = None
-            db.save_wager(wager)
+            await db.save_wager(wager)
+            open_wagers_snapshot.invalidate()
         raise HTTPException(status_code=500, detail="Failed to accept wager. Please try again.")
 
 
@@ -1571,10 +1869,10 @@ async def cancel_wager_endpoint(request: CancelWagerRequest):
     SECURITY: Refunds wager amount to creator, keeps 0.025 SOL transaction fee.
     """
     try:
-        user = ensure_web_user(request.creator_wallet)
+        user = await ensure_web_user(request.creator_wallet)
 
         # Get wager
-        wagers = db.get_open_wagers(limit=100)
+        wagers = await db.get_open_wagers(limit=100)
         wager = next((w for w in wagers if w.wager_id == request.wager_id), None)
 
         if not wager:
@@ -1589,7 +1887,6 @@ async def cancel_wager_endpoint(request: CancelWagerRequest):
             raise HTTPException(status_code=400, detail="Can only cancel open wagers")
 
         # Cannot cancel while someone is actively accepting (within 60 second timeout)
-        ACCEPTING_TIMEOUT_SECONDS = 60
         if wager.accepting_at and wager.acceptor_wallet:
             time_since_accept = (datetime.utcnow() - wager.accepting_at).total_seconds()
             if time_since_accept < ACCEPTING_TIMEOUT_SECONDS:
@@ -1602,7 +1899,8 @@ async def cancel_wager_endpoint(request: CancelWagerRequest):
         if not wager.creator_escrow_address or not wager.creator_escrow_secret:
             # Old wager without escrow - just mark as cancelled
             wager.status = "cancelled"
-            db.save_wager(wager)
+            await db.save_wager(wager)
+            open_wagers_snapshot.invalidate()
             logger.warning(f"[CANCEL] Wager {request.wager_id} has no escrow, just marking cancelled")
 
             await manager.broadcast({
@@ -1636,7 +1934,8 @@ async def cancel_wager_endpoint(request: CancelWagerRequest):
 
         # Mark wager as cancelled
         wager.status = "cancelled"
-        db.save_wager(wager)
+        await db.save_wager(wager)
+        open_wagers_snapshot.invalidate()
 
         logger.info(f"Web user {request.creator_wallet} cancelled wager {request.wager_id}")
 
@@ -1672,7 +1971,7 @@ async def claim_referral_endpoint(request: ClaimReferralRequest):
     """
     try:
         # Get user
-        user = ensure_web_user(request.user_wallet)
+        user = await ensure_web_user(request.user_wallet)
 
         # Check rate limit
         check_rate_limit(request, "claim_referral", max_requests=5, window_seconds=3600)  # 5 claims per hour
@@ -1694,6 +1993,9 @@ async def claim_referral_endpoint(request: ClaimReferralRequest):
 
         logger.info(f"User {user.user_id} claimed {amount_claimed:.6f} SOL referral earnings")
 
+        # The claim was added to the stored total, not to this object
+        user = await db.get_user(user.user_id) or user
+
         return {
             "success": True,
             "message": message,
@@ -1715,7 +2017,7 @@ async def get_referral_balance_endpoint(user_wallet: str):
     """Get user's referral earnings balance."""
     try:
         # Get user
-        user = ensure_web_user(user_wallet)
+        user = await ensure_web_user(user_wallet)
 
         # Get raw escrow balance and claimable amount
         raw_balance = await get_referral_escrow_balance(user, RPC_URL)
@@ -1769,7 +2071,7 @@ async def submit_support_ticket(request: SubmitTicketRequest, http_request: Requ
         raise HTTPException(status_code=400, detail="Message is required (min 10 characters)")
 
     # Check if user exists (optional - for linking ticket to user)
-    user = db.get_user_by_email(request.email.lower())
+    user = await db.get_user_by_email(request.email.lower())
     user_id = user.user_id if user else None
 
     # Create ticket
@@ -1784,7 +2086,7 @@ async def submit_support_ticket(request: SubmitTicketRequest, http_request: Requ
         status="open"
     )
 
-    db.save_ticket(ticket)
+    await db.save_ticket(ticket)
     logger.info(f"Support ticket created: {ticket_id} ({request.ticket_type}) from {request.email}")
 
     return {
@@ -1800,20 +2102,39 @@ async def submit_support_ticket(request: SubmitTicketRequest, http_request: Requ
 @app.get("/api/admin/check")
 async def admin_check(http_request: Request):
     """Check if current user is admin."""
-    user = get_current_user(http_request)
+    user = await get_current_user(http_request)
     if not user:
         return {"is_admin": False, "authenticated": False}
     return {"is_admin": user.is_admin, "authenticated": True, "email": user.email}
 
 
 @app.get("/api/admin/stats")
-async def admin_stats(http_request: Request):
-    """Get admin dashboard statistics."""
-    admin = require_admin(http_request)
+async def admin_stats(http_request: Request, days: int = 30):
+    """Get admin dashboard statistics.
 
-    user_count = db.get_user_count()
-    open_tickets = db.get_ticket_count(status="open")
-    total_tickets = db.get_ticket_count()
+    Game volume, fees and per-tier revenue for the last `days` UTC days
+    come from the daily rollups (a few rows per day, no history scan).
+    """
+    admin = await require_admin(http_request)
+    days = max(1, min(days, 365))
+
+    user_count = await db.get_user_count()
+    open_tickets = await db.get_ticket_count(status="open")
+    total_tickets = await db.get_ticket_count()
+
+    daily = await db.get_daily_stats(days)
+    tier_days = await db.get_daily_tier_stats(days)
+    active_players = await db.get_active_player_count(days)
+
+    # Summed in lamports, so totals don't pick up float rounding
+    tiers = {}
+    for t in tier_days:
+        tier = tiers.setdefault(t.tier, {"games": 0, "volume": 0, "fees": 0})
+        tier["games"] += t.games
+        tier["volume"] += to_lamports(t.volume)
+        tier["fees"] += to_lamports(t.fees)
+    for tier in tiers.values():
+        tier["volume"], tier["fees"] = to_sol(tier["volume"]), to_sol(tier["fees"])
 
     return {
         "success": True,
@@ -1822,23 +2143,49 @@ async def admin_stats(http_request: Request):
             "open_tickets": open_tickets,
             "total_tickets": total_tickets,
             "admin_username": admin.username
-        }
+        },
+        "games": {
+            "window_days": days,
+            "totals": {
+                "games": sum(d.games for d in daily),
+                "volume": to_sol(sum(to_lamports(d.volume) for d in daily)),
+                "fees": to_sol(sum(to_lamports(d.fees) for d in daily)),
+                "payouts": to_sol(sum(to_lamports(d.payouts) for d in daily)),
+                "players": active_players,
+            },
+            "tiers": tiers,
+            "days": [
+                {
+                    "day": d.day,
+                    "games": d.games,
+                    "volume": d.volume,
+                    "fees": d.fees,
+                    "payouts": d.payouts,
+                    "players": d.players,
+                }
+                for d in daily
+            ],
+        },
+        "caches": await db.cache_stats()
     }
 
 
 @app.get("/api/admin/users")
-async def admin_list_users(http_request: Request, limit: int = 50, offset: int = 0):
-    """List all users (admin only)."""
-    require_admin(http_request)
+async def admin_list_users(http_request: Request, limit: int = 50, cursor: Optional[str] = None):
+    """List all users, newest first (admin only).
 
-    users = db.get_all_users(limit=min(limit, 100), offset=offset)
-    total = db.get_user_count()
+    Pass the returned `next_cursor` as `cursor` to fetch the next page.
+    """
+    await require_admin(http_request)
+
+    users, next_cursor = await paginate(db.get_users_page(limit=min(limit, 100), cursor=cursor))
+    total = await db.get_user_count()
 
     return {
         "success": True,
         "total": total,
         "limit": limit,
-        "offset": offset,
+        "next_cursor": next_cursor,
         "users": [
             {
                 "user_id": u.user_id,
@@ -1861,13 +2208,16 @@ async def admin_list_users(http_request: Request, limit: int = 50, offset: int =
 
 @app.get("/api/admin/users/search")
 async def admin_search_users(http_request: Request, q: str):
-    """Search users by email/username (admin only)."""
-    require_admin(http_request)
+    """Search users by email, username, display name or wallet (admin only).
+
+    Matches any substring; results are ranked best match first.
+    """
+    await require_admin(http_request)
 
     if not q or len(q) < 2:
         raise HTTPException(status_code=400, detail="Search query must be at least 2 characters")
 
-    users = db.search_users(q, limit=20)
+    users = await db.search_users(q, limit=20)
 
     return {
         "success": True,
@@ -1879,6 +2229,7 @@ async def admin_search_users(http_request: Request, q: str):
                 "email": u.email,
                 "username": u.username,
                 "display_name": u.display_name,
+                "connected_wallet": u.connected_wallet,
                 "payout_wallet": u.payout_wallet,
                 "tier": u.tier,
                 "is_admin": u.is_admin,
@@ -1891,15 +2242,19 @@ async def admin_search_users(http_request: Request, q: str):
 
 @app.get("/api/admin/tickets")
 async def admin_list_tickets(http_request: Request, status: Optional[str] = None,
-                             ticket_type: Optional[str] = None, limit: int = 50):
-    """List support tickets (admin only)."""
-    require_admin(http_request)
+                             ticket_type: Optional[str] = None, limit: int = 50,
+                             cursor: Optional[str] = None):
+    """List support tickets, newest first (admin only)."""
+    await require_admin(http_request)
 
-    tickets = db.get_tickets(status=status, ticket_type=ticket_type, limit=min(limit, 100))
+    tickets, next_cursor = await paginate(db.get_tickets_page(
+        status=status, ticket_type=ticket_type, limit=min(limit, 100), cursor=cursor
+    ))
 
     return {
         "success": True,
         "count": len(tickets),
+        "next_cursor": next_cursor,
         "filters": {"status": status, "ticket_type": ticket_type},
         "tickets": [
             {
@@ -1923,9 +2278,9 @@ async def admin_list_tickets(http_request: Request, status: Optional[str] = None
 @app.post("/api/admin/tickets/{ticket_id}/resolve")
 async def admin_resolve_ticket(ticket_id: str, request: AdminResolveTicketRequest, http_request: Request):
     """Resolve a support ticket (admin only)."""
-    admin = require_admin(http_request)
+    admin = await require_admin(http_request)
 
-    ticket = db.get_ticket(ticket_id)
+    ticket = await db.get_ticket(ticket_id)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
 
@@ -1935,7 +2290,7 @@ async def admin_resolve_ticket(ticket_id: str, request: AdminResolveTicketReques
     ticket.resolved_at = datetime.utcnow()
     ticket.resolved_by = admin.user_id
 
-    db.save_ticket(ticket)
+    await db.save_ticket(ticket)
     logger.info(f"Admin {admin.email} resolved ticket {ticket_id}")
 
     return {
@@ -1953,10 +2308,10 @@ async def admin_reset_password(user_id: int, request: AdminResetPasswordRequest,
     Admin generates a new password, updates the user's password,
     then manually sends the new password to the user via email.
     """
-    admin = require_admin(http_request)
+    admin = await require_admin(http_request)
 
     # Get user
-    user = db.get_user(user_id)
+    user = await db.get_user(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -1967,11 +2322,10 @@ async def admin_reset_password(user_id: int, request: AdminResetPasswordRequest,
 
     # Hash and save new password
     user.password_hash = hash_password(request.new_password)
-    # Invalidate any existing sessions
-    user.session_token = None
-    user.session_expires = None
+    await db.save_user(user)
 
-    db.save_user(user)
+    # Invalidate any existing sessions, on every device
+    await db.delete_user_sessions(user_id)
 
     logger.info(f"Admin {admin.email} reset password for user {user.email} (ID: {user_id})")
 
@@ -1987,19 +2341,19 @@ async def admin_reset_password(user_id: int, request: AdminResetPasswordRequest,
 @app.post("/api/admin/user/{user_id}/toggle-admin")
 async def admin_toggle_admin(user_id: int, http_request: Request):
     """Toggle admin status for a user (admin only)."""
-    admin = require_admin(http_request)
+    admin = await require_admin(http_request)
 
     # Prevent self-demotion
     if admin.user_id == user_id:
         raise HTTPException(status_code=400, detail="Cannot modify your own admin status")
 
-    user = db.get_user(user_id)
+    user = await db.get_user(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     # Toggle admin status
     user.is_admin = not user.is_admin
-    db.save_user(user)
+    await db.save_user(user)
 
     action = "granted" if user.is_admin else "revoked"
     logger.info(f"Admin {admin.email} {action} admin access for {user.email}")
@@ -2015,18 +2369,27 @@ async def admin_toggle_admin(user_id: int, http_request: Request):
 # === ADMIN WAGER MANAGEMENT ===
 
 @app.get("/api/admin/wagers")
-async def admin_list_wagers(http_request: Request, status: Optional[str] = None, limit: int = 50):
-    """List all wagers with escrow info (admin only)."""
-    require_admin(http_request)
+async def admin_list_wagers(http_request: Request, status: Optional[str] = None, limit: int = 50,
+                            cursor: Optional[str] = None):
+    """List all wagers with escrow info, newest first (admin only)."""
+    await require_admin(http_request)
 
-    wagers = db.get_all_wagers(status=status, limit=min(limit, 100))
+    wagers, next_cursor = await paginate(db.get_wagers_page(status=status, limit=min(limit, 100), cursor=cursor))
+
+    # Every escrow on the page in one bulk lookup (None = lookup failed)
+    addresses = [a for w in wagers for a in (w.creator_escrow_address, w.acceptor_escrow_address) if a]
+    try:
+        balances = await get_sol_balances(RPC_URL, addresses)
+    except Exception as e:
+        logger.error(f"[ADMIN] Failed to check {len(addresses)} escrow balances: {e}")
+        balances = {}
 
     result = []
     for w in wagers:
         # Get acceptor wallet from user if wager was accepted
         acceptor_wallet = None
         if w.acceptor_id:
-            acceptor = db.get_user(w.acceptor_id)
+            acceptor = await db.get_user(w.acceptor_id)
             if acceptor:
                 acceptor_wallet = acceptor.payout_wallet or acceptor.connected_wallet
 
@@ -2043,29 +2406,18 @@ async def admin_list_wagers(http_request: Request, status: Optional[str] = None,
             "acceptor_id": w.acceptor_id,
         }
 
-        # Check creator escrow balance
+        # Escrow balances
         if w.creator_escrow_address:
-            try:
-                balance = await get_sol_balance(RPC_URL, w.creator_escrow_address)
-                wager_data["escrow_balance"] = balance
-            except Exception as e:
-                logger.error(f"[ADMIN] Failed to check creator escrow for {w.wager_id}: {e}")
-                wager_data["escrow_balance"] = None
-
-        # Check acceptor escrow balance
+            wager_data["escrow_balance"] = balances.get(w.creator_escrow_address)
         if w.acceptor_escrow_address:
-            try:
-                acceptor_balance = await get_sol_balance(RPC_URL, w.acceptor_escrow_address)
-                wager_data["acceptor_escrow_balance"] = acceptor_balance
-            except Exception as e:
-                logger.error(f"[ADMIN] Failed to check acceptor escrow for {w.wager_id}: {e}")
-                wager_data["acceptor_escrow_balance"] = None
+            wager_data["acceptor_escrow_balance"] = balances.get(w.acceptor_escrow_address)
 
         result.append(wager_data)
 
     return {
         "success": True,
         "count": len(result),
+        "next_cursor": next_cursor,
         "wagers": result
     }
 
@@ -2076,12 +2428,12 @@ async def admin_refund_wager(wager_id: str, http_request: Request):
 
     This works for ANY wager status - admin can always recover stuck funds.
     """
-    admin = require_admin(http_request)
+    admin = await require_admin(http_request)
 
     from utils import decrypt_secret
 
     # Get wager
-    wager = db.get_wager(wager_id)
+    wager = await db.get_wager(wager_id)
     if not wager:
         raise HTTPException(status_code=404, detail="Wager not found")
 
@@ -2093,7 +2445,7 @@ async def admin_refund_wager(wager_id: str, http_request: Request):
     if wager.creator_escrow_address and wager.creator_escrow_secret:
         try:
             # Get creator's payout wallet (preferred) or fall back to creator_wallet
-            creator = db.get_user(wager.creator_id)
+            creator = await db.get_user(wager.creator_id)
             creator_destination = wager.creator_wallet  # default fallback
             if creator and creator.payout_wallet:
                 creator_destination = creator.payout_wallet
@@ -2154,7 +2506,7 @@ async def admin_refund_wager(wager_id: str, http_request: Request):
             logger.info(f"[REFUND] acceptor_wallet={wager.acceptor_wallet}, acceptor_id={wager.acceptor_id}")
             acceptor_destination = wager.acceptor_wallet  # default fallback
             if wager.acceptor_id:
-                acceptor = db.get_user(wager.acceptor_id)
+                acceptor = await db.get_user(wager.acceptor_id)
                 if acceptor and acceptor.payout_wallet:
                     acceptor_destination = acceptor.payout_wallet
                     logger.info(f"[REFUND] Using acceptor's payout wallet: {acceptor_destination}")
@@ -2228,7 +2580,8 @@ async def admin_refund_wager(wager_id: str, http_request: Request):
     else:
         # No funds to refund - mark as cancelled instead
         wager.status = "cancelled"
-    db.save_wager(wager)
+    await db.save_wager(wager)
+    open_wagers_snapshot.invalidate()
 
     logger.info(f"[REFUND] Admin {admin.email} refunded wager {wager_id}: {total_refunded:.6f} SOL total")
     logger.info(f"[REFUND] Results: {refund_results}")
@@ -2245,10 +2598,10 @@ async def admin_refund_wager(wager_id: str, http_request: Request):
 @app.post("/api/admin/wager/{wager_id}/cancel")
 async def admin_cancel_wager(wager_id: str, http_request: Request):
     """Cancel any wager (admin only). Use refund first to return funds."""
-    admin = require_admin(http_request)
+    admin = await require_admin(http_request)
 
     # Get wager
-    wager = db.get_wager(wager_id)
+    wager = await db.get_wager(wager_id)
     if not wager:
         raise HTTPException(status_code=404, detail="Wager not found")
 
@@ -2256,7 +2609,8 @@ async def admin_cancel_wager(wager_id: str, http_request: Request):
 
     # Update wager status
     wager.status = "cancelled"
-    db.save_wager(wager)
+    await db.save_wager(wager)
+    open_wagers_snapshot.invalidate()
 
     logger.info(f"Admin {admin.email} cancelled wager {wager_id}")
 
@@ -2270,11 +2624,11 @@ async def admin_cancel_wager(wager_id: str, http_request: Request):
 @app.post("/api/admin/wager/{wager_id}/export-key")
 async def admin_export_escrow_key(wager_id: str, http_request: Request):
     """Export escrow private keys for manual recovery (admin only)."""
-    admin = require_admin(http_request)
+    admin = await require_admin(http_request)
 
     from utils import decrypt_secret
 
-    wager = db.get_wager(wager_id)
+    wager = await db.get_wager(wager_id)
     if not wager:
         raise HTTPException(status_code=404, detail="Wager not found")
 
@@ -2320,11 +2674,11 @@ async def admin_recover_escrow(wager_id: str, request: AdminRecoverRequest, http
     escrow_type: "creator" or "acceptor"
     destination_wallet: Any valid Solana wallet address
     """
-    admin = require_admin(http_request)
+    admin = await require_admin(http_request)
 
     from utils import decrypt_secret
 
-    wager = db.get_wager(wager_id)
+    wager = await db.get_wager(wager_id)
     if not wager:
         raise HTTPException(status_code=404, detail="Wager not found")
 
@@ -2391,10 +2745,17 @@ async def admin_recover_escrow(wager_id: str, request: AdminRecoverRequest, http
     }
 
 
+@app.get("/api/admin/rpc")
+async def get_rpc_status(http_request: Request):
+    """RPC endpoints (circuit state, per-class EWMA latency/error rate, hedging) and read coalescing."""
+    admin = await require_admin(http_request)
+    return {**get_rpc_manager(RPC_URL).get_status(), "coalescing": get_read_stats()}
+
+
 @app.get("/api/admin/maintenance")
 async def get_maintenance_status(http_request: Request):
     """Check if maintenance mode (betting disabled) is active."""
-    admin = require_admin(http_request)
+    admin = await require_admin(http_request)
     return {
         "maintenance_mode": is_emergency_stop_enabled(),
         "message": "Betting is DISABLED" if is_emergency_stop_enabled() else "Betting is ENABLED"
@@ -2404,7 +2765,7 @@ async def get_maintenance_status(http_request: Request):
 @app.post("/api/admin/maintenance/toggle")
 async def toggle_maintenance_mode(http_request: Request):
     """Toggle maintenance mode - disables/enables all betting."""
-    admin = require_admin(http_request)
+    admin = await require_admin(http_request)
 
     if is_emergency_stop_enabled():
         # Remove the flag to enable betting
@@ -2439,12 +2800,27 @@ async def sweep_all_escrows(http_request: Request):
 
     This collects any leftover SOL from completed/cancelled wagers.
     """
-    admin = require_admin(http_request)
+    admin = await require_admin(http_request)
 
     from utils import decrypt_secret
 
     # Get all wagers (we'll check each escrow)
-    wagers = db.get_all_wagers()
+    wagers = await db.get_all_wagers()
+
+    # Every escrow we hold keys for, in one bulk lookup (100 per RPC call)
+    addresses = [
+        address
+        for wager in wagers
+        for address, secret in (
+            (wager.creator_escrow_address, wager.creator_escrow_secret),
+            (wager.acceptor_escrow_address, wager.acceptor_escrow_secret),
+        )
+        if address and secret
+    ]
+    try:
+        balances = await get_sol_balances(RPC_URL, addresses)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to check escrow balances: {e}")
 
     swept_count = 0
     total_swept = 0.0
@@ -2455,7 +2831,7 @@ async def sweep_all_escrows(http_request: Request):
         # Check creator escrow
         if wager.creator_escrow_address and wager.creator_escrow_secret:
             try:
-                balance = await get_sol_balance(RPC_URL, wager.creator_escrow_address)
+                balance = balances.get(wager.creator_escrow_address, 0.0)
                 if balance > 0.001:  # Only sweep if meaningful balance
                     escrow_secret = decrypt_secret(wager.creator_escrow_secret, ENCRYPTION_KEY)
                     sweep_amount = balance - 0.000005  # Leave dust for rent
@@ -2481,7 +2857,7 @@ async def sweep_all_escrows(http_request: Request):
         # Check acceptor escrow
         if wager.acceptor_escrow_address and wager.acceptor_escrow_secret:
             try:
-                balance = await get_sol_balance(RPC_URL, wager.acceptor_escrow_address)
+                balance = balances.get(wager.acceptor_escrow_address, 0.0)
                 if balance > 0.001:  # Only sweep if meaningful balance
                     escrow_secret = decrypt_secret(wager.acceptor_escrow_secret, ENCRYPTION_KEY)
                     sweep_amount = balance - 0.000005  # Leave dust for rent
@@ -2583,7 +2959,7 @@ async def preview_revshare(
     # Settings
     MIN_BALANCE = 100_000  # 100K tokens minimum
     TOP_HOLDERS = 100
-    MIN_PAYOUT = 0.001  # Minimum SOL payout
+    MIN_PAYOUT = to_lamports(0.001)  # Minimum payout (lamports)
 
     # LP wallet to exclude (add after token launch)
     EXCLUDED_WALLETS = [
@@ -2604,7 +2980,7 @@ async def preview_revshare(
         holders.append({
             "wallet": wallet,
             "balance": balance,
-            "sqrt_balance": math.sqrt(balance)
+            "sqrt_weight": math.isqrt(round(balance * 1_000_000))  # Exact integer sqrt weight
         })
 
     # Sort by balance and take top N
@@ -2613,20 +2989,18 @@ async def preview_revshare(
     if not holders:
         raise HTTPException(status_code=404, detail="No eligible holders after filtering")
 
-    # Calculate sqrt distribution
-    total_sqrt = sum(h["sqrt_balance"] for h in holders)
+    # Calculate sqrt distribution in lamports (shares sum exactly to the total)
+    total_sqrt = sum(h["sqrt_weight"] for h in holders)
+    payouts = pro_rata(to_lamports(total_sol), [h["sqrt_weight"] for h in holders])
 
     distribution = []
-    for h in holders:
-        share_pct = (h["sqrt_balance"] / total_sqrt) * 100
-        payout = (h["sqrt_balance"] / total_sqrt) * total_sol
-
+    for h, payout in zip(holders, payouts):
         if payout >= MIN_PAYOUT:
             distribution.append({
                 "wallet": h["wallet"],
                 "balance": h["balance"],
-                "share_percent": share_pct,
-                "payout_sol": payout
+                "share_percent": h["sqrt_weight"] / total_sqrt * 100,
+                "payout_sol": to_sol(payout)
             })
 
     logger.info(f"Admin {admin.email} previewed revshare: {total_sol} SOL to {len(distribution)} holders")
@@ -2652,7 +3026,6 @@ async def execute_revshare(
     """
     import math
     import httpx
-    from solana.rpc.async_api import AsyncClient
     from solders.pubkey import Pubkey
     from solders.keypair import Keypair
     from solders.system_program import transfer, TransferParams
@@ -2708,7 +3081,7 @@ async def execute_revshare(
     # Process holders (same logic as preview)
     MIN_BALANCE = 100_000
     TOP_HOLDERS = 100
-    MIN_PAYOUT = 0.001
+    MIN_PAYOUT = to_lamports(0.001)
     EXCLUDED_WALLETS = []
 
     holders = []
@@ -2722,17 +3095,14 @@ async def execute_revshare(
         holders.append({
             "wallet": wallet,
             "balance": balance,
-            "sqrt_balance": math.sqrt(balance)
+            "sqrt_weight": math.isqrt(round(balance * 1_000_000))
         })
 
     holders = sorted(holders, key=lambda h: h["balance"], reverse=True)[:TOP_HOLDERS]
-    total_sqrt = sum(h["sqrt_balance"] for h in holders)
+    payouts = pro_rata(to_lamports(total_sol), [h["sqrt_weight"] for h in holders])
 
-    recipients = []
-    for h in holders:
-        payout = (h["sqrt_balance"] / total_sqrt) * total_sol
-        if payout >= MIN_PAYOUT:
-            recipients.append((h["wallet"], payout))
+    # (wallet, lamports) - sent as-is, no float conversion per transfer
+    recipients = [(h["wallet"], payout) for h, payout in zip(holders, payouts) if payout >= MIN_PAYOUT]
 
     if not recipients:
         raise HTTPException(status_code=400, detail="No eligible recipients after filtering")
@@ -2744,12 +3114,12 @@ async def execute_revshare(
         raise HTTPException(status_code=500, detail=f"Invalid distribution wallet key: {str(e)}")
 
     # Check sender balance
-    sender_balance = await get_sol_balance(RPC_URL, str(sender_keypair.pubkey()))
-    total_needed = sum(r[1] for r in recipients) + 0.01  # Extra for TX fees
+    sender_balance = await get_lamport_balance(RPC_URL, str(sender_keypair.pubkey()))
+    total_needed = sum(r[1] for r in recipients) + to_lamports(0.01)  # Extra for TX fees
     if sender_balance < total_needed:
         raise HTTPException(
             status_code=400,
-            detail=f"Insufficient funds. Need {total_needed:.4f} SOL, have {sender_balance:.4f} SOL"
+            detail=f"Insufficient funds. Need {to_sol(total_needed):.4f} SOL, have {to_sol(sender_balance):.4f} SOL"
         )
 
     # Send transactions in batches
@@ -2757,52 +3127,51 @@ async def execute_revshare(
     errors = []
     batch_size = 10
 
-    async with AsyncClient(RPC_URL) as client:
-        blockhash_resp = await client.get_latest_blockhash()
-        recent_blockhash = blockhash_resp.value.blockhash
-
-        for i in range(0, len(recipients), batch_size):
-            batch = recipients[i:i + batch_size]
-
-            # Create transfer instructions for batch
-            instructions = []
-            for wallet, amount in batch:
-                try:
-                    lamports = int(amount * 1_000_000_000)
-                    ix = transfer(TransferParams(
-                        from_pubkey=sender_keypair.pubkey(),
-                        to_pubkey=Pubkey.from_string(wallet),
-                        lamports=lamports
-                    ))
-                    instructions.append(ix)
-                except Exception as e:
-                    errors.append(f"Failed to create instruction for {wallet}: {str(e)}")
-
-            if not instructions:
-                continue
+    rpc = get_rpc_manager(RPC_URL)
+    blockhash_resp = await rpc.read(lambda client: client.get_latest_blockhash(), "getLatestBlockhash")
+    recent_blockhash = blockhash_resp.value.blockhash
+
+    for i in range(0, len(recipients), batch_size):
+        batch = recipients[i:i + batch_size]
 
+        # Create transfer instructions for batch
+        instructions = []
+        for wallet, lamports in batch:
             try:
-                msg = Message.new_with_blockhash(
-                    instructions,
-                    sender_keypair.pubkey(),
-                    recent_blockhash
-                )
-                tx = Transaction([sender_keypair], msg, recent_blockhash)
-                result = await client.send_transaction(tx)
+                ix = transfer(TransferParams(
+                    from_pubkey=sender_keypair.pubkey(),
+                    to_pubkey=Pubkey.from_string(wallet),
+                    lamports=lamports
+                ))
+                instructions.append(ix)
+            except Exception as e:
+                errors.append(f"Failed to create instruction for {wallet}: {str(e)}")
 
-                if result.value:
-                    signatures.append(str(result.value))
-                    logger.info(f"Revshare batch {i//batch_size + 1}: {len(instructions)} transfers - {result.value}")
-                else:
-                    errors.append(f"Batch {i//batch_size + 1} failed: {result}")
+        if not instructions:
+            continue
 
-            except Exception as e:
-                errors.append(f"Batch {i//batch_size + 1} error: {str(e)}")
+        try:
+            msg = Message.new_with_blockhash(
+                instructions,
+                sender_keypair.pubkey(),
+                recent_blockhash
+            )
+            tx = Transaction([sender_keypair], msg, recent_blockhash)
+            result = await rpc.send(lambda client: client.send_transaction(tx))
+
+            if result.value:
+                signatures.append(str(result.value))
+                logger.info(f"Revshare batch {i//batch_size + 1}: {len(instructions)} transfers - {result.value}")
+            else:
+                errors.append(f"Batch {i//batch_size + 1} failed: {result}")
+
+        except Exception as e:
+            errors.append(f"Batch {i//batch_size + 1} error: {str(e)}")
 
-            # Small delay between batches
-            await asyncio.sleep(0.5)
+        # Small delay between batches
+        await asyncio.sleep(0.5)
 
-    total_distributed = sum(r[1] for r in recipients)
+    total_distributed = to_sol(sum(r[1] for r in recipients))
     logger.info(f"Admin {admin.email} executed revshare: {total_distributed:.4f} SOL to {len(recipients)} holders")
 
     return {
@@ -1,5 +1,6 @@
 """Database module for Coinflip game."""
-from .models import User, Game, Wager, Transaction, UsedSignature, GameType, GameStatus, CoinSide, SupportTicket
+from .models import User, Game, Wager, WagerListing, Transaction, UsedSignature, GameType, GameStatus, CoinSide, SupportTicket, DailyStats, DailyTierStats, LeaderboardStats
 from .repo import Database
+from .async_repo import AsyncDatabase
 
-__all__ = ["User", "Game", "Wager", "Transaction", "UsedSignature", "GameType", "GameStatus", "CoinSide", "Database", "SupportTicket"]
+__all__ = ["User", "Game", "Wager", "WagerListing", "Transaction", "UsedSignature", "GameType", "GameStatus", "CoinSide", "Database", "AsyncDatabase", "SupportTicket", "DailyStats", "DailyTierStats", "LeaderboardStats"]
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+Async facade over the Coinflip database repository.
+
+SQLite calls block, so running them directly inside `async def` handlers
+stalls the event loop (and every WebSocket) for the length of each query
+and fsync. AsyncDatabase exposes the same methods as Database as
+coroutines and runs them on a dedicated thread pool.
+"""
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from .pool import DB_POOL_SIZE
+from .repo import Database
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabase:
+    """Awaitable version of Database.
+
+    Every public Database method is available with the same signature:
+
+        user = await db.get_user(user_id)
+        await db.save_user(user)
+
+    Calls run on a private executor sized to the connection pool, so each
+    worker thread can hold a pooled connection without waiting.
+    """
+
+    def __init__(self, db_path: str = "coinflip.db", db: Optional[Database] = None,
+                 max_workers: int = DB_POOL_SIZE):
+        self.sync = db or Database(db_path)
+        self.db_path = self.sync.db_path
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+
+    async def run(self, func, *args, **kwargs):
+        """Run any blocking callable on the database executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def close(self):
+        """Drain pending calls and stop the executor.
+
+        Pooled connections and the writer are shared per file and left
+        open; see Database.close.
+        """
+        self._executor.shutdown(wait=True)
+        self.sync.close()
+
+
+def _make_async(name: str):
+    """Build an async wrapper that runs Database.<name> on the executor."""
+    sync_method = getattr(Database, name)
+
+    @functools.wraps(sync_method)
+    async def method(self: AsyncDatabase, *args, **kwargs):
+        return await self.run(getattr(self.sync, name), *args, **kwargs)
+
+    return method
+
+
+# Mirror the public Database API (new repo methods are picked up automatically)
+for _name, _attr in vars(Database).items():
+    if not _name.startswith("_") and callable(_attr) and not hasattr(AsyncDatabase, _name):
+        setattr(AsyncDatabase, _name, _make_async(_name))
@@ -0,0 +1,159 @@
+"""
+In-process caches for the Coinflip database repository.
+
+Cached models are never handed out directly: the repository returns a
+shallow copy on every hit (model fields are all immutable values), so
+callers can mutate and save what they get without affecting anyone else.
+Caches are per database file and per process: a write made by another
+process is only picked up when the entry expires, which is why every
+entry has a short TTL.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set
+
+# Cache configuration (override via environment)
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+SESSION_CACHE_TTL_SECONDS = float(os.getenv("SESSION_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USED_SIGNATURE_CACHE_SIZE = int(os.getenv("USED_SIGNATURE_CACHE_SIZE", "50000"))
+USED_SIGNATURE_CACHE_TTL_SECONDS = 24 * 60 * 60  # A used signature never becomes unused
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after a TTL.
+
+    Values can be tagged with an owner (e.g. a user_id) so every entry
+    belonging to that owner can be dropped at once.
+    Thread-safe: repository calls run on a thread pool.
+
+    To fill the cache from a query without racing a concurrent write,
+    read `generation` before the query and pass it to put(): if anything
+    was invalidated in between, the possibly stale value is not cached.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds
+        # key -> (value, owner, expires_at)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._by_owner: Dict[Hashable, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+        self.generation = 0  # Bumped by every invalidation
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[2] <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Like get(), but without counting a hit/miss or refreshing LRU order."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] <= time.monotonic():
+                return None
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, owner: Hashable = None,
+            ttl_seconds: Optional[float] = None, generation: Optional[int] = None):
+        """Cache a value, evicting the least recently used entry if full.
+
+        Args:
+            owner: Tag for invalidate_owner()
+            ttl_seconds: Lifetime of this entry (capped at the cache TTL)
+            generation: `generation` read before the value was loaded
+        """
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        if ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return  # Invalidated while the value was loading - it may be stale
+            self._store(key, value, owner, ttl)
+
+    def refresh(self, key: Hashable, value: Optional[Any], owner: Hashable, generation: int):
+        """Write-through: drop every entry of `owner`, then cache its new value (if any).
+
+        The value is only cached if nothing was invalidated since
+        `generation` was read (before the write that produced it), so a
+        concurrent write to the same owner can't be overtaken.
+        """
+        with self._lock:
+            current = self.generation == generation
+            self.generation += 1
+            for stale in list(self._by_owner.get(owner, ())):
+                self._remove(stale)
+                self.invalidations += 1
+            if current and value is not None:
+                self._store(key, value, owner, self.ttl_seconds)
+
+    def invalidate(self, key: Hashable):
+        """Drop one entry."""
+        with self._lock:
+            self.generation += 1
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def invalidate_owner(self, owner: Hashable):
+        """Drop every entry tagged with this owner."""
+        with self._lock:
+            self.generation += 1
+            for key in list(self._by_owner.get(owner, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._by_owner.clear()
+
+    def _store(self, key: Hashable, value: Any, owner: Hashable, ttl: float):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, owner, time.monotonic() + ttl)
+        if owner is not None:
+            self._by_owner.setdefault(owner, set()).add(key)
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: Hashable):
+        _, owner, _ = self._entries.pop(key)
+        if owner is not None:
+            keys = self._by_owner.get(owner)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_owner[owner]
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,113 @@
+"""
+Row mappers for Coinflip database tables.
+
+Each mapper is compiled once from `PRAGMA table_info`, so hydrating a row
+is a straight positional copy plus the few conversions a column needs
+(enums, booleans, ISO timestamps, lamports) - no per-row key lookups.
+Columns a model doesn't know about are ignored; model fields missing
+from an older table keep their dataclass defaults.
+"""
+import sqlite3
+import dataclasses
+from datetime import datetime
+from typing import Any, Callable, Dict, Sequence
+
+from money import to_sol
+
+from .models import (
+    User, Game, Wager, Transaction, UsedSignature, SupportTicket, DailyStats, DailyTierStats,
+    LeaderboardStats, GameType, GameStatus, CoinSide
+)
+from .schema import LAMPORT_COLUMNS
+
+
+def _to_datetime(value: Any) -> datetime:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _to_datetime_or_now(value: Any) -> datetime:
+    return datetime.fromisoformat(value) if value else datetime.utcnow()
+
+
+def _optional(convert: Callable) -> Callable:
+    return lambda value: convert(value) if value else None
+
+
+def _to_sol(value: Any) -> float:
+    return to_sol(value or 0)
+
+
+class RowMapper:
+    """Maps `SELECT *` rows of one table to instances of one model."""
+
+    def __init__(self, model: type, columns: Sequence[str], converters: Dict[str, Callable]):
+        fields = {f.name for f in dataclasses.fields(model) if f.init}
+        self.model = model
+        self.columns = tuple(columns)
+        self._plain = [
+            (name, index) for index, name in enumerate(columns)
+            if name in fields and name not in converters
+        ]
+        self._converted = [
+            (name, index, converters[name]) for index, name in enumerate(columns)
+            if name in fields and name in converters
+        ]
+
+    def __call__(self, row: Sequence) -> Any:
+        kwargs = {name: row[index] for name, index in self._plain}
+        for name, index, convert in self._converted:
+            kwargs[name] = convert(row[index])
+        return self.model(**kwargs)
+
+
+# Table -> (model, column converters)
+TABLE_MODELS: Dict[str, tuple] = {
+    "users": (User, {
+        "email_verified": bool,
+        "is_admin": bool,
+        "created_at": _to_datetime_or_now,
+        "last_active": _to_datetime_or_now,
+        "last_login": _to_datetime,
+    }),
+    "games": (Game, {
+        "game_type": GameType,
+        "player1_side": CoinSide,
+        "player2_side": _optional(CoinSide),
+        "status": GameStatus,
+        "result": _optional(CoinSide),
+        "created_at": _to_datetime_or_now,
+        "completed_at": _to_datetime,
+    }),
+    "wagers": (Wager, {
+        "creator_side": CoinSide,
+        "created_at": _to_datetime_or_now,
+        "expires_at": _to_datetime,
+        "accepting_at": _to_datetime,
+    }),
+    "transactions": (Transaction, {
+        "timestamp": _to_datetime_or_now,
+    }),
+    "used_signatures": (UsedSignature, {
+        "used_at": _to_datetime_or_now,
+    }),
+    "support_tickets": (SupportTicket, {
+        "created_at": _to_datetime_or_now,
+        "resolved_at": _to_datetime,
+    }),
+    "daily_stats": (DailyStats, {}),
+    "daily_tier_stats": (DailyTierStats, {}),
+    "leaderboard_stats": (LeaderboardStats, {}),
+}
+
+
+def compile_mapper(conn: sqlite3.Connection, table: str) -> RowMapper:
+    """Compile the row mapper for a table from its live schema."""
+    model, converters = TABLE_MODELS[table]
+    converters = {**converters, **{col: _to_sol for col in LAMPORT_COLUMNS.get(table, ())}}
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    return RowMapper(model, columns, converters)
+
+
+def compile_mappers(conn: sqlite3.Connection) -> Dict[str, RowMapper]:
+    """Compile mappers for every mapped table."""
+    return {table: compile_mapper(conn, table) for table in TABLE_MODELS}
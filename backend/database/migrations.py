@@ -0,0 +1,116 @@
+"""
+Versioned schema migrations for Coinflip SQLite databases.
+
+Each component (the core repository, the audit log, ...) owns an ordered
+registry of migration steps. The version a database has reached is kept
+per component in the `schema_version` table, so opening an up-to-date
+database costs a single primary-key lookup instead of re-running every
+CREATE/ALTER/INDEX statement.
+
+Steps must be idempotent: databases created before versioning start at
+version 0 and replay every step against tables that may already exist.
+"""
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA_VERSION_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        component TEXT PRIMARY KEY,
+        version INTEGER NOT NULL,
+        applied_at TEXT NOT NULL
+    )
+"""
+
+
+@dataclass(frozen=True)
+class Migration:
+    """One schema change, applied inside its own transaction."""
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Cursor], None]
+
+
+class MigrationRegistry:
+    """Ordered migration steps for one schema component.
+
+    Steps are registered with a decorator and applied in version order:
+
+        SCHEMA = MigrationRegistry("coinflip")
+
+        @SCHEMA.migration(1, "Create users table")
+        def _create_users(cursor):
+            cursor.execute("CREATE TABLE IF NOT EXISTS users (...)")
+    """
+
+    def __init__(self, component: str):
+        self.component = component
+        self._migrations: List[Migration] = []
+        self._lock = threading.Lock()
+
+    @property
+    def latest(self) -> int:
+        """Version reached once every registered step has run."""
+        return self._migrations[-1].version if self._migrations else 0
+
+    def migration(self, version: int, description: str):
+        """Register the decorated function as migration step `version`."""
+        def register(func: Callable[[sqlite3.Cursor], None]):
+            if self._migrations and version <= self.latest:
+                raise ValueError(
+                    f"{self.component} migration {version} registered after {self.latest}"
+                )
+            self._migrations.append(Migration(version, description, func))
+            return func
+        return register
+
+    def current_version(self, conn: sqlite3.Connection) -> int:
+        """Version this database has reached (0 if never migrated)."""
+        try:
+            row = conn.execute(
+                "SELECT version FROM schema_version WHERE component = ?", (self.component,)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return 0  # No schema_version table yet
+        return row[0] if row else 0
+
+    def migrate(self, conn: sqlite3.Connection) -> int:
+        """Apply pending steps in order.
+
+        Each step runs in a BEGIN IMMEDIATE transaction and re-reads the
+        version first, so concurrent processes never apply a step twice.
+
+        Returns:
+            The schema version after migrating
+        """
+        if self.current_version(conn) >= self.latest:
+            return self.latest
+
+        with self._lock:
+            conn.execute(_SCHEMA_VERSION_SQL)
+            conn.commit()
+            for step in self._migrations:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    if self.current_version(conn) >= step.version:
+                        conn.rollback()
+                        continue
+                    step.apply(conn.cursor())
+                    conn.execute("""
+                        INSERT INTO schema_version (component, version, applied_at) VALUES (?, ?, ?)
+                        ON CONFLICT(component) DO UPDATE SET
+                            version = excluded.version, applied_at = excluded.applied_at
+                    """, (self.component, step.version, datetime.utcnow().isoformat()))
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    logger.error(f"Migration {self.component} v{step.version} failed: {step.description}")
+                    raise
+                logger.info(f"Migration: {self.component} v{step.version} - {step.description}")
+
+        return self.latest
@@ -1,8 +1,9 @@
 """
 Data models for Coinflip game.
 """
-from dataclasses import dataclass, field
-from typing import Optional, List
+from dataclasses import dataclass, field, fields
+from operator import attrgetter
+from typing import Optional, List, FrozenSet
 from datetime import datetime
 from enum import Enum
 
@@ -27,7 +28,7 @@ class CoinSide(Enum):
     TAILS = "tails"
 
 
-@dataclass
+@dataclass(slots=True)
 class User:
     """User account with authentication."""
     user_id: int  # Auto-incrementing ID
@@ -85,15 +86,32 @@ class User:
     last_active: datetime = field(default_factory=datetime.utcnow)
     last_login: Optional[datetime] = None
 
-    # Session token (for API auth)
-    session_token: Optional[str] = None
-    session_expires: Optional[datetime] = None
-
     # Admin
     is_admin: bool = False
 
+    # Change tracking: field values as of the last load/save (None = untracked)
+    _snapshot: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
 
-@dataclass
+    @property
+    def dirty_fields(self) -> Optional[FrozenSet[str]]:
+        """Fields changed since the last load/save, or None if not tracked."""
+        if self._snapshot is None:
+            return None
+        return frozenset(
+            name for name, old, new in zip(_USER_FIELDS, self._snapshot, _user_state(self))
+            if old != new
+        )
+
+    def mark_clean(self):
+        """Start (or restart) change tracking from the current values."""
+        self._snapshot = _user_state(self)
+
+
+_USER_FIELDS = tuple(f.name for f in fields(User) if f.init)
+_user_state = attrgetter(*_USER_FIELDS)
+
+
+@dataclass(slots=True)
 class Game:
     """A completed or in-progress coinflip game."""
     game_id: str
@@ -127,7 +145,7 @@ class Game:
     completed_at: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Wager:
     """An open wager waiting to be accepted (PVP only)."""
     wager_id: str
@@ -160,7 +178,21 @@ class Wager:
     expires_at: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True)
+class WagerListing:
+    """Read-only projection of an open wager for the public lobby."""
+    wager_id: str
+    creator_wallet: str
+    creator_username: Optional[str]
+    creator_side: CoinSide
+    amount: float
+    status: str
+    created_at: datetime
+    acceptor_wallet: Optional[str] = None
+    accepting_at: Optional[datetime] = None
+
+
+@dataclass(slots=True)
 class Transaction:
     """Transaction history for accounting."""
     tx_id: str
@@ -173,6 +205,38 @@ class Transaction:
     timestamp: datetime = field(default_factory=datetime.utcnow)
 
 
+@dataclass(slots=True)
+class DailyStats:
+    """Platform totals for one UTC day (maintained at settlement)."""
+    day: str  # YYYY-MM-DD
+    games: int = 0
+    volume: float = 0.0  # SOL staked by all players
+    fees: float = 0.0
+    payouts: float = 0.0
+    players: int = 0  # Unique players
+
+
+@dataclass(slots=True)
+class DailyTierStats:
+    """Games and fee revenue for one UTC day, by the winner's tier."""
+    day: str
+    tier: str
+    games: int = 0
+    volume: float = 0.0
+    fees: float = 0.0
+
+
+@dataclass(slots=True)
+class LeaderboardStats:
+    """One player's leaderboard totals for an hour (YYYY-MM-DDTHH) or all time ('all')."""
+    period: str
+    user_id: int
+    wagered: float = 0.0
+    won: float = 0.0
+    best_win: float = 0.0  # Biggest single payout
+    best_game_id: Optional[str] = None
+
+
 @dataclass
 class UsedSignature:
     """Track used transaction signatures to prevent reuse attacks.
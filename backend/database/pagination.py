@@ -0,0 +1,31 @@
+"""
+Keyset pagination cursors for Coinflip database listings.
+
+A cursor is an opaque token holding the sort key and id of the last row
+on a page. The next page seeks strictly past it on a (sort key, id)
+composite index, so page 1000 costs the same as page 1 (unlike OFFSET,
+which walks and discards every earlier row).
+"""
+import json
+import base64
+from typing import Any, Tuple
+
+
+def encode_cursor(sort_value: Any, row_id: Any) -> str:
+    """Encode the position of the last row on a page."""
+    raw = json.dumps([sort_value, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    """Decode a cursor from encode_cursor().
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+    return sort_value, row_id
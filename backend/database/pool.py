@@ -0,0 +1,165 @@
+"""
+SQLite connection pool for Coinflip database.
+
+Connections are opened once and reused across calls instead of paying for
+sqlite3.connect() + schema parse + a cold page cache on every query.
+Every pooled connection runs in WAL mode so readers never block the writer.
+File-backed databases also get their cold archive database (settled
+history moved out of the hot tables) attached as schema `archive`.
+"""
+import os
+import queue
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Pool configuration (override via environment)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))  # Page cache per connection
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(64 * 1024 * 1024)))  # Shared OS page cache
+DB_ARCHIVE_ENABLED = os.getenv("DB_ARCHIVE_ENABLED", "true").lower() == "true"
+
+
+def archive_path(db_path: str) -> Optional[str]:
+    """Path of the archive database kept next to a database file.
+
+    coinflip.db -> coinflip.archive.db. None for :memory: databases or
+    when archiving is disabled.
+    """
+    if db_path == ":memory:" or not DB_ARCHIVE_ENABLED:
+        return None
+    root, ext = os.path.splitext(db_path)
+    return f"{root}.archive{ext or '.db'}"
+
+
+class ConnectionPool:
+    """Bounded pool of long-lived SQLite connections.
+
+    Connections are checked out with `connection()` and returned when the
+    block exits. Any transaction left open by the caller is rolled back
+    before the connection goes back into the pool.
+    """
+
+    def __init__(self, db_path: str, size: int = DB_POOL_SIZE):
+        self.db_path = db_path
+        # Every connection to :memory: is a separate database - share one
+        self.size = 1 if db_path == ":memory:" else max(1, size)
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self.archive_path = archive_path(db_path)
+
+    def _open(self) -> sqlite3.Connection:
+        """Open and configure a new connection."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=DB_BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,  # Connections move between threads via the pool
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")  # Safe under WAL, no fsync per commit
+        conn.execute(f"PRAGMA cache_size = -{DB_CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        if self.archive_path:
+            conn.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+            conn.execute("PRAGMA archive.journal_mode = WAL")
+            conn.execute("PRAGMA archive.synchronous = NORMAL")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        """Check out an idle connection, opening a new one if under the limit."""
+        if self._closed:
+            raise sqlite3.ProgrammingError(f"Connection pool for {self.db_path} is closed")
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._connections) < self.size:
+                conn = self._open()
+                self._connections.append(conn)
+                return conn
+
+        try:
+            return self._idle.get(timeout=DB_BUSY_TIMEOUT_MS / 1000)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"Timed out waiting for a database connection ({self.size} in use)"
+            )
+
+    def _release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool."""
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+        else:
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Check out a pooled connection for the duration of a `with` block."""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def warm(self):
+        """Open every connection up front and pull the schema into each cache."""
+        conns = []
+        try:
+            for _ in range(self.size):
+                conn = self._acquire()
+                conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+                conns.append(conn)
+        finally:
+            for conn in conns:
+                self._release(conn)
+
+    def close(self):
+        """Close all connections. Checked-out connections close on release."""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._connections.clear()
+
+
+# Process-wide pools, one per database file
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str) -> ConnectionPool:
+    """Get the shared connection pool for a database file."""
+    key = db_path if db_path == ":memory:" else os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            pool = ConnectionPool(db_path)
+            _pools[key] = pool
+            logger.info(f"Opened SQLite connection pool for {db_path} (size={pool.size})")
+        return pool
+
+
+def close_all_pools():
+    """Close every pool (call on shutdown)."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
@@ -2,383 +2,408 @@
 Database repository for Coinflip game.
 Supports SQLite with async operations.
 """
+import copy
 import sqlite3
 import logging
-from typing import Optional, List
-from datetime import datetime
-from .models import User, Game, Wager, Transaction, GameType, GameStatus, CoinSide, SupportTicket
+import weakref
+from typing import Optional, List, Dict, Tuple
+from datetime import datetime, timedelta
+from money import to_lamports, to_sol
+from .models import (
+    User, Game, Wager, WagerListing, Transaction, UsedSignature, SupportTicket, DailyStats, DailyTierStats,
+    LeaderboardStats, CoinSide
+)
+from .pool import ConnectionPool, get_pool
+from .writer import WriteQueue, get_writer
+from .mappers import RowMapper, compile_mappers
+from .pagination import encode_cursor, decode_cursor
+from .rollups import ALL_TIME, add_game as add_game_to_rollups, add_game_to_leaderboards, rollup_day, rollup_hour
+from .schema import SCHEMA, LAMPORT_COLUMNS, ARCHIVE_TABLES, session_token_hash, to_epoch, sync_archive_schema
+from .cache import (
+    TTLCache, SESSION_CACHE_SIZE, SESSION_CACHE_TTL_SECONDS, USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS,
+    USED_SIGNATURE_CACHE_SIZE, USED_SIGNATURE_CACHE_TTL_SECONDS
+)
 
 logger = logging.getLogger(__name__)
 
 
+class _FileState:
+    """Per-file state shared by every Database on the same connection pool."""
+
+    def __init__(self, mappers: Dict[str, RowMapper], fts_enabled: bool, archived: bool):
+        # Row -> model mappers, compiled once from the live schema
+        self.mappers = mappers
+        self.fts_enabled = fts_enabled
+        # Settled history may also live in the attached `archive` database
+        self.archived = archived
+        # Session token hash -> clean User snapshot
+        self.sessions = TTLCache(SESSION_CACHE_SIZE, SESSION_CACHE_TTL_SECONDS)
+        # ("id", user_id) / ("wallet", address) -> clean User snapshot
+        self.users = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS)
+        # Signature -> UsedSignature, for recently used deposit signatures (replay prefilter)
+        self.signatures = TTLCache(USED_SIGNATURE_CACHE_SIZE, USED_SIGNATURE_CACHE_TTL_SECONDS)
+
+
+# Filled on the first Database() per file
+_file_state: "weakref.WeakKeyDictionary[ConnectionPool, _FileState]" = weakref.WeakKeyDictionary()
+
+# Persisted User columns (token_* fields are cached balances, never stored)
+_USER_COLUMNS = (
+    "platform", "email", "password_hash", "email_verified",
+    "wallet_address", "encrypted_secret", "connected_wallet", "payout_wallet",
+    "games_played", "games_won", "total_wagered", "total_won", "total_lost",
+    "tier", "tier_fee_rate", "referral_code", "referred_by",
+    "referral_earnings", "pending_referral_earnings", "total_referrals",
+    "referral_payout_escrow_address", "referral_payout_escrow_secret", "total_referral_claimed",
+    "username", "display_name", "created_at", "last_active", "last_login",
+    "is_admin",
+)
+
+_INSERT_USER_SQL = (
+    f"INSERT INTO users ({', '.join(_USER_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in _USER_COLUMNS)})"
+)
+
+
+# Rows moved to the archive per write job, so the writer is never held for long
+ARCHIVE_BATCH_SIZE = 500
+
+_USER_LAMPORT_COLUMNS = frozenset(LAMPORT_COLUMNS["users"])
+
+
+def _user_value(user: User, column: str):
+    """Convert a User field to its SQLite representation."""
+    value = getattr(user, column)
+    if column in _USER_LAMPORT_COLUMNS:
+        return to_lamports(value)
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+_SAVE_GAME_SQL = """
+    INSERT OR REPLACE INTO games (
+        game_id, game_type, player1_id, player1_side, player1_wallet,
+        player2_id, player2_side, player2_wallet, amount, status,
+        result, winner_id, blockhash, deposit_tx, payout_tx, fee_tx,
+        created_at, completed_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_SAVE_WAGER_SQL = """
+    INSERT OR REPLACE INTO wagers (
+        wager_id, creator_id, creator_wallet, creator_side, amount,
+        status, creator_escrow_address, creator_escrow_secret, creator_deposit_tx,
+        acceptor_id, acceptor_wallet, acceptor_escrow_address, acceptor_escrow_secret, acceptor_deposit_tx,
+        game_id, created_at, expires_at, accepting_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Player stats are applied as increments so concurrent writers never lose updates
+_INCREMENT_PLAYER_STATS_SQL = """
+    UPDATE users SET
+        games_played = games_played + 1,
+        games_won = games_won + ?,
+        total_wagered = total_wagered + ?,
+        total_won = total_won + ?,
+        total_lost = total_lost + ?
+    WHERE user_id = ?
+"""
+
+# Referral balances are increments too: concurrent settlements and claims each add their lamports
+_ADD_REFERRAL_TOTALS_SQL = """
+    UPDATE users SET
+        referral_earnings = referral_earnings + ?,
+        total_referral_claimed = total_referral_claimed + ?
+    WHERE user_id = ?
+"""
+
+
+def _game_params(game: Game) -> tuple:
+    """Bind parameters for _SAVE_GAME_SQL."""
+    return (
+        game.game_id, game.game_type.value, game.player1_id, game.player1_side.value,
+        game.player1_wallet, game.player2_id,
+        game.player2_side.value if game.player2_side else None,
+        game.player2_wallet, to_lamports(game.amount), game.status.value,
+        game.result.value if game.result else None,
+        game.winner_id, game.blockhash, game.deposit_tx, game.payout_tx, game.fee_tx,
+        game.created_at.isoformat(),
+        game.completed_at.isoformat() if game.completed_at else None
+    )
+
+
+def _wager_params(wager: Wager) -> tuple:
+    """Bind parameters for _SAVE_WAGER_SQL."""
+    return (
+        wager.wager_id, wager.creator_id, wager.creator_wallet,
+        wager.creator_side.value, to_lamports(wager.amount), wager.status,
+        wager.creator_escrow_address, wager.creator_escrow_secret, wager.creator_deposit_tx,
+        wager.acceptor_id, wager.acceptor_wallet,
+        wager.acceptor_escrow_address, wager.acceptor_escrow_secret, wager.acceptor_deposit_tx,
+        wager.game_id,
+        wager.created_at.isoformat(),
+        wager.expires_at.isoformat() if wager.expires_at else None,
+        wager.accepting_at.isoformat() if wager.accepting_at else None
+    )
+
+
+
 class Database:
     """Database repository."""
 
     def __init__(self, db_path: str = "coinflip.db"):
         self.db_path = db_path
+        # Long-lived connections shared by every Database on this file
+        self._pool: ConnectionPool = get_pool(db_path)
+        # Every write goes through the file's single group-commit writer
+        self._writer: WriteQueue = get_writer(db_path)
         self._init_db()
 
+    def _connection(self):
+        """Check out a pooled connection (use as a context manager)."""
+        return self._pool.connection()
+
+    def _write(self, func):
+        """Run func(conn) on the writer and wait until its batch commits.
+
+        func runs inside the batch transaction, so it must not commit or
+        roll back itself - raising rolls back just its own changes.
+        """
+        return self._writer.execute(func)
+
+    def close(self):
+        """Release this Database.
+
+        The file's pool, writer and caches are shared with every other
+        Database on it, so they stay open: close_all_writers() and then
+        close_all_pools() shut them down when the process exits.
+        """
+        self._pool = self._writer = None
+
     def _init_db(self):
-        """Initialize database schema."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        # Users table with authentication
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                platform TEXT NOT NULL DEFAULT 'web',
-                email TEXT UNIQUE,
-                password_hash TEXT,
-                email_verified INTEGER DEFAULT 0,
-                wallet_address TEXT,
-                encrypted_secret TEXT,
-                connected_wallet TEXT,
-                payout_wallet TEXT,
-                games_played INTEGER DEFAULT 0,
-                games_won INTEGER DEFAULT 0,
-                total_wagered REAL DEFAULT 0.0,
-                total_won REAL DEFAULT 0.0,
-                total_lost REAL DEFAULT 0.0,
-                tier TEXT DEFAULT 'Starter',
-                tier_fee_rate REAL DEFAULT 0.02,
-                referral_code TEXT UNIQUE,
-                referred_by INTEGER,
-                referral_earnings REAL DEFAULT 0.0,
-                pending_referral_earnings REAL DEFAULT 0.0,
-                total_referrals INTEGER DEFAULT 0,
-                referral_payout_escrow_address TEXT,
-                referral_payout_escrow_secret TEXT,
-                total_referral_claimed REAL DEFAULT 0.0,
-                username TEXT UNIQUE,
-                display_name TEXT,
-                created_at TEXT,
-                last_active TEXT,
-                last_login TEXT,
-                session_token TEXT,
-                session_expires TEXT,
-                is_admin INTEGER DEFAULT 0
-            )
-        """)
-
-        # Support tickets table (for contact support and password resets)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS support_tickets (
-                ticket_id TEXT PRIMARY KEY,
-                user_id INTEGER,
-                email TEXT NOT NULL,
-                ticket_type TEXT NOT NULL,
-                subject TEXT NOT NULL,
-                message TEXT NOT NULL,
-                status TEXT DEFAULT 'open',
-                admin_notes TEXT,
-                created_at TEXT,
-                resolved_at TEXT,
-                resolved_by INTEGER,
-                FOREIGN KEY (user_id) REFERENCES users(user_id),
-                FOREIGN KEY (resolved_by) REFERENCES users(user_id)
-            )
-        """)
-
-        # Games table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS games (
-                game_id TEXT PRIMARY KEY,
-                game_type TEXT NOT NULL,
-                player1_id INTEGER NOT NULL,
-                player1_side TEXT NOT NULL,
-                player1_wallet TEXT NOT NULL,
-                player2_id INTEGER,
-                player2_side TEXT,
-                player2_wallet TEXT,
-                amount REAL NOT NULL,
-                status TEXT NOT NULL,
-                result TEXT,
-                winner_id INTEGER,
-                blockhash TEXT,
-                deposit_tx TEXT,
-                payout_tx TEXT,
-                fee_tx TEXT,
-                created_at TEXT,
-                completed_at TEXT,
-                FOREIGN KEY (player1_id) REFERENCES users(user_id),
-                FOREIGN KEY (player2_id) REFERENCES users(user_id)
-            )
-        """)
-
-        # Wagers table (with isolated escrow wallets for security)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS wagers (
-                wager_id TEXT PRIMARY KEY,
-                creator_id INTEGER NOT NULL,
-                creator_wallet TEXT NOT NULL,
-                creator_side TEXT NOT NULL,
-                amount REAL NOT NULL,
-                status TEXT DEFAULT 'open',
-                creator_escrow_address TEXT,
-                creator_escrow_secret TEXT,
-                creator_deposit_tx TEXT,
-                acceptor_id INTEGER,
-                acceptor_wallet TEXT,
-                acceptor_escrow_address TEXT,
-                acceptor_escrow_secret TEXT,
-                acceptor_deposit_tx TEXT,
-                game_id TEXT,
-                created_at TEXT,
-                expires_at TEXT,
-                FOREIGN KEY (creator_id) REFERENCES users(user_id),
-                FOREIGN KEY (game_id) REFERENCES games(game_id)
-            )
-        """)
-
-        # Transactions table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS transactions (
-                tx_id TEXT PRIMARY KEY,
-                user_id INTEGER NOT NULL,
-                tx_type TEXT NOT NULL,
-                amount REAL NOT NULL,
-                signature TEXT NOT NULL,
-                game_id TEXT,
-                timestamp TEXT,
-                FOREIGN KEY (user_id) REFERENCES users(user_id),
-                FOREIGN KEY (game_id) REFERENCES games(game_id)
-            )
-        """)
-
-        # Used signatures table (SECURITY: Prevent signature reuse)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS used_signatures (
-                signature TEXT PRIMARY KEY,
-                user_wallet TEXT NOT NULL,
-                used_for TEXT NOT NULL,
-                used_at TEXT NOT NULL
-            )
-        """)
-
-        # === MIGRATIONS: Safely add missing columns to existing tables ===
-        # Get existing columns in users table
-        cursor.execute("PRAGMA table_info(users)")
-        existing_columns = {row[1] for row in cursor.fetchall()}
-
-        # Add missing columns to users table (for existing databases)
-        user_migrations = [
-            # Auth columns
-            ("email", "TEXT"),
-            ("password_hash", "TEXT"),
-            ("email_verified", "INTEGER DEFAULT 0"),
-            ("username", "TEXT"),
-            ("display_name", "TEXT"),
-            ("session_token", "TEXT"),
-            ("session_expires", "TEXT"),
-            ("last_login", "TEXT"),
-            ("is_admin", "INTEGER DEFAULT 0"),
-            # Profile columns
-            ("payout_wallet", "TEXT"),
-            ("tier", "TEXT DEFAULT 'Starter'"),
-            ("tier_fee_rate", "REAL DEFAULT 0.02"),
-            # Referral columns
-            ("referral_code", "TEXT"),
-            ("referred_by", "INTEGER"),
-            ("referral_earnings", "REAL DEFAULT 0.0"),
-            ("pending_referral_earnings", "REAL DEFAULT 0.0"),
-            ("total_referrals", "INTEGER DEFAULT 0"),
-            ("referral_payout_escrow_address", "TEXT"),
-            ("referral_payout_escrow_secret", "TEXT"),
-            ("total_referral_claimed", "REAL DEFAULT 0.0"),
-        ]
+        """Bring the schema up to date, compile row mappers and set up caches.
 
-        for col_name, col_type in user_migrations:
-            if col_name not in existing_columns:
-                try:
-                    cursor.execute(f"ALTER TABLE users ADD COLUMN {col_name} {col_type}")
-                    logger.info(f"Migration: Added column '{col_name}' to users table")
-                except sqlite3.OperationalError as e:
-                    if "duplicate column" not in str(e).lower():
-                        logger.warning(f"Migration warning for {col_name}: {e}")
-
-        # Get existing columns in wagers table
-        cursor.execute("PRAGMA table_info(wagers)")
-        existing_wager_columns = {row[1] for row in cursor.fetchall()}
-
-        # Add missing columns to wagers table (for existing databases)
-        wager_migrations = [
-            ("acceptor_wallet", "TEXT"),
-        ]
+        This runs once per connection pool, so constructing further
+        Database objects on the same file costs a dictionary lookup.
+        """
+        state = _file_state.get(self._pool)
+        if state is None:
+            with self._connection() as conn:
+                SCHEMA.migrate(conn)
+                fts_enabled = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'users_fts'"
+                ).fetchone() is not None
+                archived = self._pool.archive_path is not None
+                if archived:
+                    sync_archive_schema(conn)
+                state = _FileState(compile_mappers(conn), fts_enabled, archived)
+            _file_state[self._pool] = state
+            logger.info(f"Database initialized at {self.db_path} (schema v{SCHEMA.latest})")
+        self._mappers: Dict[str, RowMapper] = state.mappers
+        self._fts_enabled: bool = state.fts_enabled
+        self._archived: bool = state.archived
+        self._sessions: TTLCache = state.sessions
+        self._users: TTLCache = state.users
+        self._signatures: TTLCache = state.signatures
+
+    def cache_stats(self) -> Dict[str, dict]:
+        """Hit/miss metrics for the in-process caches."""
+        return {
+            "sessions": self._sessions.stats(),
+            "users": self._users.stats(),
+            "used_signatures": self._signatures.stats(),
+        }
+
+    # === Keyset Pagination ===
+
+    def _keyset_page(self, table: str, sort_col: str, id_col: str, limit: int,
+                     cursor: Optional[str], filters: Optional[dict] = None,
+                     history: bool = False) -> Tuple[list, Optional[str]]:
+        """Fetch one page of `table` ordered by (sort_col, id_col) descending.
 
-        for col_name, col_type in wager_migrations:
-            if col_name not in existing_wager_columns:
-                try:
-                    cursor.execute(f"ALTER TABLE wagers ADD COLUMN {col_name} {col_type}")
-                    logger.info(f"Migration: Added column '{col_name}' to wagers table")
-                except sqlite3.OperationalError as e:
-                    if "duplicate column" not in str(e).lower():
-                        logger.warning(f"Migration warning for {col_name}: {e}")
-
-        # Indexes for performance (only create if column exists)
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_games_player1 ON games(player1_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_games_player2 ON games(player2_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_games_status ON games(status)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_wagers_status ON wagers(status)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_wagers_creator ON wagers(creator_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_user ON transactions(user_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_used_signatures_wallet ON used_signatures(user_wallet)")
-
-        # Only create indexes if columns exist
-        if "email" in existing_columns or "email" in [m[0] for m in user_migrations]:
-            try:
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)")
-            except sqlite3.OperationalError:
-                pass
-        if "session_token" in existing_columns or "session_token" in [m[0] for m in user_migrations]:
-            try:
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_session ON users(session_token)")
-            except sqlite3.OperationalError:
-                pass
-        if "referral_code" in existing_columns:
-            try:
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_referral_code ON users(referral_code)")
-            except sqlite3.OperationalError:
-                pass
-        if "is_admin" in existing_columns or "is_admin" in [m[0] for m in user_migrations]:
-            try:
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_is_admin ON users(is_admin)")
-            except sqlite3.OperationalError:
-                pass
-
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tickets_status ON support_tickets(status)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tickets_type ON support_tickets(ticket_type)")
-
-        conn.commit()
-        conn.close()
-        logger.info(f"Database initialized at {self.db_path}")
+        Args:
+            table: Table name
+            sort_col: Sort column (leading column of the composite index)
+            id_col: Unique tie-breaker column
+            limit: Page size
+            cursor: Cursor from the previous page, or None for the first page
+            filters: Optional {column: value} equality filters
+            history: Also read rows moved to the archive
+
+        Returns:
+            Tuple of (rows, next_cursor)
+        """
+        clauses, args = [], []
+        for column, value in (filters or {}).items():
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                args.append(value)
+        if cursor:
+            clauses.append(f"({sort_col}, {id_col}) < (?, ?)")
+            args.extend(decode_cursor(cursor))
+
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        order = f" ORDER BY {sort_col} DESC, {id_col} DESC LIMIT ?"
+        args.append(limit + 1)  # One extra row tells us whether a next page exists
+
+        sources = self._sources(table) if history else [f"SELECT * FROM {table}"]
+        if len(sources) == 1:
+            query = sources[0] + where + order
+        else:
+            # Each database is its own bounded index range read, merged here
+            query = " UNION ".join(f"SELECT * FROM ({source}{where}{order})" for source in sources) + order
+            args = args * len(sources) + [limit + 1]
+
+        with self._connection() as conn:
+            rows = conn.execute(query, args).fetchall()
+
+        return self._page(rows, limit, sort_col, id_col)
+
+    def _sources(self, table: str) -> List[str]:
+        """SELECT clauses reading `table` from the hot database, then the archive.
+
+        Archive rows are selected in the hot table's column order, so the
+        table's row mapper applies to both. Reads that merge the two use
+        UNION: a row caught mid-archival by a crash is in both, identically.
+        """
+        if not self._archived:
+            return [f"SELECT * FROM {table}"]
+        columns = ", ".join(self._mappers[table].columns)
+        return [f"SELECT {columns} FROM main.{table}", f"SELECT {columns} FROM archive.{table}"]
+
+    def _get_by_key(self, table: str, key: str, value) -> Optional[sqlite3.Row]:
+        """Primary-key lookup in the hot table, falling back to the archive."""
+        with self._connection() as conn:
+            for source in self._sources(table):
+                row = conn.execute(f"{source} WHERE {key} = ?", (value,)).fetchone()
+                if row:
+                    return row
+        return None
+
+    @staticmethod
+    def _page(rows: list, limit: int, sort_col: str, id_col: str,
+              convert=None) -> Tuple[list, Optional[str]]:
+        """Trim a limit+1 result to a page and build its next cursor."""
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][sort_col], rows[-1][id_col])
+        if convert:
+            rows = [convert(row) for row in rows]
+        return rows, next_cursor
 
     # === User Operations ===
 
     def get_user(self, user_id: int) -> Optional[User]:
-        """Get user by ID."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        """Get user by ID (served from the user cache when hot)."""
+        cached = self._users.get(("id", user_id))
+        if cached is not None:
+            return copy.copy(cached)
+
+        generation = self._users.generation
+        with self._connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
-        row = cursor.fetchone()
-        conn.close()
+            cursor.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
+            row = cursor.fetchone()
 
         if not row:
             return None
 
-        return self._row_to_user(row)
+        user = self._row_to_user(row)
+        self._users.put(("id", user_id), copy.copy(user), owner=user_id, generation=generation)
+        return user
 
     def _row_to_user(self, row: sqlite3.Row) -> User:
         """Convert database row to User object."""
-        keys = row.keys()
-        return User(
-            user_id=row["user_id"],
-            platform=row["platform"],
-            email=row["email"] if "email" in keys else None,
-            password_hash=row["password_hash"] if "password_hash" in keys else None,
-            email_verified=bool(row["email_verified"]) if "email_verified" in keys else False,
-            wallet_address=row["wallet_address"],
-            encrypted_secret=row["encrypted_secret"],
-            connected_wallet=row["connected_wallet"],
-            payout_wallet=row["payout_wallet"] if "payout_wallet" in keys else None,
-            games_played=row["games_played"],
-            games_won=row["games_won"],
-            total_wagered=row["total_wagered"],
-            total_won=row["total_won"],
-            total_lost=row["total_lost"],
-            tier=row["tier"] if "tier" in keys else "Starter",
-            tier_fee_rate=row["tier_fee_rate"] if "tier_fee_rate" in keys else 0.02,
-            referral_code=row["referral_code"] if "referral_code" in keys else None,
-            referred_by=row["referred_by"] if "referred_by" in keys else None,
-            referral_earnings=row["referral_earnings"] if "referral_earnings" in keys else 0.0,
-            pending_referral_earnings=row["pending_referral_earnings"] if "pending_referral_earnings" in keys else 0.0,
-            total_referrals=row["total_referrals"] if "total_referrals" in keys else 0,
-            referral_payout_escrow_address=row["referral_payout_escrow_address"] if "referral_payout_escrow_address" in keys else None,
-            referral_payout_escrow_secret=row["referral_payout_escrow_secret"] if "referral_payout_escrow_secret" in keys else None,
-            total_referral_claimed=row["total_referral_claimed"] if "total_referral_claimed" in keys else 0.0,
-            username=row["username"] if "username" in keys else None,
-            display_name=row["display_name"] if "display_name" in keys else None,
-            created_at=datetime.fromisoformat(row["created_at"]) if row["created_at"] else datetime.utcnow(),
-            last_active=datetime.fromisoformat(row["last_active"]) if row["last_active"] else datetime.utcnow(),
-            last_login=datetime.fromisoformat(row["last_login"]) if ("last_login" in keys and row["last_login"]) else None,
-            session_token=row["session_token"] if "session_token" in keys else None,
-            session_expires=datetime.fromisoformat(row["session_expires"]) if ("session_expires" in keys and row["session_expires"]) else None,
-            is_admin=bool(row["is_admin"]) if "is_admin" in keys else False,
-        )
+        user = self._mappers["users"](row)
+        user.mark_clean()
+        return user
 
     def save_user(self, user: User) -> int:
-        """Save or update user. Returns user_id."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """Save or update user. Returns user_id.
+
+        Users loaded from the database track their changes, so only the
+        modified columns are written - and nothing at all if no persisted
+        field changed. Users built in memory are written in full.
+
+        Rows are only ever created without a user_id (the database assigns
+        it). Saving a user_id that has no row writes and caches nothing.
+        """
+        dirty = user.dirty_fields
+        if user.user_id and dirty is not None:
+            columns = [col for col in _USER_COLUMNS if col in dirty]
+            if not columns:
+                return user.user_id  # No-op save, skip the write
 
         if user.user_id:
-            # Update existing user
-            cursor.execute("""
-                UPDATE users SET
-                    platform=?, email=?, password_hash=?, email_verified=?,
-                    wallet_address=?, encrypted_secret=?, connected_wallet=?, payout_wallet=?,
-                    games_played=?, games_won=?, total_wagered=?, total_won=?, total_lost=?,
-                    tier=?, tier_fee_rate=?, referral_code=?, referred_by=?,
-                    referral_earnings=?, pending_referral_earnings=?, total_referrals=?,
-                    referral_payout_escrow_address=?, referral_payout_escrow_secret=?, total_referral_claimed=?,
-                    username=?, display_name=?, created_at=?, last_active=?, last_login=?,
-                    session_token=?, session_expires=?, is_admin=?
-                WHERE user_id=?
-            """, (
-                user.platform, user.email, user.password_hash, int(user.email_verified),
-                user.wallet_address, user.encrypted_secret, user.connected_wallet, user.payout_wallet,
-                user.games_played, user.games_won, user.total_wagered, user.total_won, user.total_lost,
-                user.tier, user.tier_fee_rate, user.referral_code, user.referred_by,
-                user.referral_earnings, user.pending_referral_earnings, user.total_referrals,
-                user.referral_payout_escrow_address, user.referral_payout_escrow_secret, user.total_referral_claimed,
-                user.username, user.display_name, user.created_at.isoformat(), user.last_active.isoformat(),
-                user.last_login.isoformat() if user.last_login else None,
-                user.session_token, user.session_expires.isoformat() if user.session_expires else None,
-                int(user.is_admin), user.user_id
-            ))
-            user_id = user.user_id
+            # Update existing user (changed columns only when tracked)
+            if dirty is None:
+                columns = list(_USER_COLUMNS)
+            assignments = ", ".join(f"{col}=?" for col in columns)
+            sql = f"UPDATE users SET {assignments} WHERE user_id=?"
+            params = [_user_value(user, col) for col in columns] + [user.user_id]
         else:
             # Insert new user
-            cursor.execute("""
-                INSERT INTO users (
-                    platform, email, password_hash, email_verified,
-                    wallet_address, encrypted_secret, connected_wallet, payout_wallet,
-                    games_played, games_won, total_wagered, total_won, total_lost,
-                    tier, tier_fee_rate, referral_code, referred_by,
-                    referral_earnings, pending_referral_earnings, total_referrals,
-                    referral_payout_escrow_address, referral_payout_escrow_secret, total_referral_claimed,
-                    username, display_name, created_at, last_active, last_login,
-                    session_token, session_expires, is_admin
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                user.platform, user.email, user.password_hash, int(user.email_verified),
-                user.wallet_address, user.encrypted_secret, user.connected_wallet, user.payout_wallet,
-                user.games_played, user.games_won, user.total_wagered, user.total_won, user.total_lost,
-                user.tier, user.tier_fee_rate, user.referral_code, user.referred_by,
-                user.referral_earnings, user.pending_referral_earnings, user.total_referrals,
-                user.referral_payout_escrow_address, user.referral_payout_escrow_secret, user.total_referral_claimed,
-                user.username, user.display_name, user.created_at.isoformat(), user.last_active.isoformat(),
-                user.last_login.isoformat() if user.last_login else None,
-                user.session_token, user.session_expires.isoformat() if user.session_expires else None,
-                int(user.is_admin)
-            ))
-            user_id = cursor.lastrowid
-
-        conn.commit()
-        conn.close()
+            columns = list(_USER_COLUMNS)
+            sql = _INSERT_USER_SQL
+            params = [_user_value(user, col) for col in columns]
+
+        def write(conn):
+            cursor = conn.execute(sql, params)
+            return cursor.lastrowid, cursor.rowcount
+
+        generation = self._users.generation
+        lastrowid, rowcount = self._write(write)
+        if not rowcount:
+            # No row has this id: nothing was stored, so nothing may look saved
+            logger.warning(f"save_user: no user {user.user_id} to update, nothing saved")
+            self._users.invalidate_owner(user.user_id)
+            return user.user_id
+        user_id = user.user_id or lastrowid
+        if user.user_id:
+            # Cached sessions hold a copy of this user's row
+            self._sessions.invalidate_owner(user_id)
+
+        if not user.user_id:
+            user.user_id = user_id
+        user.mark_clean()
+
+        # Write-through by id; wallet lookups may now resolve differently, so drop those
+        self._users.refresh(("id", user_id), self._saved_user(user, columns),
+                            owner=user_id, generation=generation)
+        for wallet in {user.connected_wallet, user.payout_wallet} - {None}:
+            self._users.invalidate(("wallet", wallet))
         return user_id
 
+    def _saved_user(self, user: User, columns: List[str]) -> Optional[User]:
+        """The row as it stands after save_user wrote `columns`.
+
+        A partial update only wrote the changed columns, so the caller's
+        other fields may be older than the database: those are taken from
+        the cached row instead (None if it isn't cached).
+        """
+        if len(columns) == len(_USER_COLUMNS):
+            return copy.copy(user)
+        cached = self._users.peek(("id", user.user_id))
+        if cached is None:
+            return None
+        saved = copy.copy(cached)
+        for col in columns:
+            setattr(saved, col, getattr(user, col))
+        saved.mark_clean()
+        return saved
+
     def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email address."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        with self._connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM users WHERE email = ?", (email.lower(),))
-        row = cursor.fetchone()
-        conn.close()
+            cursor.execute("SELECT * FROM users WHERE email = ?", (email.lower(),))
+            row = cursor.fetchone()
 
         if not row:
             return None
@@ -387,13 +412,11 @@ class Database:
 
     def get_user_by_username(self, username: str) -> Optional[User]:
         """Get user by username."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        with self._connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM users WHERE username = ?", (username.lower(),))
-        row = cursor.fetchone()
-        conn.close()
+            cursor.execute("SELECT * FROM users WHERE username = ?", (username.lower(),))
+            row = cursor.fetchone()
 
         if not row:
             return None
@@ -401,53 +424,78 @@ class Database:
         return self._row_to_user(row)
 
     def get_user_by_wallet(self, wallet_address: str) -> Optional[User]:
-        """Get user by wallet address (connected_wallet or payout_wallet)."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT * FROM users
-            WHERE connected_wallet = ? OR payout_wallet = ?
-            ORDER BY username IS NOT NULL DESC
-            LIMIT 1
-        """, (wallet_address, wallet_address))
-        row = cursor.fetchone()
-        conn.close()
+        """Get user by wallet address (connected_wallet or payout_wallet).
+
+        Two index seeks (one per wallet column) instead of an OR scan;
+        a user with a username wins over an anonymous wallet user.
+        Served from the user cache when hot.
+        """
+        cached = self._users.get(("wallet", wallet_address))
+        if cached is not None:
+            return copy.copy(cached)
+
+        generation = self._users.generation
+        with self._connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT * FROM (
+                    SELECT * FROM users WHERE connected_wallet = ?
+                    UNION
+                    SELECT * FROM users WHERE payout_wallet = ?
+                )
+                ORDER BY username IS NOT NULL DESC
+                LIMIT 1
+            """, (wallet_address, wallet_address))
+            row = cursor.fetchone()
 
         if not row:
             return None
 
-        return self._row_to_user(row)
+        user = self._row_to_user(row)
+        self._users.put(("wallet", wallet_address), copy.copy(user), owner=user.user_id,
+                        generation=generation)
+        return user
 
     def get_user_by_session(self, session_token: str) -> Optional[User]:
-        """Get user by session token (validates expiration)."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        """Get user by session token (validates expiration).
+
+        Resolved sessions are cached for a short TTL (never past the
+        session's own expiry); any save_user of that user drops them.
+        """
+        token_hash = session_token_hash(session_token)
+        cached = self._sessions.get(token_hash)
+        if cached is not None:
+            return copy.copy(cached)
+
+        generation = self._sessions.generation
+        now = to_epoch(datetime.utcnow())
+        with self._connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("""
-            SELECT * FROM users
-            WHERE session_token = ? AND session_expires > ?
-        """, (session_token, datetime.utcnow().isoformat()))
+            cursor.execute("""
+                SELECT s.expires_at, u.* FROM sessions s
+                JOIN users u ON u.user_id = s.user_id
+                WHERE s.token_hash = ? AND s.expires_at > ?
+            """, (token_hash, now))
 
-        row = cursor.fetchone()
-        conn.close()
+            row = cursor.fetchone()
 
         if not row:
             return None
 
-        return self._row_to_user(row)
+        user = self._row_to_user(row[1:])
+        self._sessions.put(token_hash, copy.copy(user), owner=user.user_id,
+                           ttl_seconds=row[0] - now, generation=generation)
+        return user
 
     def get_user_by_referral_code(self, referral_code: str) -> Optional[User]:
         """Get user by their referral code."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        with self._connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM users WHERE referral_code = ?", (referral_code.upper(),))
-        row = cursor.fetchone()
-        conn.close()
+            cursor.execute("SELECT * FROM users WHERE referral_code = ?", (referral_code.upper(),))
+            row = cursor.fetchone()
 
         if not row:
             return None
@@ -456,63 +504,76 @@ class Database:
 
     def email_exists(self, email: str) -> bool:
         """Check if email is already registered."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("SELECT 1 FROM users WHERE email = ?", (email.lower(),))
-        result = cursor.fetchone()
-        conn.close()
+            cursor.execute("SELECT 1 FROM users WHERE email = ?", (email.lower(),))
+            result = cursor.fetchone()
 
         return result is not None
 
     def username_exists(self, username: str) -> bool:
         """Check if username is already taken."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("SELECT 1 FROM users WHERE username = ?", (username.lower(),))
-        result = cursor.fetchone()
-        conn.close()
+            cursor.execute("SELECT 1 FROM users WHERE username = ?", (username.lower(),))
+            result = cursor.fetchone()
 
         return result is not None
 
+    # === Session Operations ===
+
+    def create_session(self, user_id: int, session_token: str, expires_at: datetime):
+        """Start a session for a user (one per device; existing sessions stay valid).
+
+        Only a hash of the token is stored.
+        """
+        params = (session_token_hash(session_token), user_id,
+                  to_epoch(datetime.utcnow()), to_epoch(expires_at))
+        self._write(lambda conn: conn.execute("""
+            INSERT INTO sessions (token_hash, user_id, created_at, expires_at)
+            VALUES (?, ?, ?, ?)
+        """, params))
+
+    def delete_session(self, session_token: str) -> bool:
+        """End one session (logout on this device). Returns True if it existed."""
+        token_hash = session_token_hash(session_token)
+        deleted = self._write(lambda conn: conn.execute(
+            "DELETE FROM sessions WHERE token_hash = ?", (token_hash,)
+        ).rowcount)
+        self._sessions.invalidate(token_hash)
+        return deleted > 0
+
+    def delete_user_sessions(self, user_id: int) -> int:
+        """End every session of a user (password reset, ban). Returns sessions removed."""
+        deleted = self._write(lambda conn: conn.execute(
+            "DELETE FROM sessions WHERE user_id = ?", (user_id,)
+        ).rowcount)
+        self._sessions.invalidate_owner(user_id)
+        return deleted
+
+    def purge_expired_sessions(self) -> int:
+        """Delete sessions past their expiry. Returns sessions removed.
+
+        Expired sessions are already rejected on lookup; this only keeps
+        the table (and its indexes) small.
+        """
+        now = to_epoch(datetime.utcnow())
+        return self._write(lambda conn: conn.execute(
+            "DELETE FROM sessions WHERE expires_at <= ?", (now,)
+        ).rowcount)
+
     # === Game Operations ===
 
     def save_game(self, game: Game):
         """Save or update game."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT OR REPLACE INTO games (
-                game_id, game_type, player1_id, player1_side, player1_wallet,
-                player2_id, player2_side, player2_wallet, amount, status,
-                result, winner_id, blockhash, deposit_tx, payout_tx, fee_tx,
-                created_at, completed_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            game.game_id, game.game_type.value, game.player1_id, game.player1_side.value,
-            game.player1_wallet, game.player2_id,
-            game.player2_side.value if game.player2_side else None,
-            game.player2_wallet, game.amount, game.status.value,
-            game.result.value if game.result else None,
-            game.winner_id, game.blockhash, game.deposit_tx, game.payout_tx, game.fee_tx,
-            game.created_at.isoformat(),
-            game.completed_at.isoformat() if game.completed_at else None
-        ))
-
-        conn.commit()
-        conn.close()
+        params = _game_params(game)
+        self._write(lambda conn: conn.execute(_SAVE_GAME_SQL, params))
 
     def get_game(self, game_id: str) -> Optional[Game]:
-        """Get game by ID."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT * FROM games WHERE game_id = ?", (game_id,))
-        row = cursor.fetchone()
-        conn.close()
+        """Get game by ID (archived games included)."""
+        row = self._get_by_key("games", "game_id", game_id)
 
         if not row:
             return None
@@ -521,119 +582,156 @@ class Database:
 
     def get_user_games(self, user_id: int, limit: int = 10) -> List[Game]:
         """Get recent games for a user."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        return self.get_user_games_page(user_id, limit=limit)[0]
 
-        cursor.execute("""
-            SELECT * FROM games
-            WHERE player1_id = ? OR player2_id = ?
-            ORDER BY created_at DESC
-            LIMIT ?
-        """, (user_id, user_id, limit))
+    def get_user_games_page(self, user_id: int, limit: int = 20,
+                            cursor: Optional[str] = None) -> Tuple[List[Game], Optional[str]]:
+        """Get one page of a user's game history, newest first (archived games included).
 
-        rows = cursor.fetchall()
-        conn.close()
+        Each side (player1/player2) of each database is a bounded index
+        range read of at most limit + 1 rows; the ranges are merged.
 
-        return [self._row_to_game(row) for row in rows]
+        Returns:
+            Tuple of (games, next_cursor) - next_cursor is None on the last page
+        """
+        keyset, keyset_args = "", []
+        if cursor:
+            keyset = "AND (created_at, game_id) < (?, ?)"
+            keyset_args = list(decode_cursor(cursor))
+
+        ranges, args = [], []
+        for source in self._sources("games"):
+            for side in ("player1_id", "player2_id"):
+                ranges.append(f"""
+                    SELECT * FROM (
+                        {source} WHERE {side} = ? {keyset}
+                        ORDER BY created_at DESC, game_id DESC LIMIT ?
+                    )
+                """)
+                args.extend([user_id, *keyset_args, limit + 1])
+
+        with self._connection() as conn:
+            rows = conn.execute(f"""
+                SELECT * FROM ({" UNION ".join(ranges)})
+                ORDER BY created_at DESC, game_id DESC
+                LIMIT ?
+            """, [*args, limit + 1]).fetchall()
+
+        return self._page(rows, limit, "created_at", "game_id", self._row_to_game)
 
     def get_recent_games(self, limit: int = 10) -> List[Game]:
         """Get recent completed games (all users) for public display."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        with self._connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("""
-            SELECT * FROM games
-            WHERE status = 'completed'
-            ORDER BY completed_at DESC
-            LIMIT ?
-        """, (limit,))
+            cursor.execute("""
+                SELECT * FROM games
+                WHERE status = 'completed'
+                ORDER BY completed_at DESC
+                LIMIT ?
+            """, (limit,))
 
-        rows = cursor.fetchall()
-        conn.close()
+            rows = cursor.fetchall()
 
         return [self._row_to_game(row) for row in rows]
 
     def _row_to_game(self, row: sqlite3.Row) -> Game:
         """Convert database row to Game object."""
-        return Game(
-            game_id=row["game_id"],
-            game_type=GameType(row["game_type"]),
-            player1_id=row["player1_id"],
-            player1_side=CoinSide(row["player1_side"]),
-            player1_wallet=row["player1_wallet"],
-            player2_id=row["player2_id"],
-            player2_side=CoinSide(row["player2_side"]) if row["player2_side"] else None,
-            player2_wallet=row["player2_wallet"],
-            amount=row["amount"],
-            status=GameStatus(row["status"]),
-            result=CoinSide(row["result"]) if row["result"] else None,
-            winner_id=row["winner_id"],
-            blockhash=row["blockhash"],
-            deposit_tx=row["deposit_tx"],
-            payout_tx=row["payout_tx"],
-            fee_tx=row["fee_tx"],
-            created_at=datetime.fromisoformat(row["created_at"]) if row["created_at"] else datetime.utcnow(),
-            completed_at=datetime.fromisoformat(row["completed_at"]) if row["completed_at"] else None,
-        )
+        return self._mappers["games"](row)
 
     # === Wager Operations ===
 
     def save_wager(self, wager: Wager):
         """Save or update wager."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT OR REPLACE INTO wagers (
-                wager_id, creator_id, creator_wallet, creator_side, amount,
-                status, creator_escrow_address, creator_escrow_secret, creator_deposit_tx,
-                acceptor_id, acceptor_wallet, acceptor_escrow_address, acceptor_escrow_secret, acceptor_deposit_tx,
-                game_id, created_at, expires_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            wager.wager_id, wager.creator_id, wager.creator_wallet,
-            wager.creator_side.value, wager.amount, wager.status,
-            wager.creator_escrow_address, wager.creator_escrow_secret, wager.creator_deposit_tx,
-            wager.acceptor_id, wager.acceptor_wallet,
-            wager.acceptor_escrow_address, wager.acceptor_escrow_secret, wager.acceptor_deposit_tx,
-            wager.game_id,
-            wager.created_at.isoformat(),
-            wager.expires_at.isoformat() if wager.expires_at else None
-        ))
-
-        conn.commit()
-        conn.close()
+        params = _wager_params(wager)
+        self._write(lambda conn: conn.execute(_SAVE_WAGER_SQL, params))
 
     def get_open_wagers(self, limit: int = 20) -> List[Wager]:
         """Get all open wagers."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        with self._connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("""
-            SELECT * FROM wagers
-            WHERE status = 'open'
-            ORDER BY created_at DESC
-            LIMIT ?
-        """, (limit,))
+            cursor.execute("""
+                SELECT * FROM wagers
+                WHERE status = 'open'
+                ORDER BY created_at DESC
+                LIMIT ?
+            """, (limit,))
 
-        rows = cursor.fetchall()
-        conn.close()
+            rows = cursor.fetchall()
 
         return [self._row_to_wager(row) for row in rows]
 
-    def get_wager(self, wager_id: str) -> Optional[Wager]:
-        """Get a single wager by ID."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+    def get_open_wager_listings(self, limit: int = 20) -> List[WagerListing]:
+        """Get open wagers for the public lobby, newest first, in one query.
 
-        cursor.execute("SELECT * FROM wagers WHERE wager_id = ?", (wager_id,))
+        Returns just the columns the lobby shows, with the creator's
+        username joined in (by creator_id, falling back to any account
+        holding the creator wallet) - no per-wager user lookups.
+        """
+        with self._connection() as conn:
+            rows = conn.execute("""
+                SELECT w.wager_id, w.creator_wallet, w.creator_side, w.amount, w.status,
+                       w.created_at, w.acceptor_wallet, w.accepting_at,
+                       COALESCE(
+                           u.username,
+                           (SELECT username FROM users
+                            WHERE connected_wallet = w.creator_wallet AND username IS NOT NULL LIMIT 1),
+                           (SELECT username FROM users
+                            WHERE payout_wallet = w.creator_wallet AND username IS NOT NULL LIMIT 1)
+                       ) AS creator_username
+                FROM wagers w
+                LEFT JOIN users u ON u.user_id = w.creator_id
+                WHERE w.status = 'open'
+                ORDER BY w.created_at DESC
+                LIMIT ?
+            """, (limit,)).fetchall()
+
+        return [
+            WagerListing(
+                wager_id=row[0],
+                creator_wallet=row[1],
+                creator_side=CoinSide(row[2]),
+                amount=to_sol(row[3]),
+                status=row[4],
+                created_at=datetime.fromisoformat(row[5]) if row[5] else datetime.utcnow(),
+                acceptor_wallet=row[6],
+                accepting_at=datetime.fromisoformat(row[7]) if row[7] else None,
+                creator_username=row[8],
+            )
+            for row in rows
+        ]
+
+    def clear_expired_accepting(self, started_before: datetime) -> List[str]:
+        """Release open wagers whose prepare-accept began before the cutoff.
+
+        Clears the pending acceptor and their escrow so the wager can be
+        accepted again. Rows are re-checked inside the write, so an accept
+        that started after the cutoff is never cleared.
+
+        Returns:
+            IDs of the wagers that were released
+        """
+        cutoff = started_before.isoformat()
+
+        def write(conn: sqlite3.Connection) -> List[str]:
+            wager_ids = [row[0] for row in conn.execute(
+                "SELECT wager_id FROM wagers WHERE accepting_at < ? AND status = 'open'", (cutoff,)
+            )]
+            if wager_ids:
+                conn.execute("""
+                    UPDATE wagers SET
+                        accepting_at = NULL, acceptor_wallet = NULL,
+                        acceptor_escrow_address = NULL, acceptor_escrow_secret = NULL
+                    WHERE accepting_at < ? AND status = 'open'
+                """, (cutoff,))
+            return wager_ids
+
+        return self._write(write)
 
-        row = cursor.fetchone()
-        conn.close()
+    def get_wager(self, wager_id: str) -> Optional[Wager]:
+        """Get a single wager by ID (archived wagers included)."""
+        row = self._get_by_key("wagers", "wager_id", wager_id)
 
         if row:
             return self._row_to_wager(row)
@@ -641,182 +739,376 @@ class Database:
 
     def get_all_wagers(self, status: Optional[str] = None, limit: int = 100) -> List[Wager]:
         """Get all wagers, optionally filtered by status (admin use)."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        if status:
-            cursor.execute("""
-                SELECT * FROM wagers
-                WHERE status = ?
-                ORDER BY created_at DESC
-                LIMIT ?
-            """, (status, limit))
-        else:
-            cursor.execute("""
-                SELECT * FROM wagers
-                ORDER BY created_at DESC
-                LIMIT ?
-            """, (limit,))
-
-        rows = cursor.fetchall()
-        conn.close()
+        with self._connection() as conn:
+            cursor = conn.cursor()
+
+            if status:
+                cursor.execute("""
+                    SELECT * FROM wagers
+                    WHERE status = ?
+                    ORDER BY created_at DESC
+                    LIMIT ?
+                """, (status, limit))
+            else:
+                cursor.execute("""
+                    SELECT * FROM wagers
+                    ORDER BY created_at DESC
+                    LIMIT ?
+                """, (limit,))
+
+            rows = cursor.fetchall()
 
         return [self._row_to_wager(row) for row in rows]
 
-    def get_user_wagers(self, user_id: int) -> List[Wager]:
-        """Get user's wagers."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+    def get_wagers_page(self, status: Optional[str] = None, limit: int = 50,
+                        cursor: Optional[str] = None) -> Tuple[List[Wager], Optional[str]]:
+        """Get one page of wagers, newest first, optionally filtered by status (admin use).
 
-        cursor.execute("""
-            SELECT * FROM wagers
-            WHERE creator_id = ?
-            ORDER BY created_at DESC
-        """, (user_id,))
+        Returns:
+            Tuple of (wagers, next_cursor) - next_cursor is None on the last page
+        """
+        rows, next_cursor = self._keyset_page(
+            "wagers", "created_at", "wager_id", limit, cursor, {"status": status}
+        )
+        return [self._row_to_wager(row) for row in rows], next_cursor
 
-        rows = cursor.fetchall()
-        conn.close()
+    def get_user_wagers(self, user_id: int) -> List[Wager]:
+        """Get user's wagers (archived wagers included)."""
+        sources = self._sources("wagers")
+        with self._connection() as conn:
+            rows = conn.execute(
+                " UNION ".join(f"{source} WHERE creator_id = ?" for source in sources)
+                + " ORDER BY created_at DESC",
+                [user_id] * len(sources)
+            ).fetchall()
 
         return [self._row_to_wager(row) for row in rows]
 
     def _row_to_wager(self, row: sqlite3.Row) -> Wager:
         """Convert database row to Wager object."""
-        keys = row.keys()
-        return Wager(
-            wager_id=row["wager_id"],
-            creator_id=row["creator_id"],
-            creator_wallet=row["creator_wallet"],
-            creator_side=CoinSide(row["creator_side"]),
-            amount=row["amount"],
-            status=row["status"],
-            creator_escrow_address=row["creator_escrow_address"],
-            creator_escrow_secret=row["creator_escrow_secret"],
-            creator_deposit_tx=row["creator_deposit_tx"],
-            acceptor_id=row["acceptor_id"],
-            acceptor_wallet=row["acceptor_wallet"] if "acceptor_wallet" in keys else None,
-            acceptor_escrow_address=row["acceptor_escrow_address"],
-            acceptor_escrow_secret=row["acceptor_escrow_secret"],
-            acceptor_deposit_tx=row["acceptor_deposit_tx"],
-            game_id=row["game_id"],
-            created_at=datetime.fromisoformat(row["created_at"]) if row["created_at"] else datetime.utcnow(),
-            expires_at=datetime.fromisoformat(row["expires_at"]) if row["expires_at"] else None,
-        )
+        return self._mappers["wagers"](row)
+
+    # === Settlement ===
+
+    def record_game_result(self, game: Game, wager: Wager, payout: int, fee: int,
+                           winner_tier: str, referrer_id: Optional[int] = None,
+                           referral_commission: int = 0) -> List[LeaderboardStats]:
+        """Persist a settled PVP game in a single transaction.
+
+        Writes the game, the wager's final state, both players' stats and
+        the daily and leaderboard rollups as one unit - all or nothing.
+        Stats are SQL increments, so a concurrent update to either user is
+        never overwritten.
+
+        Args:
+            game: Completed game (player1 = creator, player2 = acceptor)
+            wager: Settled wager (status and game_id already set)
+            payout: Lamports the winner was paid (credited to their total_won)
+            fee: Lamports of fee revenue kept, net of referral commission
+            winner_tier: Winner's tier before the game, which set the fee rate
+            referrer_id: Winner's referrer, if a commission was paid to them
+            referral_commission: Lamports paid to the referrer (added to their referral_earnings)
+
+        Returns:
+            Both players' all-time leaderboard rows, as of this game
+        """
+        amount = to_lamports(game.amount)
+        settled_at = game.completed_at or datetime.utcnow()
+        players = (game.player1_id, game.player2_id)
+
+        def write(conn: sqlite3.Connection) -> list:
+            conn.execute(_SAVE_GAME_SQL, _game_params(game))
+            conn.execute(_SAVE_WAGER_SQL, _wager_params(wager))
+
+            for player_id in (game.player1_id, game.player2_id):
+                won = player_id == game.winner_id
+                conn.execute(_INCREMENT_PLAYER_STATS_SQL, (
+                    1 if won else 0,
+                    amount,
+                    payout if won else 0,
+                    0 if won else amount,
+                    player_id
+                ))
+
+            if referrer_id and referral_commission:
+                conn.execute(_ADD_REFERRAL_TOTALS_SQL, (referral_commission, 0, referrer_id))
+
+            add_game_to_rollups(conn, rollup_day(settled_at), players, game.winner_id,
+                                amount, payout, fee, winner_tier)
+            add_game_to_leaderboards(conn, (rollup_hour(settled_at), ALL_TIME), game.game_id, players,
+                                     game.winner_id, amount, payout)
+            return conn.execute(
+                "SELECT * FROM leaderboard_stats WHERE period = ? AND user_id IN (?, ?)", (ALL_TIME, *players)
+            ).fetchall()
+
+        try:
+            rows = self._write(write)
+        except Exception as e:
+            logger.error(f"Recording result for game {game.game_id} failed: {e}", exc_info=True)
+            raise
+
+        # Cached users and sessions hold the players' (and referrer's) rows, stats included
+        for user_id in players + ((referrer_id,) if referrer_id and referral_commission else ()):
+            self._sessions.invalidate_owner(user_id)
+            self._users.invalidate_owner(user_id)
+
+        return [self._mappers["leaderboard_stats"](row) for row in rows]
+
+    def add_referral_totals(self, user_id: int, earnings: int = 0, claimed: int = 0):
+        """Atomically add lamports to a user's referral_earnings / total_referral_claimed.
+
+        Use this instead of save_user for these balances: increments from
+        concurrent settlements and claims never overwrite each other. User
+        objects already loaded keep the old values - re-read to see them.
+        """
+        self._write(lambda conn: conn.execute(_ADD_REFERRAL_TOTALS_SQL, (earnings, claimed, user_id)))
+        self._sessions.invalidate_owner(user_id)
+        self._users.invalidate_owner(user_id)
+
+    # === Stats Rollups ===
+
+    def get_daily_stats(self, days: int = 30) -> List[DailyStats]:
+        """Platform totals for the last `days` UTC days (today included), newest first.
+
+        Days without a settled game have no row.
+        """
+        since = rollup_day(datetime.utcnow() - timedelta(days=days - 1))
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT * FROM daily_stats WHERE day >= ? ORDER BY day DESC", (since,)
+            ).fetchall()
+
+        return [self._mappers["daily_stats"](row) for row in rows]
+
+    def get_daily_tier_stats(self, days: int = 30) -> List[DailyTierStats]:
+        """Games and fee revenue by winner tier for the last `days` UTC days, newest first."""
+        since = rollup_day(datetime.utcnow() - timedelta(days=days - 1))
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT * FROM daily_tier_stats WHERE day >= ? ORDER BY day DESC, tier", (since,)
+            ).fetchall()
+
+        return [self._mappers["daily_tier_stats"](row) for row in rows]
+
+    def get_active_player_count(self, days: int = 30) -> int:
+        """Unique players with a settled game in the last `days` UTC days."""
+        since = rollup_day(datetime.utcnow() - timedelta(days=days - 1))
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT COUNT(DISTINCT user_id) FROM daily_user_stats WHERE day >= ?", (since,)
+            ).fetchone()
+
+        return row[0]
+
+    def get_leaderboard_hours(self, since: datetime) -> List[LeaderboardStats]:
+        """Hourly leaderboard rows from the hour holding `since` onwards (to rebuild windows)."""
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT * FROM leaderboard_stats WHERE period >= ? AND period < ?",
+                (rollup_hour(since), ALL_TIME)
+            ).fetchall()
+
+        return [self._mappers["leaderboard_stats"](row) for row in rows]
+
+    def get_leaderboard_top(self, column: str, limit: int = 10) -> List[LeaderboardStats]:
+        """Top all-time leaderboard rows by `column` (wagered, won or best_win), ties by user_id."""
+        if column not in ("wagered", "won", "best_win"):
+            raise ValueError(f"Not a leaderboard column: {column}")
+        with self._connection() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM leaderboard_stats WHERE period = ? AND {column} > 0 "
+                f"ORDER BY {column} DESC, user_id LIMIT ?",
+                (ALL_TIME, limit)
+            ).fetchall()
+
+        return [self._mappers["leaderboard_stats"](row) for row in rows]
+
+    def prune_leaderboard_hours(self, before: datetime) -> int:
+        """Delete hourly leaderboard rows older than the hour holding `before`.
+
+        Returns:
+            Number of rows deleted
+        """
+        cutoff = rollup_hour(before)
+        return self._write(lambda conn: conn.execute(
+            "DELETE FROM leaderboard_stats WHERE period < ?", (cutoff,)
+        ).rowcount)
 
     # === Transaction Operations ===
 
     def save_transaction(self, tx: Transaction):
         """Save transaction."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        params = (
+            tx.tx_id, tx.user_id, tx.tx_type, to_lamports(tx.amount), tx.signature,
+            tx.game_id, tx.timestamp.isoformat()
+        )
+        self._write(lambda conn: conn.execute("""
             INSERT OR REPLACE INTO transactions (
                 tx_id, user_id, tx_type, amount, signature, game_id, timestamp
             ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            tx.tx_id, tx.user_id, tx.tx_type, tx.amount, tx.signature,
-            tx.game_id, tx.timestamp.isoformat()
-        ))
-
-        conn.commit()
-        conn.close()
+        """, params))
 
     def get_user_transactions(self, user_id: int, limit: int = 20) -> List[Transaction]:
         """Get user transaction history."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT * FROM transactions
-            WHERE user_id = ?
-            ORDER BY timestamp DESC
-            LIMIT ?
-        """, (user_id, limit))
+        return self.get_user_transactions_page(user_id, limit=limit)[0]
 
-        rows = cursor.fetchall()
-        conn.close()
+    def get_user_transactions_page(self, user_id: int, limit: int = 20,
+                                   cursor: Optional[str] = None) -> Tuple[List[Transaction], Optional[str]]:
+        """Get one page of a user's transaction history, newest first (archived ones included).
 
-        return [self._row_to_transaction(row) for row in rows]
+        Returns:
+            Tuple of (transactions, next_cursor) - next_cursor is None on the last page
+        """
+        rows, next_cursor = self._keyset_page(
+            "transactions", "timestamp", "tx_id", limit, cursor, {"user_id": user_id}, history=True
+        )
+        return [self._row_to_transaction(row) for row in rows], next_cursor
 
     def _row_to_transaction(self, row: sqlite3.Row) -> Transaction:
         """Convert database row to Transaction object."""
-        return Transaction(
-            tx_id=row["tx_id"],
-            user_id=row["user_id"],
-            tx_type=row["tx_type"],
-            amount=row["amount"],
-            signature=row["signature"],
-            game_id=row["game_id"],
-            timestamp=datetime.fromisoformat(row["timestamp"]) if row["timestamp"] else datetime.utcnow(),
-        )
+        return self._mappers["transactions"](row)
+
+    # === Archival ===
+
+    def archive_settled(self, before: datetime, batch_size: int = ARCHIVE_BATCH_SIZE) -> Dict[str, int]:
+        """Move settled games, wagers and transactions older than `before` to the archive.
+
+        Keeps the hot tables (open wagers, sweeps, admin scans) small;
+        history and proof lookups read both databases. Each batch is one
+        write job that copies its rows into the archive and deletes them
+        here. A row saved again after it was archived (an admin edit) is
+        moved again by the next run, replacing its archived copy.
+
+        Returns:
+            {table: rows archived} - empty if no archive is attached
+        """
+        if not self._archived:
+            return {}
+
+        cutoff = before.isoformat()
+        archived = {}
+        for table, (key, settled) in ARCHIVE_TABLES.items():
+            columns = ", ".join(self._mappers[table].columns)
+
+            def write(conn: sqlite3.Connection, table=table, key=key, settled=settled, columns=columns) -> int:
+                keys = [row[0] for row in conn.execute(
+                    f"SELECT {key} FROM main.{table} WHERE {settled} LIMIT ?", (cutoff, batch_size)
+                )]
+                if keys:
+                    marks = ", ".join("?" for _ in keys)
+                    conn.execute(f"""
+                        INSERT OR REPLACE INTO archive.{table} ({columns})
+                        SELECT {columns} FROM main.{table} WHERE {key} IN ({marks})
+                    """, keys)
+                    conn.execute(f"DELETE FROM main.{table} WHERE {key} IN ({marks})", keys)
+                return len(keys)
+
+            archived[table] = 0
+            while True:
+                moved = self._write(write)
+                archived[table] += moved
+                if moved < batch_size:
+                    break
+
+        if any(archived.values()):
+            logger.info(f"Archived settled rows older than {cutoff}: {archived}")
+        return archived
 
     # === Used Signature Operations (SECURITY) ===
 
-    def save_used_signature(self, sig: 'UsedSignature'):
-        """Mark a transaction signature as used (prevent reuse attacks)."""
-        from .models import UsedSignature
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def save_used_signature(self, sig: UsedSignature):
+        """Mark a transaction signature as used (prevent reuse attacks).
 
-        cursor.execute("""
+        Prefer claim_signature(), which also reports an earlier claim.
+        """
+        params = (sig.signature, sig.user_wallet, sig.used_for, sig.used_at.isoformat())
+        self._write(lambda conn: conn.execute("""
             INSERT OR IGNORE INTO used_signatures (
                 signature, user_wallet, used_for, used_at
             ) VALUES (?, ?, ?, ?)
-        """, (
-            sig.signature, sig.user_wallet, sig.used_for, sig.used_at.isoformat()
-        ))
+        """, params))
 
-        conn.commit()
-        conn.close()
+    def claim_signature(self, sig: UsedSignature) -> Optional[UsedSignature]:
+        """Atomically mark a transaction signature as used, unless it already is.
+
+        One INSERT ... ON CONFLICT DO NOTHING, so two requests racing with
+        the same signature can never both claim it. Recently used
+        signatures are rejected from memory without touching the database.
+
+        Returns:
+            None if this call claimed the signature, otherwise the existing
+            claim (who used it, for what and when)
+        """
+        cached = self._signatures.get(sig.signature)
+        if cached is not None:
+            return copy.copy(cached)
+
+        params = (sig.signature, sig.user_wallet, sig.used_for, sig.used_at.isoformat())
+
+        def write(conn: sqlite3.Connection) -> Optional[sqlite3.Row]:
+            claimed = conn.execute("""
+                INSERT INTO used_signatures (
+                    signature, user_wallet, used_for, used_at
+                ) VALUES (?, ?, ?, ?)
+                ON CONFLICT(signature) DO NOTHING
+            """, params).rowcount
+            if claimed:
+                return None
+            return conn.execute(
+                "SELECT * FROM used_signatures WHERE signature = ?", (sig.signature,)
+            ).fetchone()
+
+        row = self._write(write)
+        existing = self._mappers["used_signatures"](row) if row else None
+        self._signatures.put(sig.signature, copy.copy(existing or sig))
+        return existing
 
     def signature_already_used(self, signature: str) -> bool:
         """Check if a transaction signature has already been used."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        if self._signatures.get(signature) is not None:
+            return True
+
+        with self._connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("""
-            SELECT signature FROM used_signatures WHERE signature = ?
-        """, (signature,))
+            cursor.execute("""
+                SELECT signature FROM used_signatures WHERE signature = ?
+            """, (signature,))
 
-        result = cursor.fetchone()
-        conn.close()
+            result = cursor.fetchone()
 
         return result is not None
 
-    def get_used_signature(self, signature: str) -> Optional['UsedSignature']:
-        """Get used signature details."""
-        from .models import UsedSignature
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+    def get_used_signature(self, signature: str) -> Optional[UsedSignature]:
+        """Get used signature details (None if the signature is unused)."""
+        cached = self._signatures.get(signature)
+        if cached is not None:
+            return copy.copy(cached)
+
+        with self._connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("""
-            SELECT * FROM used_signatures WHERE signature = ?
-        """, (signature,))
+            cursor.execute("""
+                SELECT * FROM used_signatures WHERE signature = ?
+            """, (signature,))
 
-        row = cursor.fetchone()
-        conn.close()
+            row = cursor.fetchone()
 
         if not row:
             return None
 
-        return UsedSignature(
-            signature=row["signature"],
-            user_wallet=row["user_wallet"],
-            used_for=row["used_for"],
-            used_at=datetime.fromisoformat(row["used_at"]) if row["used_at"] else datetime.utcnow(),
-        )
+        used = self._mappers["used_signatures"](row)
+        self._signatures.put(signature, copy.copy(used))
+        return used
 
     # === Atomic Operations (SECURITY: Prevent race conditions) ===
 
     def atomic_accept_wager(self, wager_id: str, acceptor_id: int) -> bool:
         """Atomically accept wager if still open.
 
-        SECURITY: Prevents double-acceptance race condition by using
-        exclusive database lock.
+        SECURITY: Prevents double-acceptance race condition. The status
+        check and update are one statement, run by the single writer, so
+        exactly one concurrent acceptor can win.
 
         Args:
             wager_id: Wager ID to accept
@@ -825,72 +1117,47 @@ class Database:
         Returns:
             True if wager was accepted successfully, False if already accepted
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
         try:
-            # Begin exclusive transaction (locks database)
-            cursor.execute("BEGIN EXCLUSIVE")
-
             # Check and update in single atomic operation
-            cursor.execute("""
+            rowcount = self._write(lambda conn: conn.execute("""
                 UPDATE wagers
                 SET status = 'accepting', acceptor_id = ?
                 WHERE wager_id = ? AND status = 'open'
-            """, (acceptor_id, wager_id))
-
-            # Check if update succeeded
-            if cursor.rowcount == 0:
-                # Wager not open (already accepted or doesn't exist)
-                conn.rollback()
-                conn.close()
-                return False
-
-            # Success - commit transaction
-            conn.commit()
-            conn.close()
-            return True
-
+            """, (acceptor_id, wager_id)).rowcount)
         except Exception as e:
             logger.error(f"Atomic accept failed: {e}", exc_info=True)
-            conn.rollback()
-            conn.close()
             raise
 
+        # rowcount 0: wager not open (already accepted or doesn't exist)
+        return rowcount > 0
+
     # === Support Ticket Operations ===
 
     def save_ticket(self, ticket: SupportTicket) -> str:
         """Save a support ticket."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT OR REPLACE INTO support_tickets (
-                ticket_id, user_id, email, ticket_type, subject, message,
-                status, admin_notes, created_at, resolved_at, resolved_by
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+        params = (
             ticket.ticket_id, ticket.user_id, ticket.email.lower(),
             ticket.ticket_type, ticket.subject, ticket.message,
             ticket.status, ticket.admin_notes,
             ticket.created_at.isoformat(),
             ticket.resolved_at.isoformat() if ticket.resolved_at else None,
             ticket.resolved_by
-        ))
-
-        conn.commit()
-        conn.close()
+        )
+        self._write(lambda conn: conn.execute("""
+            INSERT OR REPLACE INTO support_tickets (
+                ticket_id, user_id, email, ticket_type, subject, message,
+                status, admin_notes, created_at, resolved_at, resolved_by
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, params))
         return ticket.ticket_id
 
     def get_ticket(self, ticket_id: str) -> Optional[SupportTicket]:
         """Get ticket by ID."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        with self._connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM support_tickets WHERE ticket_id = ?", (ticket_id,))
-        row = cursor.fetchone()
-        conn.close()
+            cursor.execute("SELECT * FROM support_tickets WHERE ticket_id = ?", (ticket_id,))
+            row = cursor.fetchone()
 
         if not row:
             return None
@@ -900,105 +1167,113 @@ class Database:
     def get_tickets(self, status: Optional[str] = None, ticket_type: Optional[str] = None,
                    limit: int = 50) -> List[SupportTicket]:
         """Get tickets with optional filters."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        with self._connection() as conn:
+            cursor = conn.cursor()
 
-        query = "SELECT * FROM support_tickets WHERE 1=1"
-        params = []
+            query = "SELECT * FROM support_tickets WHERE 1=1"
+            params = []
 
-        if status:
-            query += " AND status = ?"
-            params.append(status)
-        if ticket_type:
-            query += " AND ticket_type = ?"
-            params.append(ticket_type)
+            if status:
+                query += " AND status = ?"
+                params.append(status)
+            if ticket_type:
+                query += " AND ticket_type = ?"
+                params.append(ticket_type)
 
-        query += " ORDER BY created_at DESC LIMIT ?"
-        params.append(limit)
+            query += " ORDER BY created_at DESC LIMIT ?"
+            params.append(limit)
 
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        conn.close()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
 
         return [self._row_to_ticket(row) for row in rows]
 
+    def get_tickets_page(self, status: Optional[str] = None, ticket_type: Optional[str] = None,
+                         limit: int = 50, cursor: Optional[str] = None) -> Tuple[List[SupportTicket], Optional[str]]:
+        """Get one page of tickets, newest first, with optional filters.
+
+        Returns:
+            Tuple of (tickets, next_cursor) - next_cursor is None on the last page
+        """
+        rows, next_cursor = self._keyset_page(
+            "support_tickets", "created_at", "ticket_id", limit, cursor,
+            {"status": status, "ticket_type": ticket_type}
+        )
+        return [self._row_to_ticket(row) for row in rows], next_cursor
+
     def _row_to_ticket(self, row: sqlite3.Row) -> SupportTicket:
         """Convert database row to SupportTicket object."""
-        return SupportTicket(
-            ticket_id=row["ticket_id"],
-            user_id=row["user_id"],
-            email=row["email"],
-            ticket_type=row["ticket_type"],
-            subject=row["subject"],
-            message=row["message"],
-            status=row["status"],
-            admin_notes=row["admin_notes"],
-            created_at=datetime.fromisoformat(row["created_at"]) if row["created_at"] else datetime.utcnow(),
-            resolved_at=datetime.fromisoformat(row["resolved_at"]) if row["resolved_at"] else None,
-            resolved_by=row["resolved_by"],
-        )
+        return self._mappers["support_tickets"](row)
 
     # === Admin Operations ===
 
-    def get_all_users(self, limit: int = 100, offset: int = 0) -> List[User]:
-        """Get all users for admin panel."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+    def get_users_page(self, limit: int = 50,
+                       cursor: Optional[str] = None) -> Tuple[List[User], Optional[str]]:
+        """Get one page of users for admin panel, newest first.
 
-        cursor.execute("""
-            SELECT * FROM users
-            ORDER BY created_at DESC
-            LIMIT ? OFFSET ?
-        """, (limit, offset))
-
-        rows = cursor.fetchall()
-        conn.close()
-
-        return [self._row_to_user(row) for row in rows]
+        Returns:
+            Tuple of (users, next_cursor) - next_cursor is None on the last page
+        """
+        rows, next_cursor = self._keyset_page("users", "created_at", "user_id", limit, cursor)
+        return [self._row_to_user(row) for row in rows], next_cursor
 
     def get_user_count(self) -> int:
         """Get total user count."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("SELECT COUNT(*) FROM users")
-        count = cursor.fetchone()[0]
-        conn.close()
+            cursor.execute("SELECT COUNT(*) FROM users")
+            count = cursor.fetchone()[0]
 
         return count
 
     def get_ticket_count(self, status: Optional[str] = None) -> int:
         """Get ticket count with optional status filter."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._connection() as conn:
+            cursor = conn.cursor()
 
-        if status:
-            cursor.execute("SELECT COUNT(*) FROM support_tickets WHERE status = ?", (status,))
-        else:
-            cursor.execute("SELECT COUNT(*) FROM support_tickets")
+            if status:
+                cursor.execute("SELECT COUNT(*) FROM support_tickets WHERE status = ?", (status,))
+            else:
+                cursor.execute("SELECT COUNT(*) FROM support_tickets")
 
-        count = cursor.fetchone()[0]
-        conn.close()
+            count = cursor.fetchone()[0]
 
         return count
 
     def search_users(self, query: str, limit: int = 20) -> List[User]:
-        """Search users by email or username."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        search_term = f"%{query}%"
-        cursor.execute("""
-            SELECT * FROM users
-            WHERE email LIKE ? OR username LIKE ? OR display_name LIKE ?
-            ORDER BY created_at DESC
-            LIMIT ?
-        """, (search_term, search_term, search_term, limit))
-
-        rows = cursor.fetchall()
-        conn.close()
+        """Search users by email, username, display name or wallet address.
+
+        Uses the trigram FTS index (any substring of 3+ characters),
+        best matches first. Shorter queries fall back to a LIKE scan
+        (newest first, stopping after `limit` matches).
+        """
+        if self._fts_enabled and len(query) >= 3:
+            # Quote as a single FTS phrase so user input is never parsed as syntax
+            phrase = '"' + query.replace('"', '""') + '"'
+            with self._connection() as conn:
+                rows = conn.execute("""
+                    SELECT users.* FROM users_fts
+                    JOIN users ON users.user_id = users_fts.rowid
+                    WHERE users_fts MATCH ?
+                    ORDER BY users_fts.rank
+                    LIMIT ?
+                """, (phrase, limit)).fetchall()
+
+            return [self._row_to_user(row) for row in rows]
+
+        with self._connection() as conn:
+            cursor = conn.cursor()
+
+            search_term = f"%{query}%"
+            cursor.execute("""
+                SELECT * FROM users
+                WHERE email LIKE ? OR username LIKE ? OR display_name LIKE ?
+                   OR connected_wallet LIKE ? OR payout_wallet LIKE ?
+                ORDER BY created_at DESC
+                LIMIT ?
+            """, (search_term, search_term, search_term, search_term, search_term, limit))
+
+            rows = cursor.fetchall()
 
         return [self._row_to_user(row) for row in rows]
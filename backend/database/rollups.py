@@ -0,0 +1,186 @@
+"""
+Daily rollups of settled games for Coinflip stats.
+
+Settlement adds each game to a few small tables in the same write that
+records it, so dashboards read a handful of pre-aggregated rows instead of
+scanning `games` and `users`:
+
+    daily_stats        one row per UTC day: games, volume, fees, payouts, unique players
+    daily_user_stats   one row per (day, user): games, wins, wagered, won, lost
+    daily_tier_stats   one row per (day, winner's tier): games, volume, fees
+    leaderboard_stats  one row per (hour, user) and per ('all', user):
+                       wagered, won and best single win - the durable side
+                       of the in-memory leaderboards
+
+All amounts are INTEGER lamports. `fees` is the revenue the platform
+kept: the pot minus the winner's payout and any referral commission.
+"""
+import sqlite3
+from datetime import datetime
+from typing import Iterable
+
+ROLLUP_TABLES_SQL = (
+    """
+    CREATE TABLE IF NOT EXISTS daily_stats (
+        day TEXT PRIMARY KEY,
+        games INTEGER NOT NULL DEFAULT 0,
+        volume INTEGER NOT NULL DEFAULT 0,
+        fees INTEGER NOT NULL DEFAULT 0,
+        payouts INTEGER NOT NULL DEFAULT 0,
+        players INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS daily_user_stats (
+        day TEXT NOT NULL,
+        user_id INTEGER NOT NULL,
+        games INTEGER NOT NULL DEFAULT 0,
+        games_won INTEGER NOT NULL DEFAULT 0,
+        wagered INTEGER NOT NULL DEFAULT 0,
+        won INTEGER NOT NULL DEFAULT 0,
+        lost INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, user_id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS daily_tier_stats (
+        day TEXT NOT NULL,
+        tier TEXT NOT NULL,
+        games INTEGER NOT NULL DEFAULT 0,
+        volume INTEGER NOT NULL DEFAULT 0,
+        fees INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, tier)
+    ) WITHOUT ROWID
+    """,
+)
+
+LEADERBOARD_TABLE_SQL = (
+    """
+    CREATE TABLE IF NOT EXISTS leaderboard_stats (
+        period TEXT NOT NULL,
+        user_id INTEGER NOT NULL,
+        wagered INTEGER NOT NULL DEFAULT 0,
+        won INTEGER NOT NULL DEFAULT 0,
+        best_win INTEGER NOT NULL DEFAULT 0,
+        best_game_id TEXT,
+        PRIMARY KEY (period, user_id)
+    ) WITHOUT ROWID
+    """,
+    # All-time top-K reads (period = 'all')
+    "CREATE INDEX IF NOT EXISTS idx_leaderboard_won ON leaderboard_stats(period, won)",
+    "CREATE INDEX IF NOT EXISTS idx_leaderboard_wagered ON leaderboard_stats(period, wagered)",
+    "CREATE INDEX IF NOT EXISTS idx_leaderboard_best_win ON leaderboard_stats(period, best_win)",
+)
+
+# leaderboard_stats.period of the all-time rows (sorts after every hour key)
+ALL_TIME = "all"
+
+_ADD_PLAYER_DAY_SQL = "INSERT OR IGNORE INTO daily_user_stats (day, user_id) VALUES (?, ?)"
+
+_INCREMENT_USER_DAY_SQL = """
+    UPDATE daily_user_stats SET
+        games = games + 1,
+        games_won = games_won + ?,
+        wagered = wagered + ?,
+        won = won + ?,
+        lost = lost + ?
+    WHERE day = ? AND user_id = ?
+"""
+
+_INCREMENT_DAY_SQL = """
+    INSERT INTO daily_stats (day, games, volume, fees, payouts, players) VALUES (?, 1, ?, ?, ?, ?)
+    ON CONFLICT(day) DO UPDATE SET
+        games = games + 1,
+        volume = volume + excluded.volume,
+        fees = fees + excluded.fees,
+        payouts = payouts + excluded.payouts,
+        players = players + excluded.players
+"""
+
+_INCREMENT_TIER_DAY_SQL = """
+    INSERT INTO daily_tier_stats (day, tier, games, volume, fees) VALUES (?, ?, 1, ?, ?)
+    ON CONFLICT(day, tier) DO UPDATE SET
+        games = games + 1,
+        volume = volume + excluded.volume,
+        fees = fees + excluded.fees
+"""
+
+
+# SET expressions all see the row's old values, so best_game_id compares against the old best_win
+_INCREMENT_LEADERBOARD_SQL = """
+    INSERT INTO leaderboard_stats (period, user_id, wagered, won, best_win, best_game_id)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(period, user_id) DO UPDATE SET
+        wagered = wagered + excluded.wagered,
+        won = won + excluded.won,
+        best_game_id = CASE WHEN excluded.best_win > best_win THEN excluded.best_game_id ELSE best_game_id END,
+        best_win = MAX(best_win, excluded.best_win)
+"""
+
+
+def rollup_day(moment: datetime) -> str:
+    """Rollup key of a settlement time (its UTC date, YYYY-MM-DD)."""
+    return moment.strftime("%Y-%m-%d")
+
+
+def rollup_hour(moment: datetime) -> str:
+    """Hourly leaderboard key of a settlement time (YYYY-MM-DDTHH, UTC)."""
+    return moment.strftime("%Y-%m-%dT%H")
+
+
+def add_game(conn: sqlite3.Connection, day: str, player_ids: Iterable[int], winner_id: int,
+             amount: int, payout: int, fee: int, winner_tier: str):
+    """Add one settled game to the daily rollups.
+
+    Must run inside the write that records the game, so the rollups
+    commit (or roll back) with it.
+
+    Args:
+        day: rollup_day() of the settlement
+        player_ids: Every player, each of whom staked `amount`
+        winner_id: Winning player
+        amount: Stake per player (lamports)
+        payout: Credited to the winner (lamports)
+        fee: Fee revenue kept, net of referral commission (lamports)
+        winner_tier: Winner's tier when the game was played, which set the fee rate
+    """
+    new_players = 0
+    volume = 0
+    for player_id in player_ids:
+        won = player_id == winner_id
+        # A player's first game of the day creates their row
+        new_players += conn.execute(_ADD_PLAYER_DAY_SQL, (day, player_id)).rowcount
+        conn.execute(_INCREMENT_USER_DAY_SQL, (
+            1 if won else 0,
+            amount,
+            payout if won else 0,
+            0 if won else amount,
+            day, player_id
+        ))
+        volume += amount
+
+    conn.execute(_INCREMENT_DAY_SQL, (day, volume, fee, payout, new_players))
+    conn.execute(_INCREMENT_TIER_DAY_SQL, (day, winner_tier, volume, fee))
+
+
+def add_game_to_leaderboards(conn: sqlite3.Connection, periods: Iterable[str], game_id: str,
+                             player_ids: Iterable[int], winner_id: int, amount: int, payout: int):
+    """Add one settled game to the leaderboard rollups of each period.
+
+    Args:
+        periods: rollup_hour() of the settlement and/or ALL_TIME
+        game_id: Settled game (recorded as the winner's best win if it is one)
+        player_ids: Every player, each of whom staked `amount`
+        winner_id: Winning player
+        amount: Stake per player (lamports)
+        payout: Credited to the winner (lamports)
+    """
+    for period in periods:
+        for player_id in player_ids:
+            won = player_id == winner_id
+            conn.execute(_INCREMENT_LEADERBOARD_SQL, (
+                period, player_id, amount,
+                payout if won else 0,
+                payout if won else 0,
+                game_id if won else None
+            ))
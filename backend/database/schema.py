@@ -0,0 +1,492 @@
+"""
+Core Coinflip schema, as an ordered list of migrations.
+
+Append new steps at the end with the next version number - never edit a
+step that has shipped, since databases that already ran it will not run
+it again.
+"""
+import re
+import sqlite3
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+
+from money import LAMPORTS_PER_SOL, split_fee
+
+from .migrations import MigrationRegistry
+from . import rollups
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = MigrationRegistry("coinflip")
+
+# Columns indexed by the users_fts full-text search table
+USER_SEARCH_COLUMNS = ("email", "username", "display_name", "connected_wallet", "payout_wallet")
+
+# Money columns, stored as INTEGER lamports (models keep SOL floats)
+LAMPORT_COLUMNS = {
+    "users": ("total_wagered", "total_won", "total_lost",
+              "referral_earnings", "pending_referral_earnings", "total_referral_claimed"),
+    "games": ("amount",),
+    "wagers": ("amount",),
+    "transactions": ("amount",),
+    "daily_stats": ("volume", "fees", "payouts"),
+    "daily_user_stats": ("wagered", "won", "lost"),
+    "daily_tier_stats": ("volume", "fees"),
+    "leaderboard_stats": ("wagered", "won", "best_win"),
+}
+
+# Settled history moved from the hot tables into the attached `archive`
+# database: table -> (primary key, filter selecting settled rows older than ?)
+ARCHIVE_TABLES = {
+    "games": ("game_id", "status IN ('completed', 'cancelled') AND completed_at < ?"),
+    "wagers": ("wager_id", "status IN ('accepted', 'cancelled', 'refunded') AND created_at < ?"),
+    "transactions": ("tx_id", "timestamp < ?"),
+}
+
+# History lookups served from the archive (same shape as their hot-table indexes)
+_ARCHIVE_INDEXES = {
+    "games": ("player1_id, created_at, game_id", "player2_id, created_at, game_id"),
+    "wagers": ("creator_id, created_at, wager_id",),
+    "transactions": ("user_id, timestamp, tx_id",),
+}
+
+
+def session_token_hash(token: str) -> str:
+    """Key of a session in the sessions table (raw tokens are never stored)."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def to_epoch(value: datetime) -> int:
+    """Naive UTC datetime -> integer epoch seconds."""
+    return int(value.replace(tzinfo=timezone.utc).timestamp())
+
+
+def _add_missing_columns(cursor: sqlite3.Cursor, table: str, columns: list):
+    """ALTER TABLE ADD COLUMN for each (name, type) the table doesn't have yet."""
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    for col_name, col_type in columns:
+        if col_name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {col_name} {col_type}")
+            logger.info(f"Migration: Added column '{col_name}' to {table} table")
+
+
+def _retype_as_lamports(cursor: sqlite3.Cursor, table: str, columns: tuple):
+    """Rebuild `table` with REAL SOL `columns` as INTEGER lamports.
+
+    SQLite can't change a column's type in place, so this follows the
+    documented rebuild: create the new table from the old definition,
+    copy the rows across (converting), swap the tables and recreate the
+    old table's indexes and triggers.
+    """
+    types = {row[1]: row[2].upper() for row in cursor.execute(f"PRAGMA table_info({table})")}
+    if all(types.get(col) != "REAL" for col in columns):
+        return  # Already converted
+
+    create_sql, = cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    dependents = [row[0] for row in cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL",
+        (table,)
+    )]
+
+    new_table = f"{table}_lamports"
+    create_sql = re.sub(rf"^CREATE TABLE\s+(IF NOT EXISTS\s+)?\"?{table}\"?", f"CREATE TABLE {new_table}", create_sql)
+    for col in columns:
+        create_sql, count = re.subn(rf"(\b{col}\s+)REAL\b", r"\1INTEGER", create_sql)
+        if count != 1:
+            raise sqlite3.OperationalError(f"Can't find REAL column {table}.{col} to convert")
+    cursor.execute(create_sql)
+
+    select = ", ".join(
+        f"CAST(ROUND({col} * {LAMPORTS_PER_SOL}) AS INTEGER)" if col in columns else col
+        for col in types
+    )
+    cursor.execute(f"INSERT INTO {new_table} ({', '.join(types)}) SELECT {select} FROM {table}")
+    cursor.execute(f"DROP TABLE {table}")
+    cursor.execute(f"ALTER TABLE {new_table} RENAME TO {table}")
+    for sql in dependents:
+        cursor.execute(sql)
+
+
+@SCHEMA.migration(1, "Create core tables")
+def _create_tables(cursor: sqlite3.Cursor):
+    # Users table with authentication
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            platform TEXT NOT NULL DEFAULT 'web',
+            email TEXT UNIQUE,
+            password_hash TEXT,
+            email_verified INTEGER DEFAULT 0,
+            wallet_address TEXT,
+            encrypted_secret TEXT,
+            connected_wallet TEXT,
+            payout_wallet TEXT,
+            games_played INTEGER DEFAULT 0,
+            games_won INTEGER DEFAULT 0,
+            total_wagered REAL DEFAULT 0.0,
+            total_won REAL DEFAULT 0.0,
+            total_lost REAL DEFAULT 0.0,
+            tier TEXT DEFAULT 'Starter',
+            tier_fee_rate REAL DEFAULT 0.02,
+            referral_code TEXT UNIQUE,
+            referred_by INTEGER,
+            referral_earnings REAL DEFAULT 0.0,
+            pending_referral_earnings REAL DEFAULT 0.0,
+            total_referrals INTEGER DEFAULT 0,
+            referral_payout_escrow_address TEXT,
+            referral_payout_escrow_secret TEXT,
+            total_referral_claimed REAL DEFAULT 0.0,
+            username TEXT UNIQUE,
+            display_name TEXT,
+            created_at TEXT,
+            last_active TEXT,
+            last_login TEXT,
+            session_token TEXT,
+            session_expires TEXT,
+            is_admin INTEGER DEFAULT 0
+        )
+    """)
+
+    # Support tickets table (for contact support and password resets)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS support_tickets (
+            ticket_id TEXT PRIMARY KEY,
+            user_id INTEGER,
+            email TEXT NOT NULL,
+            ticket_type TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            message TEXT NOT NULL,
+            status TEXT DEFAULT 'open',
+            admin_notes TEXT,
+            created_at TEXT,
+            resolved_at TEXT,
+            resolved_by INTEGER,
+            FOREIGN KEY (user_id) REFERENCES users(user_id),
+            FOREIGN KEY (resolved_by) REFERENCES users(user_id)
+        )
+    """)
+
+    # Games table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS games (
+            game_id TEXT PRIMARY KEY,
+            game_type TEXT NOT NULL,
+            player1_id INTEGER NOT NULL,
+            player1_side TEXT NOT NULL,
+            player1_wallet TEXT NOT NULL,
+            player2_id INTEGER,
+            player2_side TEXT,
+            player2_wallet TEXT,
+            amount REAL NOT NULL,
+            status TEXT NOT NULL,
+            result TEXT,
+            winner_id INTEGER,
+            blockhash TEXT,
+            deposit_tx TEXT,
+            payout_tx TEXT,
+            fee_tx TEXT,
+            created_at TEXT,
+            completed_at TEXT,
+            FOREIGN KEY (player1_id) REFERENCES users(user_id),
+            FOREIGN KEY (player2_id) REFERENCES users(user_id)
+        )
+    """)
+
+    # Wagers table (with isolated escrow wallets for security)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS wagers (
+            wager_id TEXT PRIMARY KEY,
+            creator_id INTEGER NOT NULL,
+            creator_wallet TEXT NOT NULL,
+            creator_side TEXT NOT NULL,
+            amount REAL NOT NULL,
+            status TEXT DEFAULT 'open',
+            creator_escrow_address TEXT,
+            creator_escrow_secret TEXT,
+            creator_deposit_tx TEXT,
+            acceptor_id INTEGER,
+            acceptor_wallet TEXT,
+            acceptor_escrow_address TEXT,
+            acceptor_escrow_secret TEXT,
+            acceptor_deposit_tx TEXT,
+            game_id TEXT,
+            created_at TEXT,
+            expires_at TEXT,
+            FOREIGN KEY (creator_id) REFERENCES users(user_id),
+            FOREIGN KEY (game_id) REFERENCES games(game_id)
+        )
+    """)
+
+    # Transactions table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS transactions (
+            tx_id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            tx_type TEXT NOT NULL,
+            amount REAL NOT NULL,
+            signature TEXT NOT NULL,
+            game_id TEXT,
+            timestamp TEXT,
+            FOREIGN KEY (user_id) REFERENCES users(user_id),
+            FOREIGN KEY (game_id) REFERENCES games(game_id)
+        )
+    """)
+
+    # Used signatures table (SECURITY: Prevent signature reuse)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS used_signatures (
+            signature TEXT PRIMARY KEY,
+            user_wallet TEXT NOT NULL,
+            used_for TEXT NOT NULL,
+            used_at TEXT NOT NULL
+        )
+    """)
+
+
+@SCHEMA.migration(2, "Add auth, profile and referral columns to pre-existing tables")
+def _add_legacy_columns(cursor: sqlite3.Cursor):
+    # Databases from before these features have the tables without the columns
+    _add_missing_columns(cursor, "users", [
+        # Auth columns
+        ("email", "TEXT"),
+        ("password_hash", "TEXT"),
+        ("email_verified", "INTEGER DEFAULT 0"),
+        ("username", "TEXT"),
+        ("display_name", "TEXT"),
+        ("session_token", "TEXT"),
+        ("session_expires", "TEXT"),
+        ("last_login", "TEXT"),
+        ("is_admin", "INTEGER DEFAULT 0"),
+        # Profile columns
+        ("payout_wallet", "TEXT"),
+        ("tier", "TEXT DEFAULT 'Starter'"),
+        ("tier_fee_rate", "REAL DEFAULT 0.02"),
+        # Referral columns
+        ("referral_code", "TEXT"),
+        ("referred_by", "INTEGER"),
+        ("referral_earnings", "REAL DEFAULT 0.0"),
+        ("pending_referral_earnings", "REAL DEFAULT 0.0"),
+        ("total_referrals", "INTEGER DEFAULT 0"),
+        ("referral_payout_escrow_address", "TEXT"),
+        ("referral_payout_escrow_secret", "TEXT"),
+        ("total_referral_claimed", "REAL DEFAULT 0.0"),
+    ])
+    _add_missing_columns(cursor, "wagers", [
+        ("acceptor_wallet", "TEXT"),
+    ])
+
+
+@SCHEMA.migration(3, "Indexes for lookups and keyset pagination")
+def _create_indexes(cursor: sqlite3.Cursor):
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_games_player1_created ON games(player1_id, created_at, game_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_games_player2_created ON games(player2_id, created_at, game_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_games_status_completed ON games(status, completed_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_wagers_status_created ON wagers(status, created_at, wager_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_wagers_created ON wagers(created_at, wager_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_wagers_creator_created ON wagers(creator_id, created_at, wager_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_user_time ON transactions(user_id, timestamp, tx_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_used_signatures_wallet ON used_signatures(user_wallet)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_connected_wallet ON users(connected_wallet)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_payout_wallet ON users(payout_wallet)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_created ON users(created_at, user_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_session ON users(session_token)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_referral_code ON users(referral_code)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_is_admin ON users(is_admin)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tickets_status_created ON support_tickets(status, created_at, ticket_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tickets_type_created ON support_tickets(ticket_type, created_at, ticket_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tickets_created ON support_tickets(created_at, ticket_id)")
+
+    # Superseded by the composite indexes above
+    for old_index in ("idx_games_status", "idx_games_player1", "idx_games_player2", "idx_wagers_status",
+                      "idx_wagers_creator", "idx_transactions_user", "idx_tickets_status", "idx_tickets_type"):
+        cursor.execute(f"DROP INDEX IF EXISTS {old_index}")
+
+
+@SCHEMA.migration(4, "users_fts trigram search index")
+def _create_user_search(cursor: sqlite3.Cursor):
+    columns = ", ".join(USER_SEARCH_COLUMNS)
+    try:
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+                {columns},
+                content='users', content_rowid='user_id', tokenize='trigram'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        # Search falls back to LIKE (see Database.search_users)
+        logger.warning(f"FTS5 trigram search unavailable, user search falls back to LIKE: {e}")
+        return
+
+    new_values = ", ".join(f"new.{col}" for col in USER_SEARCH_COLUMNS)
+    old_values = ", ".join(f"old.{col}" for col in USER_SEARCH_COLUMNS)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users BEGIN
+            INSERT INTO users_fts(rowid, {columns}) VALUES (new.user_id, {new_values});
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users BEGIN
+            INSERT INTO users_fts(users_fts, rowid, {columns}) VALUES ('delete', old.user_id, {old_values});
+        END
+    """)
+    # Only searchable columns re-index - stats updates never touch the FTS index
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS users_fts_update AFTER UPDATE OF {columns} ON users BEGIN
+            INSERT INTO users_fts(users_fts, rowid, {columns}) VALUES ('delete', old.user_id, {old_values});
+            INSERT INTO users_fts(rowid, {columns}) VALUES (new.user_id, {new_values});
+        END
+    """)
+
+    # Index users that existed before the FTS table
+    cursor.execute("INSERT INTO users_fts(users_fts) VALUES ('rebuild')")
+
+
+@SCHEMA.migration(5, "Persist wager accepting_at for the accept timeout sweeper")
+def _add_wager_accepting_at(cursor: sqlite3.Cursor):
+    # The sweeper filters on status = 'open' first (idx_wagers_status_created), and
+    # open wagers are few, so accepting_at needs no index of its own
+    _add_missing_columns(cursor, "wagers", [
+        ("accepting_at", "TEXT"),
+    ])
+
+
+@SCHEMA.migration(6, "Move sessions from users into a multi-device sessions table")
+def _create_sessions(cursor: sqlite3.Cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            token_hash TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            created_at INTEGER NOT NULL,
+            expires_at INTEGER NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user_id)")
+
+    # Carry over each user's live single-device session, then retire the columns
+    now = datetime.utcnow()
+    cursor.execute("""
+        SELECT user_id, session_token, session_expires FROM users
+        WHERE session_token IS NOT NULL AND session_expires > ?
+    """, (now.isoformat(),))
+    cursor.executemany(
+        "INSERT OR IGNORE INTO sessions (token_hash, user_id, created_at, expires_at) VALUES (?, ?, ?, ?)",
+        [
+            (session_token_hash(token), user_id, to_epoch(now), to_epoch(datetime.fromisoformat(expires)))
+            for user_id, token, expires in cursor.fetchall()
+        ]
+    )
+    cursor.execute("UPDATE users SET session_token = NULL, session_expires = NULL WHERE session_token IS NOT NULL")
+    cursor.execute("DROP INDEX IF EXISTS idx_users_session")
+
+
+@SCHEMA.migration(7, "Store money columns as integer lamports")
+def _store_lamports(cursor: sqlite3.Cursor):
+    for table, columns in LAMPORT_COLUMNS.items():
+        _retype_as_lamports(cursor, table, columns)
+
+
+@SCHEMA.migration(8, "Index transactions by time for archival")
+def _index_transactions_time(cursor: sqlite3.Cursor):
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_time ON transactions(timestamp)")
+
+
+@SCHEMA.migration(9, "Daily rollup tables for stats")
+def _create_daily_rollups(cursor: sqlite3.Cursor):
+    """Create the daily rollups and backfill them from settled games.
+
+    The backfill is approximate: settlement never recorded what a game
+    actually paid, so every past game is booked as if the winner paid the
+    flat 2% base fee with no referral commission, under the winner's
+    current tier. Historic fees of discounted (non-Starter or token
+    holder) winners are overstated, as is revenue shared with referrers.
+    Games settled after this migration record their real payout and fee.
+    """
+    for create_sql in rollups.ROLLUP_TABLES_SQL:
+        cursor.execute(create_sql)
+
+    # Backfill from settled PVP games, hot and archived (see above for the limits)
+    sources = ["main.games"]
+    if cursor.execute("SELECT 1 FROM pragma_database_list WHERE name = 'archive'").fetchone() and \
+            cursor.execute("SELECT 1 FROM archive.sqlite_master WHERE name = 'games'").fetchone():
+        sources.append("archive.games")
+    games = cursor.execute(" UNION ".join(
+        f"""SELECT game_id, completed_at, player1_id, player2_id, winner_id, amount FROM {source}
+            WHERE status = 'completed' AND player2_id IS NOT NULL AND completed_at IS NOT NULL"""
+        for source in sources
+    )).fetchall()
+    if not games:
+        return
+
+    tiers = dict(cursor.execute("SELECT user_id, tier FROM users").fetchall())
+    conn = cursor.connection
+    for _, completed_at, player1_id, player2_id, winner_id, amount in games:
+        payout, fee = split_fee(amount * 2, 0.02)
+        rollups.add_game(conn, rollups.rollup_day(datetime.fromisoformat(completed_at)),
+                         (player1_id, player2_id), winner_id, amount, payout, fee,
+                         tiers.get(winner_id) or "Starter")
+    logger.info(f"Migration: Backfilled daily rollups from {len(games)} settled games")
+
+
+@SCHEMA.migration(10, "Leaderboard rollup table")
+def _create_leaderboard_rollups(cursor: sqlite3.Cursor):
+    for create_sql in rollups.LEADERBOARD_TABLE_SQL:
+        cursor.execute(create_sql)
+
+    # Backfill all-time rows from every settled PVP game (hot and archived), and
+    # hourly rows for the last 7 days - older hours are never read. Payouts
+    # follow the 2% fee settlement has always applied.
+    sources = ["main.games"]
+    if cursor.execute("SELECT 1 FROM pragma_database_list WHERE name = 'archive'").fetchone() and \
+            cursor.execute("SELECT 1 FROM archive.sqlite_master WHERE name = 'games'").fetchone():
+        sources.append("archive.games")
+    games = cursor.execute(" UNION ".join(
+        f"""SELECT game_id, completed_at, player1_id, player2_id, winner_id, amount FROM {source}
+            WHERE status = 'completed' AND player2_id IS NOT NULL AND completed_at IS NOT NULL"""
+        for source in sources
+    )).fetchall()
+
+    recent = rollups.rollup_hour(datetime.utcnow() - timedelta(days=7))
+    conn = cursor.connection
+    for game_id, completed_at, player1_id, player2_id, winner_id, amount in games:
+        hour = rollups.rollup_hour(datetime.fromisoformat(completed_at))
+        periods = (hour, rollups.ALL_TIME) if hour >= recent else (rollups.ALL_TIME,)
+        rollups.add_game_to_leaderboards(conn, periods, game_id, (player1_id, player2_id), winner_id,
+                                         amount, split_fee(amount * 2, 0.02)[0])
+    if games:
+        logger.info(f"Migration: Backfilled leaderboards from {len(games)} settled games")
+
+
+def sync_archive_schema(conn: sqlite3.Connection):
+    """Create or extend the archive tables so they mirror the hot ones.
+
+    Archive tables are built from the hot tables' live column lists
+    (rows are only ever copied in whole, so they need no defaults or
+    constraints beyond the primary key). Columns added to a hot table by
+    a later migration are added to its archive table here, so this runs
+    on every startup rather than as a versioned step.
+    """
+    for table, (key, _) in ARCHIVE_TABLES.items():
+        columns = [(row[1], row[2]) for row in conn.execute(f"PRAGMA main.table_info({table})")]
+        existing = {row[1] for row in conn.execute(f"PRAGMA archive.table_info({table})")}
+        if not existing:
+            definition = ", ".join(
+                f"{name} {col_type}{' PRIMARY KEY' if name == key else ''}" for name, col_type in columns
+            )
+            conn.execute(f"CREATE TABLE IF NOT EXISTS archive.{table} ({definition})")
+            logger.info(f"Archive: created table {table}")
+        else:
+            for name, col_type in columns:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE archive.{table} ADD COLUMN {name} {col_type}")
+                    logger.info(f"Archive: added column '{name}' to {table} table")
+
+        for n, index_columns in enumerate(_ARCHIVE_INDEXES[table], 1):
+            conn.execute(f"CREATE INDEX IF NOT EXISTS archive.idx_{table}_history_{n} ON {table}({index_columns})")
+    conn.commit()
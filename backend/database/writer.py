@@ -0,0 +1,195 @@
+"""
+Single-writer commit queue for Coinflip SQLite databases.
+
+SQLite allows one writer at a time, so letting every request thread open
+its own write transaction just makes them queue on the file lock (and
+retry on SQLITE_BUSY). Instead, every mutating repository call is queued
+on one WriteQueue per database file, which owns the file's only write
+connection.
+
+Writes are group-committed: whichever caller finds the writer idle takes
+the writer role, drains everything queued into one transaction and
+commits once. Callers that queued meanwhile wait until the batch holding
+their write has committed. A lone writer commits straight away with no
+thread hand-off; under load, batches grow on their own with the number
+of waiting writers. A failing call never takes its batch down with it:
+the batch is replayed with each call in its own savepoint.
+
+Reads never go through the queue; they keep using pooled connections.
+"""
+import os
+import sqlite3
+import logging
+import threading
+from typing import Any, Callable, Dict, List
+
+from .pool import ConnectionPool, get_pool
+
+logger = logging.getLogger(__name__)
+
+# Group commit configuration (override via environment)
+DB_GROUP_COMMIT_MS = float(os.getenv("DB_GROUP_COMMIT_MS", "0"))  # Extra linger for stragglers under load
+DB_WRITE_BATCH_MAX = int(os.getenv("DB_WRITE_BATCH_MAX", "256"))
+
+# A write job: runs inside the batch transaction, must not commit, and may
+# be replayed if another write in its batch fails
+WriteFunc = Callable[[sqlite3.Connection], Any]
+
+
+class _Job:
+    __slots__ = ("func", "done", "result", "error")
+
+    def __init__(self, func: WriteFunc):
+        self.func = func
+        self.done = False
+        self.result = None
+        self.error = None
+
+
+class WriteQueue:
+    """Serializes and group-commits all writes to one database file.
+
+    Usage:
+        writer = get_writer("coinflip.db")
+        rowcount = writer.execute(lambda conn: conn.execute(sql, params).rowcount)
+    """
+
+    def __init__(self, db_path: str, group_commit_ms: float = DB_GROUP_COMMIT_MS,
+                 batch_max: int = DB_WRITE_BATCH_MAX):
+        self.db_path = db_path
+        self.group_commit_ms = group_commit_ms
+        self.batch_max = max(1, batch_max)
+        # Dedicated connection, so writes never wait behind readers for a pool slot
+        # (:memory: databases only exist on the shared connection)
+        self._pool = get_pool(db_path) if db_path == ":memory:" else ConnectionPool(db_path, size=1)
+        self._cond = threading.Condition()
+        self._pending: List[_Job] = []
+        self._writing = False
+        self._closed = False
+        self.writes = 0
+        self.batches = 0
+
+    def execute(self, func: WriteFunc) -> Any:
+        """Queue a write and wait until the batch holding it has committed.
+
+        Returns:
+            Whatever func returned
+
+        Raises:
+            Whatever func raised (its changes are rolled back), or the
+            commit error if the batch itself failed
+        """
+        job = _Job(func)
+        with self._cond:
+            if self._closed:
+                raise sqlite3.ProgrammingError(f"Write queue for {self.db_path} is closed")
+            self._pending.append(job)
+
+            while not job.done:
+                if self._writing:
+                    self._cond.wait()
+                    continue
+
+                # Writer is idle - take the role and commit everything queued
+                self._writing = True
+                if self.group_commit_ms > 0 and 1 < len(self._pending) < self.batch_max:
+                    self._cond.wait(self.group_commit_ms / 1000)
+                batch = self._pending[:self.batch_max]
+                del self._pending[:self.batch_max]
+
+                self._cond.release()
+                try:
+                    self._commit(batch)
+                finally:
+                    self._cond.acquire()
+                    self._writing = False
+                    self._cond.notify_all()
+
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def stats(self) -> Dict[str, float]:
+        """Writes and batches committed so far."""
+        return {
+            "writes": self.writes,
+            "batches": self.batches,
+            "avg_batch": self.writes / self.batches if self.batches else 0.0,
+        }
+
+    def close(self):
+        """Wait for queued writes to commit, then close the write connection."""
+        with self._cond:
+            self._closed = True
+            while self._writing or self._pending:
+                self._cond.wait()
+        if self.db_path != ":memory:":
+            self._pool.close()
+
+    def _commit(self, batch: List[_Job]):
+        """Run a batch in one transaction and record each job's outcome."""
+        try:
+            with self._pool.connection() as conn:
+                if not self._apply(conn, batch, isolate=False) and len(batch) > 1:
+                    # Replay with each write in its own savepoint so only the failing one is dropped
+                    self._apply(conn, batch, isolate=True)
+        except Exception as e:
+            logger.error(f"Group commit of {len(batch)} writes to {self.db_path} failed: {e}", exc_info=True)
+            for job in batch:
+                job.result, job.error = None, e
+        else:
+            self.writes += len(batch)
+            self.batches += 1
+
+        for job in batch:
+            job.done = True
+
+    @staticmethod
+    def _apply(conn: sqlite3.Connection, batch: List[_Job], isolate: bool) -> bool:
+        """Run the batch's writes and commit them.
+
+        Savepoints per write are only paid for when replaying a batch that
+        had a failure (isolate=True). Without them, the first failing write
+        rolls back the whole transaction and this returns False.
+        """
+        conn.execute("BEGIN IMMEDIATE")
+        for job in batch:
+            job.error = None
+            if isolate:
+                conn.execute("SAVEPOINT write_job")
+            try:
+                job.result = job.func(conn)
+            except Exception as e:
+                job.error = e
+                if not isolate:
+                    conn.rollback()
+                    return False
+                conn.execute("ROLLBACK TO write_job")
+            if isolate:
+                conn.execute("RELEASE write_job")
+        conn.commit()
+        return True
+
+
+# Process-wide writers, one per database file
+_writers: Dict[str, WriteQueue] = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(db_path: str) -> WriteQueue:
+    """Get the shared write queue for a database file."""
+    key = db_path if db_path == ":memory:" else os.path.abspath(db_path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None or writer._closed:
+            writer = WriteQueue(db_path)
+            _writers[key] = writer
+        return writer
+
+
+def close_all_writers():
+    """Commit queued writes and close every writer (call on shutdown, before close_all_pools)."""
+    with _writers_lock:
+        for writer in _writers.values():
+            writer.close()
+        _writers.clear()
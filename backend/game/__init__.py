@@ -1,9 +1,13 @@
 """Game logic module for Coinflip."""
-from .coinflip import play_house_game, play_pvp_game, play_pvp_game_with_escrows, verify_game_result, flip_coin, TRANSACTION_FEE
+from .coinflip import play_house_game, play_pvp_game, play_pvp_game_with_escrows, PvpSettlement, verify_game_result, flip_coin, TRANSACTION_FEE, HOUSE_FEE_PCT
 from .solana_ops import (
     generate_wallet,
     get_sol_balance,
+    get_lamport_balance,
+    get_sol_balances,
+    get_lamport_balances,
     transfer_sol,
+    transfer_lamports,
     get_latest_blockhash,
     payout_winner,
     collect_fee,
@@ -23,12 +27,18 @@ __all__ = [
     "play_house_game",
     "play_pvp_game",
     "play_pvp_game_with_escrows",
+    "PvpSettlement",
     "verify_game_result",
     "flip_coin",
     "TRANSACTION_FEE",
+    "HOUSE_FEE_PCT",
     "generate_wallet",
     "get_sol_balance",
+    "get_lamport_balance",
+    "get_sol_balances",
+    "get_lamport_balances",
     "transfer_sol",
+    "transfer_lamports",
     "get_latest_blockhash",
     "payout_winner",
     "collect_fee",
@@ -5,10 +5,10 @@ import hashlib
 import logging
 import uuid
 from datetime import datetime
-from typing import Optional, Tuple
+from typing import NamedTuple, Optional, Tuple
 from database.models import Game, GameType, GameStatus, CoinSide, User
 from .solana_ops import (
-    transfer_sol,
+    transfer_lamports,
     get_latest_blockhash,
     payout_winner,
     collect_fee,
@@ -20,6 +20,7 @@ from token_config import (
     calculate_combined_discount,
     BASE_FEE_RATE,
 )
+from money import to_lamports, to_sol, split_fee
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +30,16 @@ TRANSACTION_FEE = 0.025  # Fixed 0.025 SOL per player (covers gas + profit)
 # Total fees per game: 2% of pot + 0.05 SOL fixed (0.025 from each player)
 
 
+class PvpSettlement(NamedTuple):
+    """What an escrow PVP game actually paid out, for stats and rollups."""
+    game: Game
+    payout: int  # Lamports sent to the winner from both escrows
+    fee: int  # Lamports of fee revenue kept, net of any referral commission
+    winner_tier: str  # Winner's tier before this game (it set the fee rate)
+    referrer_id: Optional[int]  # Winner's referrer, if a commission was paid
+    referral_commission: int  # Lamports paid to the referrer (0 if none)
+
+
 def generate_game_id() -> str:
     """Generate unique game ID."""
     return f"game_{uuid.uuid4().hex[:12]}"
@@ -140,12 +151,11 @@ async def play_house_game(
 
             # Calculate payout (2x wager - 2% game fee)
             # Note: Transaction fee (0.025 SOL) already collected, kept separate
-            total_pot = amount * 2
-            game_fee = total_pot * HOUSE_FEE_PCT
-            payout = total_pot - game_fee
+            total_pot = to_lamports(amount) * 2
+            payout, game_fee = split_fee(total_pot, HOUSE_FEE_PCT)
 
             # Pay winner from house wallet (REAL MAINNET TRANSFER)
-            payout_tx = await transfer_sol(
+            payout_tx = await transfer_lamports(
                 rpc_url,
                 house_wallet_secret,
                 player_wallet,
@@ -154,9 +164,9 @@ async def play_house_game(
             game.payout_tx = payout_tx
 
             # Send all fees to treasury (game fee + transaction fee)
-            total_fees = game_fee + TRANSACTION_FEE
+            total_fees = game_fee + to_lamports(TRANSACTION_FEE)
             if total_fees > 0:
-                fee_tx = await transfer_sol(
+                fee_tx = await transfer_lamports(
                     rpc_url,
                     house_wallet_secret,
                     treasury_address,
@@ -164,7 +174,7 @@ async def play_house_game(
                 )
                 game.fee_tx = fee_tx
 
-            logger.info(f"[REAL MAINNET] Player won {payout} SOL (tx: {payout_tx}), game fee: {game_fee} SOL, tx fee: {TRANSACTION_FEE} SOL, total fees: {total_fees} SOL")
+            logger.info(f"[REAL MAINNET] Player won {to_sol(payout)} SOL (tx: {payout_tx}), game fee: {to_sol(game_fee)} SOL, tx fee: {TRANSACTION_FEE} SOL, total fees: {to_sol(total_fees)} SOL")
 
         else:
             # House wins - player's escrowed funds stay in house wallet
@@ -261,12 +271,11 @@ async def play_pvp_game(
 
         # Calculate payout (2x wager - 2% game fee)
         # Note: Transaction fees (0.025 SOL × 2 players) already collected separately
-        total_pot = amount * 2
-        game_fee = total_pot * HOUSE_FEE_PCT
-        payout = total_pot - game_fee
+        total_pot = to_lamports(amount) * 2
+        payout, game_fee = split_fee(total_pot, HOUSE_FEE_PCT)
 
         # Pay winner from house wallet (REAL MAINNET TRANSFER)
-        payout_tx = await transfer_sol(
+        payout_tx = await transfer_lamports(
             rpc_url,
             house_wallet_secret,
             winner_wallet,
@@ -275,10 +284,10 @@ async def play_pvp_game(
         game.payout_tx = payout_tx
 
         # Send all fees to treasury (game fee + transaction fees from both players)
-        total_transaction_fees = TRANSACTION_FEE * 2  # Both players paid 0.025 each
+        total_transaction_fees = to_lamports(TRANSACTION_FEE) * 2  # Both players paid 0.025 each
         total_fees = game_fee + total_transaction_fees
         if total_fees > 0:
-            fee_tx = await transfer_sol(
+            fee_tx = await transfer_lamports(
                 rpc_url,
                 house_wallet_secret,
                 treasury_address,
@@ -286,7 +295,7 @@ async def play_pvp_game(
             )
             game.fee_tx = fee_tx
 
-        logger.info(f"[REAL MAINNET] Player {game.winner_id} won {payout} SOL in PVP game, game fee: {game_fee} SOL, tx fees: {total_transaction_fees} SOL, total fees: {total_fees} SOL")
+        logger.info(f"[REAL MAINNET] Player {game.winner_id} won {to_sol(payout)} SOL in PVP game, game fee: {to_sol(game_fee)} SOL, tx fees: {to_sol(total_transaction_fees)} SOL, total fees: {to_sol(total_fees)} SOL")
 
         # Mark game as completed
         game.status = GameStatus.COMPLETED
@@ -311,7 +320,8 @@ async def play_pvp_game_with_escrows(
     acceptor_escrow_secret: str,
     acceptor_escrow_address: str,
     amount: float,
-) -> Game:
+    db: 'AsyncDatabase',
+) -> PvpSettlement:
     """Play a PVP game using isolated escrow wallets.
 
     SECURITY: Each player's funds are in separate escrow wallets.
@@ -330,9 +340,10 @@ async def play_pvp_game_with_escrows(
         acceptor_escrow_secret: Acceptor's escrow wallet secret (encrypted, will decrypt)
         acceptor_escrow_address: Acceptor's escrow wallet address
         amount: Wager amount in SOL (per player)
+        db: The caller's shared AsyncDatabase, used for referral and tier updates
 
     Returns:
-        Completed Game object
+        The completed Game, with the payout, net fee and winner's tier it settled at
     """
     from .escrow import payout_from_escrow, collect_fees_from_escrow
     from utils import decrypt_secret
@@ -406,7 +417,8 @@ async def play_pvp_game_with_escrows(
         # - Treasury gets: fee_rate from both escrows + tx fees
         # - Loser gets: Nothing
 
-        # Start with volume tier fee rate
+        # Start with volume tier fee rate (Step 7 may upgrade the tier afterwards)
+        winner_tier = winner.tier
         winner_fee_rate = winner.tier_fee_rate  # e.g., 0.019 for Bronze, 0.015 for Diamond
 
         # Apply token holder discount if enabled
@@ -418,14 +430,14 @@ async def play_pvp_game_with_escrows(
             winner_fee_rate = BASE_FEE_RATE * (1 - combined_discount)
             logger.info(f"[ESCROW GAME] Winner {winner.tier} + {winner.token_tier} token holder (combined: {combined_discount*100:.0f}% off)")
 
-        payout_per_escrow = amount * (1 - winner_fee_rate)  # (100% - fee%) from each escrow
+        # Integer lamports from here on: payout + fee is exactly the escrowed amount
+        payout_per_escrow, fee_per_escrow = split_fee(to_lamports(amount), winner_fee_rate)
         total_payout = payout_per_escrow * 2  # Winner gets from both escrows
-        fee_per_escrow = amount * winner_fee_rate  # Fee from each escrow
         total_fees = fee_per_escrow * 2  # 2% fee from total pot (covers Solana tx fees + profit)
 
         logger.info(f"[ESCROW GAME] Winner tier: {winner.tier} (effective fee rate: {winner_fee_rate*100:.2f}%)")
-        logger.info(f"[ESCROW GAME] Total payout to winner: {total_payout:.6f} SOL ({payout_per_escrow:.6f} from each escrow)")
-        logger.info(f"[ESCROW GAME] Total fees to treasury: {total_fees:.6f} SOL ({fee_per_escrow:.6f} from each escrow)")
+        logger.info(f"[ESCROW GAME] Total payout to winner: {to_sol(total_payout):.6f} SOL ({to_sol(payout_per_escrow):.6f} from each escrow)")
+        logger.info(f"[ESCROW GAME] Total fees to treasury: {to_sol(total_fees):.6f} SOL ({to_sol(fee_per_escrow):.6f} from each escrow)")
 
         # STEP 4: PAY WINNER FROM BOTH ESCROWS
         # Send 98% of bet from winner's own escrow
@@ -445,50 +457,49 @@ async def play_pvp_game_with_escrows(
         )
 
         game.payout_tx = f"{winner_payout_tx},{loser_payout_tx}"  # Store both tx signatures
-        logger.info(f"[ESCROW GAME] Paid winner {total_payout} SOL (winner escrow: {winner_payout_tx}, loser escrow: {loser_payout_tx})")
+        logger.info(f"[ESCROW GAME] Paid winner {to_sol(total_payout)} SOL (winner escrow: {winner_payout_tx}, loser escrow: {loser_payout_tx})")
 
         # STEP 5: SEND REFERRAL COMMISSION (if winner was referred)
         # Commission comes from loser's escrow BEFORE sweeping to treasury
-        referral_commission_amount = 0.0
+        referral_commission = 0  # lamports
+        referrer_id = None
         if winner.referred_by:
             # Import here to avoid circular dependency
-            from database import repo
             from tiers import calculate_referral_commission, get_referral_commission_rate
             from referrals import get_or_create_referral_escrow
 
             # Get referrer
-            referrer = repo.Database().get_user(winner.referred_by)
+            referrer = await db.get_user(winner.referred_by)
             if referrer:
                 # Calculate commission based on referrer's tier
                 game_fees_only = fee_per_escrow * 2  # Exclude tx fees from commission
-                referral_commission_amount = calculate_referral_commission(game_fees_only, referrer)
+                referral_commission = calculate_referral_commission(game_fees_only, referrer)
 
                 # Send commission from loser's escrow to referrer's escrow wallet
                 try:
                     # Get or create referrer's escrow
                     referrer_escrow, _ = await get_or_create_referral_escrow(
-                        referrer, encryption_key, repo.Database()
+                        referrer, encryption_key, db
                     )
 
                     # Transfer from loser's escrow to referrer's escrow
-                    commission_tx = await transfer_sol(
+                    commission_tx = await transfer_lamports(
                         rpc_url,
                         loser_escrow_secret,
                         referrer_escrow,
-                        referral_commission_amount
+                        referral_commission
                     )
 
-                    # Update referrer's total earnings
-                    referrer.referral_earnings += referral_commission_amount
-                    repo.Database().save_user(referrer)
+                    # Credited to the referrer's earnings when the game is recorded
+                    referrer_id = referrer.user_id
 
                     commission_rate = get_referral_commission_rate(referrer)
                     logger.info(f"[REFERRAL] Winner {winner.user_id} referred by {referrer.user_id}")
-                    logger.info(f"[REFERRAL] Commission sent from escrow: {referral_commission_amount:.6f} SOL ({referrer.tier} tier: {commission_rate*100:.1f}%) | TX: {commission_tx}")
+                    logger.info(f"[REFERRAL] Commission sent from escrow: {to_sol(referral_commission):.6f} SOL ({referrer.tier} tier: {commission_rate*100:.1f}%) | TX: {commission_tx}")
                 except Exception as e:
                     logger.error(f"[REFERRAL] Failed to send commission: {e}", exc_info=True)
                     # Don't fail the game if referral payment fails
-                    referral_commission_amount = 0.0
+                    referral_commission = 0
 
         # STEP 6: SWEEP ALL REMAINING FUNDS TO TREASURY
         # After paying winner and referral commission, sweep whatever is left
@@ -508,8 +519,8 @@ async def play_pvp_game_with_escrows(
         )
 
         logger.info(f"[ESCROW GAME] Swept remaining funds to treasury (winner escrow: {winner_fee_tx}, loser escrow: {loser_fee_tx})")
-        net_treasury = total_fees - referral_commission_amount
-        logger.info(f"[ESCROW GAME] Net revenue: ~{net_treasury:.6f} SOL (fees - {referral_commission_amount:.6f} referral)")
+        net_treasury = total_fees - referral_commission
+        logger.info(f"[ESCROW GAME] Net revenue: ~{to_sol(net_treasury):.6f} SOL (fees - {to_sol(referral_commission):.6f} referral)")
 
         # STEP 7: UPDATE TIER FOR BOTH PLAYERS (volume-based auto-upgrade)
         from tiers import update_user_tier
@@ -517,22 +528,22 @@ async def play_pvp_game_with_escrows(
         # Update creator tier
         creator_upgraded = update_user_tier(creator)
         if creator_upgraded:
-            repo.Database().save_user(creator)
+            await db.save_user(creator)
             logger.info(f"[TIER] Creator {creator.user_id} upgraded to {creator.tier}")
 
         # Update acceptor tier
         acceptor_upgraded = update_user_tier(acceptor)
         if acceptor_upgraded:
-            repo.Database().save_user(acceptor)
+            await db.save_user(acceptor)
             logger.info(f"[TIER] Acceptor {acceptor.user_id} upgraded to {acceptor.tier}")
 
         # Mark game as completed
         game.status = GameStatus.COMPLETED
         game.completed_at = datetime.utcnow()
 
-        logger.info(f"[ESCROW GAME] Game {game_id} completed - winner: {game.winner_id}, referral commission: {referral_commission_amount:.6f} SOL")
+        logger.info(f"[ESCROW GAME] Game {game_id} completed - winner: {game.winner_id}, referral commission: {to_sol(referral_commission):.6f} SOL")
 
-        return game
+        return PvpSettlement(game, total_payout, net_treasury, winner_tier, referrer_id, referral_commission)
 
     except Exception as e:
         logger.error(f"Escrow PVP game failed: {e}")
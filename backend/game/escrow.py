@@ -12,10 +12,12 @@ from datetime import datetime
 
 from .solana_ops import (
     generate_wallet,
-    transfer_sol,
+    transfer_lamports,
     get_sol_balance,
+    get_lamport_balance,
     verify_deposit_transaction
 )
+from money import to_lamports, to_sol
 from utils import encrypt_secret, decrypt_secret
 from database import User, UsedSignature
 
@@ -23,7 +25,7 @@ logger = logging.getLogger(__name__)
 
 # Solana rent-exempt minimum (from VolT)
 RENT_EXEMPT_LAMPORTS = 890880
-RENT_EXEMPT_SOL = RENT_EXEMPT_LAMPORTS / 1_000_000_000  # ~0.00089 SOL
+RENT_EXEMPT_SOL = to_sol(RENT_EXEMPT_LAMPORTS)  # ~0.00089 SOL
 
 
 async def create_escrow_wallet(
@@ -54,7 +56,7 @@ async def create_escrow_wallet(
         user_wallet: User's wallet address
         deposit_tx_signature: Transaction signature from Web user
         wager_id: Wager ID for tracking
-        db: Database instance
+        db: AsyncDatabase instance
 
     Returns:
         Tuple of (escrow_address, encrypted_secret, deposit_tx_signature)
@@ -82,9 +84,9 @@ async def create_escrow_wallet(
                 f"and provide transaction signature"
             )
 
-        # SECURITY: Check if signature already used
-        if db.signature_already_used(deposit_tx_signature):
-            used_sig = db.get_used_signature(deposit_tx_signature)
+        # SECURITY: Reject known replays before paying for on-chain verification
+        used_sig = await db.get_used_signature(deposit_tx_signature)
+        if used_sig:
             raise Exception(
                 f"Transaction signature already used for {used_sig.used_for} "
                 f"by {used_sig.user_wallet} at {used_sig.used_at}"
@@ -105,13 +107,18 @@ async def create_escrow_wallet(
                 f"({amount} wager + {transaction_fee} fee) to escrow wallet {escrow_address}"
             )
 
-        # SECURITY: Mark signature as used
-        db.save_used_signature(UsedSignature(
+        # SECURITY: Claim the signature - atomic, so a concurrent replay can't also pass
+        used_sig = await db.claim_signature(UsedSignature(
             signature=deposit_tx_signature,
             user_wallet=user_wallet,
             used_for=wager_id,
             used_at=datetime.utcnow()
         ))
+        if used_sig:
+            raise Exception(
+                f"Transaction signature already used for {used_sig.used_for} "
+                f"by {used_sig.user_wallet} at {used_sig.used_at}"
+            )
 
         deposit_tx = deposit_tx_signature
         logger.info(f"[REAL MAINNET] Verified Web deposit {total_required} SOL from {user_wallet} → escrow {escrow_address} (tx: {deposit_tx})")
@@ -152,7 +159,7 @@ async def verify_escrow_deposit(
         user_wallet: User's wallet address (sender)
         deposit_tx_signature: Transaction signature to verify
         wager_id: Wager ID for tracking
-        db: Database instance
+        db: AsyncDatabase instance
 
     Returns:
         Verified deposit_tx_signature
@@ -167,9 +174,9 @@ async def verify_escrow_deposit(
             f"Must provide transaction signature for deposit to escrow {escrow_address}"
         )
 
-    # SECURITY: Check if signature already used
-    if db.signature_already_used(deposit_tx_signature):
-        used_sig = db.get_used_signature(deposit_tx_signature)
+    # SECURITY: Reject known replays before paying for on-chain verification
+    used_sig = await db.get_used_signature(deposit_tx_signature)
+    if used_sig:
         raise Exception(
             f"Transaction signature already used for {used_sig.used_for} "
             f"by {used_sig.user_wallet} at {used_sig.used_at}"
@@ -190,13 +197,18 @@ async def verify_escrow_deposit(
             f"to escrow wallet {escrow_address}"
         )
 
-    # SECURITY: Mark signature as used
-    db.save_used_signature(UsedSignature(
+    # SECURITY: Claim the signature - atomic, so a concurrent replay can't also pass
+    used_sig = await db.claim_signature(UsedSignature(
         signature=deposit_tx_signature,
         user_wallet=user_wallet,
         used_for=wager_id,
         used_at=datetime.utcnow()
     ))
+    if used_sig:
+        raise Exception(
+            f"Transaction signature already used for {used_sig.used_for} "
+            f"by {used_sig.user_wallet} at {used_sig.used_at}"
+        )
 
     logger.info(f"[ESCROW] Verified deposit {total_required} SOL from {user_wallet} → existing escrow {escrow_address} (tx: {deposit_tx_signature})")
 
@@ -217,7 +229,7 @@ async def payout_from_escrow(
     rpc_url: str,
     escrow_secret: str,
     winner_wallet: str,
-    payout_amount: float
+    payout_lamports: int
 ) -> str:
     """Pay winner from their escrow wallet.
 
@@ -225,7 +237,7 @@ async def payout_from_escrow(
         rpc_url: Solana RPC endpoint
         escrow_secret: Decrypted escrow wallet secret
         winner_wallet: Winner's main wallet address
-        payout_amount: Amount to pay (98% of pot)
+        payout_lamports: Amount to pay in lamports (98% of pot)
 
     Returns:
         Transaction signature
@@ -233,16 +245,16 @@ async def payout_from_escrow(
     Raises:
         Exception: If transfer fails
     """
-    logger.info(f"[ESCROW] Paying winner {payout_amount} SOL from escrow to {winner_wallet}")
+    logger.info(f"[ESCROW] Paying winner {to_sol(payout_lamports)} SOL from escrow to {winner_wallet}")
 
-    payout_tx = await transfer_sol(
+    payout_tx = await transfer_lamports(
         rpc_url,
         escrow_secret,
         winner_wallet,
-        payout_amount
+        payout_lamports
     )
 
-    logger.info(f"[REAL MAINNET] Paid winner {payout_amount} SOL (tx: {payout_tx})")
+    logger.info(f"[REAL MAINNET] Paid winner {to_sol(payout_lamports)} SOL (tx: {payout_tx})")
     return payout_tx
 
 
@@ -281,25 +293,25 @@ async def collect_fees_from_escrow(
     # Check remaining balance with retry (RPC can return stale data)
     max_retries = 3
     for attempt in range(max_retries):
-        escrow_balance = await get_sol_balance(rpc_url, escrow_address)
-        logger.info(f"[ESCROW] Balance check attempt {attempt+1}: {escrow_address} has {escrow_balance} SOL")
+        escrow_balance = await get_lamport_balance(rpc_url, escrow_address)
+        logger.info(f"[ESCROW] Balance check attempt {attempt+1}: {escrow_address} has {to_sol(escrow_balance)} SOL")
 
         # Keep rent-exempt minimum (following VolT's pattern)
-        if escrow_balance <= RENT_EXEMPT_SOL:
-            logger.info(f"[ESCROW] Balance too low to collect ({escrow_balance} SOL ≤ {RENT_EXEMPT_SOL} SOL), leaving as dust")
+        if escrow_balance <= RENT_EXEMPT_LAMPORTS:
+            logger.info(f"[ESCROW] Balance too low to collect ({to_sol(escrow_balance)} SOL ≤ {RENT_EXEMPT_SOL} SOL), leaving as dust")
             return None
 
         # Transfer remaining balance to house
-        amount_to_collect = escrow_balance - RENT_EXEMPT_SOL
+        lamports_to_collect = escrow_balance - RENT_EXEMPT_LAMPORTS
 
         try:
-            fee_tx = await transfer_sol(
+            fee_tx = await transfer_lamports(
                 rpc_url,
                 escrow_secret,
                 house_wallet,
-                amount_to_collect
+                lamports_to_collect
             )
-            logger.info(f"[REAL MAINNET] Collected {amount_to_collect} SOL from escrow {escrow_address} → house {house_wallet} (tx: {fee_tx})")
+            logger.info(f"[REAL MAINNET] Collected {to_sol(lamports_to_collect)} SOL from escrow {escrow_address} → house {house_wallet} (tx: {fee_tx})")
             return fee_tx
         except Exception as e:
             if "insufficient lamports" in str(e).lower() and attempt < max_retries - 1:
@@ -349,35 +361,35 @@ async def refund_from_escrow(
 
     # Refund wager amount to creator
     logger.info(f"[ESCROW REFUND] Refunding {wager_amount} SOL to creator {creator_wallet}")
-    refund_tx = await transfer_sol(
+    refund_tx = await transfer_lamports(
         rpc_url,
         escrow_secret,
         creator_wallet,
-        wager_amount
+        to_lamports(wager_amount)
     )
 
     logger.info(f"[REAL MAINNET] Refunded {wager_amount} SOL to creator (tx: {refund_tx})")
 
     # Collect transaction fee + any remaining dust to treasury
-    remaining_balance = await get_sol_balance(rpc_url, escrow_address)
-    logger.info(f"[ESCROW REFUND] Remaining balance: {remaining_balance} SOL")
+    remaining_balance = await get_lamport_balance(rpc_url, escrow_address)
+    logger.info(f"[ESCROW REFUND] Remaining balance: {to_sol(remaining_balance)} SOL")
 
-    if remaining_balance <= RENT_EXEMPT_SOL:
+    if remaining_balance <= RENT_EXEMPT_LAMPORTS:
         logger.info(f"[ESCROW REFUND] No fees to collect (balance ≤ rent minimum)")
         return refund_tx, None
 
     # Transfer remaining to treasury (transaction fee + dust)
-    amount_to_treasury = remaining_balance - RENT_EXEMPT_SOL
-    logger.info(f"[ESCROW REFUND] Collecting {amount_to_treasury} SOL (fee + dust) to treasury")
+    lamports_to_treasury = remaining_balance - RENT_EXEMPT_LAMPORTS
+    logger.info(f"[ESCROW REFUND] Collecting {to_sol(lamports_to_treasury)} SOL (fee + dust) to treasury")
 
-    fee_tx = await transfer_sol(
+    fee_tx = await transfer_lamports(
         rpc_url,
         escrow_secret,
         fee_destination,
-        amount_to_treasury
+        lamports_to_treasury
     )
 
-    logger.info(f"[REAL MAINNET] Collected {amount_to_treasury} SOL fee to treasury (tx: {fee_tx})")
+    logger.info(f"[REAL MAINNET] Collected {to_sol(lamports_to_treasury)} SOL fee to treasury (tx: {fee_tx})")
 
     return refund_tx, fee_tx
 
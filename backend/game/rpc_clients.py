@@ -0,0 +1,111 @@
+"""
+Shared Solana RPC clients, one per endpoint.
+
+Opening `AsyncClient(rpc_url)` for every call (and again for every retry)
+pays a fresh TCP + TLS handshake to the RPC provider each time. Instead,
+get_client() hands out one long-lived client per endpoint whose HTTP
+connection pool keeps connections alive between calls, and negotiates
+HTTP/2 when the `h2` package is installed, so concurrent calls share a
+single connection.
+
+httpx connections belong to the event loop that opened them, so the
+registry is per event loop (the API's loop, or each asyncio.run() of a
+CLI tool). Shared clients must never be closed by callers: close_clients()
+closes them on shutdown.
+
+solana-py's constructor has no connection-limit or HTTP/2 options, so the
+pool settings are applied by swapping its provider's httpx session. That
+relies on provider internals of the solana version pinned in
+requirements.txt; if they change, clients keep solana-py's stock session
+and a warning is logged.
+"""
+import os
+import asyncio
+import logging
+import weakref
+import importlib.util
+from typing import Dict, Set
+
+import httpx
+from solana.rpc.async_api import AsyncClient
+
+logger = logging.getLogger(__name__)
+
+# Connection pool configuration (override via environment)
+RPC_TIMEOUT_SECONDS = float(os.getenv("RPC_TIMEOUT_SECONDS", "10"))
+RPC_POOL_MAX_CONNECTIONS = int(os.getenv("RPC_POOL_MAX_CONNECTIONS", "100"))
+RPC_POOL_MAX_KEEPALIVE = int(os.getenv("RPC_POOL_MAX_KEEPALIVE", "20"))
+RPC_POOL_KEEPALIVE_SECONDS = float(os.getenv("RPC_POOL_KEEPALIVE_SECONDS", "60"))
+RPC_HTTP2 = os.getenv("RPC_HTTP2", "true").lower() == "true"
+
+# httpx only speaks HTTP/2 with the optional `h2` package (pip install httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Event loop -> endpoint -> shared client (entries go away with their loop)
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+# Replaced stock sessions being closed (kept so the tasks aren't garbage collected)
+_closing: Set[asyncio.Task] = set()
+
+
+def _new_client(endpoint: str) -> AsyncClient:
+    """Create a client whose provider session uses the shared pool settings (call from a coroutine)."""
+    client = AsyncClient(endpoint, timeout=RPC_TIMEOUT_SECONDS)
+    provider = getattr(client, "_provider", None)
+    stock_session = getattr(provider, "session", None)
+    if not isinstance(stock_session, httpx.AsyncClient):
+        logger.warning(
+            "solana-py's provider has no httpx session to replace (version changed?) - "
+            "RPC clients use its default connection settings"
+        )
+        return client
+
+    # The stock session has default limits and HTTP/1.1 only
+    provider.session = httpx.AsyncClient(
+        timeout=RPC_TIMEOUT_SECONDS,
+        limits=httpx.Limits(
+            max_connections=RPC_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=RPC_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=RPC_POOL_KEEPALIVE_SECONDS,
+        ),
+        http2=RPC_HTTP2 and HTTP2_AVAILABLE,
+    )
+    # It never opened a connection, but close it rather than leave it to the GC
+    task = asyncio.get_running_loop().create_task(stock_session.aclose())
+    _closing.add(task)
+    task.add_done_callback(_closing.discard)
+    return client
+
+
+def get_client(endpoint: str) -> AsyncClient:
+    """Get the shared client for an RPC endpoint (call from a coroutine).
+
+    Use it directly - not as `async with`, which would close it for everyone.
+    """
+    loop = asyncio.get_running_loop()
+    clients = _clients.get(loop)
+    if clients is None:
+        clients = _clients[loop] = {}
+    client = clients.get(endpoint)
+    if client is None:
+        client = clients[endpoint] = _new_client(endpoint)
+        logger.debug(
+            f"Opened RPC client for {endpoint[:50]} "
+            f"(max {RPC_POOL_MAX_CONNECTIONS} connections, http2={RPC_HTTP2 and HTTP2_AVAILABLE})"
+        )
+    return client
+
+
+async def close_clients():
+    """Close every shared client of the running event loop (call on shutdown)."""
+    clients = _clients.pop(asyncio.get_running_loop(), {})
+    for endpoint, client in clients.items():
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning(f"Error closing RPC client for {endpoint[:50]}: {e}")
+    if clients:
+        logger.info(f"Closed {len(clients)} RPC client(s)")
@@ -0,0 +1,98 @@
+"""
+Single-flight coalescing of identical RPC reads.
+
+Many pollers ask the chain the same question at the same moment: every
+browser watching a wager polls check-deposit every 2 seconds, and one
+wallet's balance can be requested by many tabs at once. SingleFlight runs
+one call per key - concurrent callers with the same key await the same
+in-flight call instead of each paying a round trip.
+
+A caller's `max_age` bounds how long before its own call the shared
+request may have been sent: a call in flight or finished that started at
+most `max_age` seconds earlier is reused. Fresh callers (max_age=0, e.g.
+a balance check right after a transfer) always send their own request,
+since an older in-flight read may predate what they need to see; later
+callers then share that newer request.
+
+Not thread-safe: use it from the event loop only.
+"""
+import time
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from database.cache import TTLCache
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """At most one in-flight call per key, plus a short memory of finished results."""
+
+    def __init__(self, max_age_seconds: float, max_size: int = 10000):
+        """
+        Args:
+            max_age_seconds: Longest `max_age` any caller may ask for (0 = never reuse results)
+            max_size: Finished results remembered at most
+        """
+        # key -> (started_at, task) of the newest call in flight
+        self._in_flight: Dict[Hashable, Tuple[float, asyncio.Task]] = {}
+        # key -> (started_at, result)
+        self._recent = TTLCache(max_size, max_age_seconds) if max_age_seconds > 0 else None
+        self.calls = 0
+        self.coalesced = 0
+        self.recent_hits = 0
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]], max_age: float = 0.0) -> T:
+        """Return call()'s result, sharing it with identical concurrent callers.
+
+        Args:
+            key: Identifies the call (e.g. endpoint, method and params)
+            call: Makes the call; only invoked if no usable identical call exists
+            max_age: Accept a call (in flight or finished) that started this
+                many seconds before this one; 0 always makes a new call
+        """
+        now = time.monotonic()
+        if max_age > 0 and self._recent is not None:
+            entry = self._recent.peek(key)
+            if entry is not None and now - entry[0] <= max_age:
+                self.recent_hits += 1
+                return entry[1]
+
+        flight = self._in_flight.get(key)
+        if flight is not None and max_age > 0 and now - flight[0] <= max_age:
+            task = flight[1]
+            self.coalesced += 1
+        else:
+            self.calls += 1
+            task = asyncio.ensure_future(self._run(key, call, now))
+            # Retrieve the error even if every caller gave up waiting for it
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            # Newer callers share this call; an older one finishes for its own callers
+            self._in_flight[key] = (now, task)
+
+        # One caller giving up (e.g. a client disconnect) doesn't cancel the call for the rest
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Hashable, call: Callable[[], Awaitable[T]], started_at: float) -> T:
+        try:
+            result = await call()
+            if self._recent is not None:
+                entry = self._recent.peek(key)
+                if entry is None or entry[0] <= started_at:
+                    self._recent.put(key, (started_at, result))
+            return result
+        finally:
+            flight = self._in_flight.get(key)
+            if flight is not None and flight[1] is asyncio.current_task():
+                del self._in_flight[key]
+
+    def stats(self) -> Dict[str, float]:
+        """Calls made vs. callers served without one."""
+        served = self.calls + self.coalesced + self.recent_hits
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "recent_hits": self.recent_hits,
+            "in_flight": len(self._in_flight),
+            "saved_rate": round(1 - self.calls / served, 4) if served else 0.0,
+        }
@@ -1,22 +1,54 @@
 """
 Solana blockchain operations for Coinflip game.
 """
+import os
 import asyncio
 import logging
-import math
-from typing import Optional, Tuple
-from solana.rpc.async_api import AsyncClient
+from typing import Dict, Iterable, Optional, Tuple
 from solana.rpc.commitment import Confirmed
-from solana.rpc.types import TxOpts
+from solana.rpc.types import DataSliceOpts, TxOpts
 from solders.keypair import Keypair
 from solders.pubkey import Pubkey
 from solders.system_program import TransferParams, transfer
 from solders.transaction import Transaction
 import base58
 
+from money import LAMPORTS_PER_SOL, to_lamports, to_sol, split_fee
+from rpc_manager import get_rpc_manager
+from .single_flight import SingleFlight
+
 logger = logging.getLogger(__name__)
 
-LAMPORTS_PER_SOL = 1_000_000_000
+# Pollers share identical reads sent this recently (in flight or finished); other reads go out fresh
+RPC_POLL_MAX_AGE_SECONDS = float(os.getenv("RPC_POLL_MAX_AGE_MS", "500")) / 1000
+
+_reads = SingleFlight(RPC_POLL_MAX_AGE_SECONDS)
+
+# Bulk balance reads: getMultipleAccounts takes at most 100 keys per call
+MULTIPLE_ACCOUNTS_MAX_KEYS = 100
+RPC_BULK_CONCURRENCY = int(os.getenv("RPC_BULK_CONCURRENCY", "4"))  # Chunks in flight at once
+
+
+async def _read(rpc_url: str, method: str, params: tuple, request, max_age: float = 0.0):
+    """RPC read through the manager, shared with recent identical reads.
+
+    Args:
+        params: The request's parameters (with `method`, identifies identical reads)
+        request: Makes the call on the client it is given
+        max_age: Accept an identical read sent up to this many seconds ago,
+            in flight or finished (only for polling paths); 0 always sends a
+            new read, so it sees everything that landed before the call
+    """
+    return await _reads.do(
+        (rpc_url, method, params),
+        lambda: get_rpc_manager(rpc_url).read(request, method),
+        max_age
+    )
+
+
+def get_read_stats() -> dict:
+    """Coalescing counters of the RPC reads made here."""
+    return _reads.stats()
 
 
 def keypair_from_base58(secret: str) -> Keypair:
@@ -37,24 +69,37 @@ def generate_wallet() -> Tuple[str, str]:
     return pubkey, secret
 
 
-async def get_sol_balance(rpc_url: str, wallet_address: str) -> float:
+async def get_sol_balance(rpc_url: str, wallet_address: str, max_age: float = 0.0) -> float:
     """Get SOL balance for a wallet.
 
     IMPORTANT: Raises exception on RPC failure (don't silently return 0).
     """
+    return to_sol(await get_lamport_balance(rpc_url, wallet_address, max_age))
+
+
+async def get_lamport_balance(rpc_url: str, wallet_address: str, max_age: float = 0.0) -> int:
+    """Get a wallet's balance in lamports (for exact fee/sweep arithmetic).
+
+    IMPORTANT: Raises exception on RPC failure (don't silently return 0).
+
+    Args:
+        max_age: Accept a balance read sent up to this many seconds ago
+            (e.g. RPC_POLL_MAX_AGE_SECONDS for polled endpoints)
+    """
     max_retries = 3
     last_error = None
 
     for attempt in range(max_retries):
         try:
-            async with AsyncClient(rpc_url) as client:
-                pubkey = Pubkey.from_string(wallet_address)
-                resp = await client.get_balance(pubkey, Confirmed)
-                if resp.value is not None:
-                    balance = resp.value / LAMPORTS_PER_SOL
-                    logger.info(f"[BALANCE] {wallet_address}: {balance} SOL")
-                    return balance
-                return 0.0
+            pubkey = Pubkey.from_string(wallet_address)
+            resp = await _read(
+                rpc_url, "getBalance", (wallet_address,),
+                lambda client: client.get_balance(pubkey, Confirmed), max_age
+            )
+            if resp.value is not None:
+                logger.info(f"[BALANCE] {wallet_address}: {to_sol(resp.value)} SOL")
+                return resp.value
+            return 0
         except Exception as e:
             last_error = e
             logger.warning(f"[BALANCE] Attempt {attempt + 1}/{max_retries} failed for {wallet_address}: {e}")
@@ -66,6 +111,57 @@ async def get_sol_balance(rpc_url: str, wallet_address: str) -> float:
     raise Exception(f"Failed to get balance for {wallet_address}: {last_error}")
 
 
+
+async def get_sol_balances(rpc_url: str, wallet_addresses: Iterable[str]) -> Dict[str, float]:
+    """Get SOL balances of many wallets in a few round trips.
+
+    See get_lamport_balances().
+    """
+    balances = await get_lamport_balances(rpc_url, wallet_addresses)
+    return {address: to_sol(lamports) for address, lamports in balances.items()}
+
+
+async def get_lamport_balances(rpc_url: str, wallet_addresses: Iterable[str]) -> Dict[str, int]:
+    """Get balances of many wallets in lamports, 100 per getMultipleAccounts call.
+
+    Chunks are fetched concurrently (RPC_BULK_CONCURRENCY at a time), so
+    1000 escrows cost 10 round trips instead of 1000. Accounts that don't
+    exist on chain have balance 0.
+
+    IMPORTANT: Raises exception on RPC failure (don't silently return 0).
+
+    Returns:
+        Dict of wallet address -> lamports (one entry per distinct address)
+    """
+    addresses = list(dict.fromkeys(wallet_addresses))
+    chunks = [
+        addresses[i:i + MULTIPLE_ACCOUNTS_MAX_KEYS]
+        for i in range(0, len(addresses), MULTIPLE_ACCOUNTS_MAX_KEYS)
+    ]
+    semaphore = asyncio.Semaphore(max(1, RPC_BULK_CONCURRENCY))
+    no_data = DataSliceOpts(offset=0, length=0)  # Only lamports are needed
+
+    async def fetch_chunk(chunk):
+        pubkeys = [Pubkey.from_string(address) for address in chunk]
+        async with semaphore:
+            resp = await _read(
+                rpc_url, "getMultipleAccounts", tuple(chunk),
+                lambda client: client.get_multiple_accounts(pubkeys, Confirmed, data_slice=no_data)
+            )
+        return [(address, account.lamports if account is not None else 0) for address, account in zip(chunk, resp.value)]
+
+    balances: Dict[str, int] = {}
+    try:
+        for chunk_balances in await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks)):
+            balances.update(chunk_balances)
+    except Exception as e:
+        logger.error(f"[BALANCE] Bulk lookup of {len(addresses)} wallets failed: {e}")
+        raise Exception(f"Failed to get balances for {len(addresses)} wallets: {e}")
+
+    logger.info(f"[BALANCE] {len(addresses)} wallets in {len(chunks)} getMultipleAccounts calls")
+    return balances
+
+
 async def transfer_sol(
     rpc_url: str,
     from_secret: str,
@@ -77,48 +173,63 @@ async def transfer_sol(
     Returns:
         Transaction signature if successful, raises Exception on failure.
     """
-    if amount_sol <= 0:
-        raise Exception(f"Invalid amount: {amount_sol}")
+    return await transfer_lamports(rpc_url, from_secret, to_address, to_lamports(amount_sol))
+
+
+async def transfer_lamports(
+    rpc_url: str,
+    from_secret: str,
+    to_address: str,
+    lamports: int,
+) -> Optional[str]:
+    """Transfer an exact number of lamports from one wallet to another.
+
+    Returns:
+        Transaction signature if successful, raises Exception on failure.
+    """
+    if lamports <= 0:
+        raise Exception(f"Invalid amount: {lamports} lamports")
 
     max_retries = 3
     last_error = None
 
     for attempt in range(max_retries):
         try:
-            logger.info(f"[TRANSFER] Attempt {attempt + 1}: {amount_sol} SOL to {to_address}")
-
-            async with AsyncClient(rpc_url) as client:
-                kp = keypair_from_base58(from_secret)
-                to_pubkey = Pubkey.from_string(to_address)
-                lamports = math.floor(amount_sol * LAMPORTS_PER_SOL)
-
-                # Get fresh blockhash
-                blockhash_resp = await client.get_latest_blockhash(Confirmed)
-                recent_blockhash = blockhash_resp.value.blockhash
-
-                # Create transfer instruction
-                transfer_ix = transfer(
-                    TransferParams(
-                        from_pubkey=kp.pubkey(),
-                        to_pubkey=to_pubkey,
-                        lamports=lamports,
-                    )
+            logger.info(f"[TRANSFER] Attempt {attempt + 1}: {to_sol(lamports)} SOL to {to_address}")
+
+            rpc = get_rpc_manager(rpc_url)
+            kp = keypair_from_base58(from_secret)
+            to_pubkey = Pubkey.from_string(to_address)
+
+            # Get fresh blockhash
+            blockhash_resp = await rpc.read(lambda client: client.get_latest_blockhash(Confirmed), "getLatestBlockhash")
+            recent_blockhash = blockhash_resp.value.blockhash
+
+            # Create transfer instruction
+            transfer_ix = transfer(
+                TransferParams(
+                    from_pubkey=kp.pubkey(),
+                    to_pubkey=to_pubkey,
+                    lamports=lamports,
                 )
+            )
 
-                # Build and sign transaction
-                tx = Transaction.new_signed_with_payer(
-                    [transfer_ix],
-                    kp.pubkey(),
-                    [kp],
-                    recent_blockhash
-                )
+            # Build and sign transaction
+            tx = Transaction.new_signed_with_payer(
+                [transfer_ix],
+                kp.pubkey(),
+                [kp],
+                recent_blockhash
+            )
 
-                # Send transaction (skip preflight to avoid stale blockhash)
-                opts = TxOpts(skip_preflight=True)
-                resp = await client.send_raw_transaction(bytes(tx), opts)
-                tx_sig = str(resp.value)
-                logger.info(f"[TRANSFER] Success! TX: {tx_sig}")
-                return tx_sig
+            # Send transaction (skip preflight to avoid stale blockhash)
+            # Failover re-sends these same signed bytes, so it can't pay twice
+            opts = TxOpts(skip_preflight=True)
+            raw_tx = bytes(tx)
+            resp = await rpc.send(lambda client: client.send_raw_transaction(raw_tx, opts))
+            tx_sig = str(resp.value)
+            logger.info(f"[TRANSFER] Success! TX: {tx_sig}")
+            return tx_sig
 
         except Exception as e:
             last_error = e
@@ -137,9 +248,8 @@ async def get_latest_blockhash(rpc_url: str) -> str:
         Blockhash as string
     """
     try:
-        async with AsyncClient(rpc_url) as client:
-            blockhash_resp = await client.get_latest_blockhash(Confirmed)
-            return str(blockhash_resp.value.blockhash)
+        blockhash_resp = await get_rpc_manager(rpc_url).read(lambda client: client.get_latest_blockhash(Confirmed), "getLatestBlockhash")
+        return str(blockhash_resp.value.blockhash)
     except Exception as e:
         logger.error(f"Error getting blockhash: {e}")
         raise
@@ -176,11 +286,10 @@ async def payout_winner(
     Returns:
         Tuple of (payout_tx_signature, fee_tx_signature)
     """
-    fee_amount = amount_sol * fee_pct
-    payout_amount = amount_sol - fee_amount
+    payout_lamports, _ = split_fee(to_lamports(amount_sol), fee_pct)
 
     # Send winnings to winner
-    payout_tx = await transfer_sol(rpc_url, from_secret, winner_address, payout_amount)
+    payout_tx = await transfer_lamports(rpc_url, from_secret, winner_address, payout_lamports)
 
     # Send fee to treasury (if there's anything left in the wallet)
     # Note: For PVP games, the game wallet might be depleted after payout
@@ -227,70 +336,69 @@ async def verify_deposit_transaction(
     try:
         from solders.signature import Signature
 
-        async with AsyncClient(rpc_url) as client:
-            # Parse signature
-            sig = Signature.from_string(transaction_signature)
+        # Parse signature
+        sig = Signature.from_string(transaction_signature)
 
-            # Get transaction details
-            tx_resp = await client.get_transaction(
-                sig,
-                encoding="jsonParsed",
-                commitment=Confirmed,
-                max_supported_transaction_version=0
-            )
+        # Get transaction details
+        tx_resp = await _read(rpc_url, "getTransaction", (transaction_signature,), lambda client: client.get_transaction(
+            sig,
+            encoding="jsonParsed",
+            commitment=Confirmed,
+            max_supported_transaction_version=0
+        ))
 
-            if not tx_resp.value:
-                logger.warning(f"Transaction not found: {transaction_signature}")
-                return False
+        if not tx_resp.value:
+            logger.warning(f"Transaction not found: {transaction_signature}")
+            return False
 
-            tx = tx_resp.value
+        tx = tx_resp.value
 
-            # Check if transaction was successful
-            if tx.transaction.meta.err is not None:
-                logger.warning(f"Transaction failed: {transaction_signature}")
-                return False
+        # Check if transaction was successful
+        if tx.transaction.meta.err is not None:
+            logger.warning(f"Transaction failed: {transaction_signature}")
+            return False
 
-            # Parse transaction to find transfer instruction
-            # Structure: tx.transaction.transaction.message.instructions
-            instructions = tx.transaction.transaction.message.instructions
+        # Parse transaction to find transfer instruction
+        # Structure: tx.transaction.transaction.message.instructions
+        instructions = tx.transaction.transaction.message.instructions
 
-            # Look for system program transfer instruction
-            found_transfer = False
-            for ix in instructions:
-                # Check if this is a parsed instruction
-                if hasattr(ix, 'parsed') and ix.parsed:
-                    parsed = ix.parsed
+        # Look for system program transfer instruction
+        found_transfer = False
+        for ix in instructions:
+            # Check if this is a parsed instruction
+            if hasattr(ix, 'parsed') and ix.parsed:
+                parsed = ix.parsed
 
-                    # Check if it's a transfer instruction
-                    if parsed.get('type') == 'transfer':
-                        info = parsed.get('info', {})
+                # Check if it's a transfer instruction
+                if parsed.get('type') == 'transfer':
+                    info = parsed.get('info', {})
 
-                        # Verify sender
-                        sender = info.get('source')
-                        if sender != expected_sender:
-                            logger.warning(f"Sender mismatch: expected {expected_sender}, got {sender}")
-                            continue
+                    # Verify sender
+                    sender = info.get('source')
+                    if sender != expected_sender:
+                        logger.warning(f"Sender mismatch: expected {expected_sender}, got {sender}")
+                        continue
 
-                        # Verify recipient
-                        recipient = info.get('destination')
-                        if recipient != expected_recipient:
-                            logger.warning(f"Recipient mismatch: expected {expected_recipient}, got {recipient}")
-                            continue
+                    # Verify recipient
+                    recipient = info.get('destination')
+                    if recipient != expected_recipient:
+                        logger.warning(f"Recipient mismatch: expected {expected_recipient}, got {recipient}")
+                        continue
 
-                        # Verify amount
-                        lamports = info.get('lamports', 0)
-                        actual_amount = lamports / LAMPORTS_PER_SOL
+                    # Verify amount
+                    lamports = info.get('lamports', 0)
+                    actual_amount = lamports / LAMPORTS_PER_SOL
 
-                        if abs(actual_amount - expected_amount) > tolerance:
-                            logger.warning(f"Amount mismatch: expected {expected_amount}, got {actual_amount}")
-                            continue
+                    if abs(actual_amount - expected_amount) > tolerance:
+                        logger.warning(f"Amount mismatch: expected {expected_amount}, got {actual_amount}")
+                        continue
 
-                        # All checks passed
-                        found_transfer = True
-                        logger.info(f"Verified deposit: {actual_amount} SOL from {sender} to {recipient}")
-                        break
+                    # All checks passed
+                    found_transfer = True
+                    logger.info(f"Verified deposit: {actual_amount} SOL from {sender} to {recipient}")
+                    break
 
-            return found_transfer
+        return found_transfer
 
     except Exception as e:
         logger.error(f"Error verifying transaction {transaction_signature}: {e}")
@@ -302,7 +410,8 @@ async def check_escrow_deposit(
     escrow_address: str,
     expected_sender: str,
     expected_amount: float,
-    tolerance: float = 0.001
+    tolerance: float = 0.001,
+    max_age: float = 0.0
 ) -> Optional[str]:
     """Check if escrow has received a deposit from expected sender.
 
@@ -314,86 +423,86 @@ async def check_escrow_deposit(
         expected_sender: Wallet that should send the deposit
         expected_amount: Expected deposit amount in SOL
         tolerance: Amount tolerance (default 0.001 SOL)
+        max_age: Accept chain reads made up to this many seconds ago (for pollers)
 
     Returns:
         Transaction signature if deposit found, None otherwise
     """
     try:
-        async with AsyncClient(rpc_url) as client:
-            # First check balance
-            balance = await get_sol_balance(rpc_url, escrow_address)
-            logger.info(f"[DEPOSIT_CHECK] Escrow {escrow_address[:8]}... balance: {balance} SOL (expecting {expected_amount} from {expected_sender[:8]}...)")
-
-            if balance < expected_amount - tolerance:
-                logger.info(f"[DEPOSIT_CHECK] Balance insufficient: {balance} < {expected_amount}")
-                return None
-
-            # Balance is sufficient - now find the transaction from expected sender
-            escrow_pubkey = Pubkey.from_string(escrow_address)
-
-            # Get recent signatures (last 10 transactions)
-            sigs_resp = await client.get_signatures_for_address(
-                escrow_pubkey,
-                limit=10,
-                commitment=Confirmed
-            )
+        # First check balance
+        balance = await get_sol_balance(rpc_url, escrow_address, max_age)
+        logger.info(f"[DEPOSIT_CHECK] Escrow {escrow_address[:8]}... balance: {balance} SOL (expecting {expected_amount} from {expected_sender[:8]}...)")
 
-            if not sigs_resp.value:
-                logger.warning(f"[DEPOSIT_CHECK] No transactions found for {escrow_address}")
-                return None
+        if balance < expected_amount - tolerance:
+            logger.info(f"[DEPOSIT_CHECK] Balance insufficient: {balance} < {expected_amount}")
+            return None
 
-            logger.info(f"[DEPOSIT_CHECK] Found {len(sigs_resp.value)} transactions to check")
+        # Balance is sufficient - now find the transaction from expected sender
+        escrow_pubkey = Pubkey.from_string(escrow_address)
 
-            # Check each transaction
-            for sig_info in sigs_resp.value:
-                tx_sig = str(sig_info.signature)
+        # Get recent signatures (last 10 transactions)
+        sigs_resp = await _read(rpc_url, "getSignaturesForAddress", (escrow_address, 10), lambda client: client.get_signatures_for_address(
+            escrow_pubkey,
+            limit=10,
+            commitment=Confirmed
+        ), max_age)
 
-                # Get transaction details
-                tx_resp = await client.get_transaction(
-                    sig_info.signature,
-                    encoding="jsonParsed",
-                    commitment=Confirmed,
-                    max_supported_transaction_version=0
-                )
+        if not sigs_resp.value:
+            logger.warning(f"[DEPOSIT_CHECK] No transactions found for {escrow_address}")
+            return None
 
-                if not tx_resp.value:
-                    continue
+        logger.info(f"[DEPOSIT_CHECK] Found {len(sigs_resp.value)} transactions to check")
 
-                tx = tx_resp.value
+        # Check each transaction
+        for sig_info in sigs_resp.value:
+            tx_sig = str(sig_info.signature)
 
-                # Skip failed transactions
-                if tx.transaction.meta.err is not None:
-                    continue
+            # Get transaction details
+            tx_resp = await _read(rpc_url, "getTransaction", (str(sig_info.signature),), lambda client: client.get_transaction(
+                sig_info.signature,
+                encoding="jsonParsed",
+                commitment=Confirmed,
+                max_supported_transaction_version=0
+            ), max_age)
 
-                # Look for transfer instruction
-                instructions = tx.transaction.transaction.message.instructions
+            if not tx_resp.value:
+                continue
 
-                for ix in instructions:
-                    if hasattr(ix, 'parsed') and ix.parsed:
-                        parsed = ix.parsed
+            tx = tx_resp.value
 
-                        if parsed.get('type') == 'transfer':
-                            info = parsed.get('info', {})
+            # Skip failed transactions
+            if tx.transaction.meta.err is not None:
+                continue
 
-                            sender = info.get('source')
-                            recipient = info.get('destination')
-                            lamports = info.get('lamports', 0)
-                            actual_amount = lamports / LAMPORTS_PER_SOL
+            # Look for transfer instruction
+            instructions = tx.transaction.transaction.message.instructions
 
-                            logger.info(f"[DEPOSIT_CHECK] Found transfer: {actual_amount} SOL from {sender[:8]}... to {recipient[:8]}... (expecting to {escrow_address[:8]}...)")
+            for ix in instructions:
+                if hasattr(ix, 'parsed') and ix.parsed:
+                    parsed = ix.parsed
 
-                            # Check if this matches our expected deposit (ACCEPT FROM ANY WALLET!)
-                            # We only check recipient and amount, NOT sender - users can send from any wallet they want
-                            if (recipient == escrow_address and
-                                abs(actual_amount - expected_amount) <= tolerance):
+                    if parsed.get('type') == 'transfer':
+                        info = parsed.get('info', {})
 
-                                logger.info(f"[DEPOSIT_CHECK] ✅ MATCH! Found deposit: {actual_amount} SOL from {sender} to {recipient} (tx: {tx_sig})")
-                                return tx_sig
-                            else:
-                                logger.info(f"[DEPOSIT_CHECK] No match: recipient={recipient==escrow_address}, amount_match={abs(actual_amount - expected_amount) <= tolerance} (diff={abs(actual_amount - expected_amount)})")
+                        sender = info.get('source')
+                        recipient = info.get('destination')
+                        lamports = info.get('lamports', 0)
+                        actual_amount = lamports / LAMPORTS_PER_SOL
 
-            logger.info(f"[DEPOSIT_CHECK] Balance sufficient but no matching transaction from {expected_sender}")
-            return None
+                        logger.info(f"[DEPOSIT_CHECK] Found transfer: {actual_amount} SOL from {sender[:8]}... to {recipient[:8]}... (expecting to {escrow_address[:8]}...)")
+
+                        # Check if this matches our expected deposit (ACCEPT FROM ANY WALLET!)
+                        # We only check recipient and amount, NOT sender - users can send from any wallet they want
+                        if (recipient == escrow_address and
+                            abs(actual_amount - expected_amount) <= tolerance):
+
+                            logger.info(f"[DEPOSIT_CHECK] ✅ MATCH! Found deposit: {actual_amount} SOL from {sender} to {recipient} (tx: {tx_sig})")
+                            return tx_sig
+                        else:
+                            logger.info(f"[DEPOSIT_CHECK] No match: recipient={recipient==escrow_address}, amount_match={abs(actual_amount - expected_amount) <= tolerance} (diff={abs(actual_amount - expected_amount)})")
+
+        logger.info(f"[DEPOSIT_CHECK] Balance sufficient but no matching transaction from {expected_sender}")
+        return None
 
     except Exception as e:
         logger.error(f"[DEPOSIT_CHECK] Error checking deposit: {e}")
@@ -411,58 +520,57 @@ async def get_escrow_sender(rpc_url: str, escrow_address: str) -> Optional[str]:
         Sender wallet address if found, None otherwise
     """
     try:
-        async with AsyncClient(rpc_url) as client:
-            escrow_pubkey = Pubkey.from_string(escrow_address)
-
-            # Get recent signatures
-            sigs_resp = await client.get_signatures_for_address(
-                escrow_pubkey,
-                limit=10,
-                commitment=Confirmed
-            )
+        escrow_pubkey = Pubkey.from_string(escrow_address)
 
-            if not sigs_resp.value:
-                logger.warning(f"[GET_SENDER] No transactions found for {escrow_address}")
-                return None
-
-            # Check each transaction to find a transfer TO this escrow
-            for sig_info in sigs_resp.value:
-                # Get transaction details
-                tx_resp = await client.get_transaction(
-                    sig_info.signature,
-                    encoding="jsonParsed",
-                    commitment=Confirmed,
-                    max_supported_transaction_version=0
-                )
+        # Get recent signatures
+        sigs_resp = await _read(rpc_url, "getSignaturesForAddress", (escrow_address, 10), lambda client: client.get_signatures_for_address(
+            escrow_pubkey,
+            limit=10,
+            commitment=Confirmed
+        ))
 
-                if not tx_resp.value:
-                    continue
+        if not sigs_resp.value:
+            logger.warning(f"[GET_SENDER] No transactions found for {escrow_address}")
+            return None
 
-                tx = tx_resp.value
+        # Check each transaction to find a transfer TO this escrow
+        for sig_info in sigs_resp.value:
+            # Get transaction details
+            tx_resp = await _read(rpc_url, "getTransaction", (str(sig_info.signature),), lambda client: client.get_transaction(
+                sig_info.signature,
+                encoding="jsonParsed",
+                commitment=Confirmed,
+                max_supported_transaction_version=0
+            ))
 
-                # Skip failed transactions
-                if tx.transaction.meta.err is not None:
-                    continue
+            if not tx_resp.value:
+                continue
 
-                # Look for transfer instruction TO the escrow
-                instructions = tx.transaction.transaction.message.instructions
+            tx = tx_resp.value
 
-                for ix in instructions:
-                    if hasattr(ix, 'parsed') and ix.parsed:
-                        parsed = ix.parsed
+            # Skip failed transactions
+            if tx.transaction.meta.err is not None:
+                continue
 
-                        if parsed.get('type') == 'transfer':
-                            info = parsed.get('info', {})
-                            sender = info.get('source')
-                            recipient = info.get('destination')
+            # Look for transfer instruction TO the escrow
+            instructions = tx.transaction.transaction.message.instructions
 
-                            # Found a transfer TO this escrow
-                            if recipient == escrow_address:
-                                logger.info(f"[GET_SENDER] Found sender {sender} for escrow {escrow_address}")
-                                return sender
+            for ix in instructions:
+                if hasattr(ix, 'parsed') and ix.parsed:
+                    parsed = ix.parsed
 
-            logger.warning(f"[GET_SENDER] No transfer found to escrow {escrow_address}")
-            return None
+                    if parsed.get('type') == 'transfer':
+                        info = parsed.get('info', {})
+                        sender = info.get('source')
+                        recipient = info.get('destination')
+
+                        # Found a transfer TO this escrow
+                        if recipient == escrow_address:
+                            logger.info(f"[GET_SENDER] Found sender {sender} for escrow {escrow_address}")
+                            return sender
+
+        logger.warning(f"[GET_SENDER] No transfer found to escrow {escrow_address}")
+        return None
 
     except Exception as e:
         logger.error(f"[GET_SENDER] Error finding sender: {e}")
@@ -497,66 +605,65 @@ async def verify_deposit_to_escrow(
         logger.info(f"[ESCROW_VERIFY] Expected recipient: {expected_recipient}")
         logger.info(f"[ESCROW_VERIFY] Expected amount: {expected_amount} SOL")
 
-        async with AsyncClient(rpc_url) as client:
-            # Parse signature
-            sig = Signature.from_string(transaction_signature)
+        # Parse signature
+        sig = Signature.from_string(transaction_signature)
 
-            # Get transaction details
-            tx_resp = await client.get_transaction(
-                sig,
-                encoding="jsonParsed",
-                commitment=Confirmed,
-                max_supported_transaction_version=0
-            )
+        # Get transaction details
+        tx_resp = await _read(rpc_url, "getTransaction", (transaction_signature,), lambda client: client.get_transaction(
+            sig,
+            encoding="jsonParsed",
+            commitment=Confirmed,
+            max_supported_transaction_version=0
+        ))
 
-            if not tx_resp.value:
-                logger.warning(f"[ESCROW_VERIFY] Transaction not found: {transaction_signature}")
-                return False
+        if not tx_resp.value:
+            logger.warning(f"[ESCROW_VERIFY] Transaction not found: {transaction_signature}")
+            return False
 
-            tx = tx_resp.value
+        tx = tx_resp.value
 
-            # Check if transaction was successful
-            if tx.transaction.meta.err is not None:
-                logger.warning(f"[ESCROW_VERIFY] Transaction failed on-chain: {transaction_signature}")
-                return False
+        # Check if transaction was successful
+        if tx.transaction.meta.err is not None:
+            logger.warning(f"[ESCROW_VERIFY] Transaction failed on-chain: {transaction_signature}")
+            return False
 
-            # Parse transaction to find transfer instruction
-            instructions = tx.transaction.transaction.message.instructions
+        # Parse transaction to find transfer instruction
+        instructions = tx.transaction.transaction.message.instructions
 
-            # Look for system program transfer instruction
-            for ix in instructions:
-                # Check if this is a parsed instruction
-                if hasattr(ix, 'parsed') and ix.parsed:
-                    parsed = ix.parsed
+        # Look for system program transfer instruction
+        for ix in instructions:
+            # Check if this is a parsed instruction
+            if hasattr(ix, 'parsed') and ix.parsed:
+                parsed = ix.parsed
 
-                    # Check if it's a transfer instruction
-                    if parsed.get('type') == 'transfer':
-                        info = parsed.get('info', {})
+                # Check if it's a transfer instruction
+                if parsed.get('type') == 'transfer':
+                    info = parsed.get('info', {})
 
-                        # Verify recipient (escrow)
-                        recipient = info.get('destination')
-                        logger.info(f"[ESCROW_VERIFY] Found transfer to: {recipient}")
+                    # Verify recipient (escrow)
+                    recipient = info.get('destination')
+                    logger.info(f"[ESCROW_VERIFY] Found transfer to: {recipient}")
 
-                        if recipient != expected_recipient:
-                            logger.warning(f"[ESCROW_VERIFY] Recipient mismatch: expected {expected_recipient}, got {recipient}")
-                            continue
+                    if recipient != expected_recipient:
+                        logger.warning(f"[ESCROW_VERIFY] Recipient mismatch: expected {expected_recipient}, got {recipient}")
+                        continue
 
-                        # Verify amount
-                        lamports = info.get('lamports', 0)
-                        actual_amount = lamports / LAMPORTS_PER_SOL
-                        logger.info(f"[ESCROW_VERIFY] Transfer amount: {actual_amount} SOL")
+                    # Verify amount
+                    lamports = info.get('lamports', 0)
+                    actual_amount = lamports / LAMPORTS_PER_SOL
+                    logger.info(f"[ESCROW_VERIFY] Transfer amount: {actual_amount} SOL")
 
-                        if abs(actual_amount - expected_amount) > tolerance:
-                            logger.warning(f"[ESCROW_VERIFY] Amount mismatch: expected {expected_amount}, got {actual_amount} (diff: {abs(actual_amount - expected_amount)})")
-                            continue
+                    if abs(actual_amount - expected_amount) > tolerance:
+                        logger.warning(f"[ESCROW_VERIFY] Amount mismatch: expected {expected_amount}, got {actual_amount} (diff: {abs(actual_amount - expected_amount)})")
+                        continue
 
-                        # All checks passed!
-                        sender = info.get('source', 'unknown')
-                        logger.info(f"[ESCROW_VERIFY] SUCCESS! Verified {actual_amount} SOL from {sender} to {recipient}")
-                        return True
+                    # All checks passed!
+                    sender = info.get('source', 'unknown')
+                    logger.info(f"[ESCROW_VERIFY] SUCCESS! Verified {actual_amount} SOL from {sender} to {recipient}")
+                    return True
 
-            logger.warning(f"[ESCROW_VERIFY] No matching transfer found in transaction")
-            return False
+        logger.warning(f"[ESCROW_VERIFY] No matching transfer found in transaction")
+        return False
 
     except Exception as e:
         logger.error(f"[ESCROW_VERIFY] Error verifying transaction {transaction_signature}: {e}", exc_info=True)
@@ -0,0 +1,215 @@
+"""
+In-memory public leaderboards, maintained incrementally from game results.
+
+Three boards - top winners (total won), top volume (total wagered) and
+biggest wins (each player's best single payout) - over three windows:
+the last 24 hours, the last 7 days and all time. Each board is a bounded
+top-K structure, so a settlement costs a few dictionary updates and never
+a query over `users` or `games`.
+
+The durable side is the `leaderboard_stats` rollup (hourly rows plus one
+all-time row per player), written in the same transaction as each game:
+on startup load() rebuilds the windows from the last 7 days of hourly
+rows and seeds the all-time boards from its indexed top-K. Windows move
+by whole hours - "24h" is the current hour plus the 23 before it.
+"""
+import os
+import heapq
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from database import LeaderboardStats
+from database.rollups import rollup_hour
+from money import to_lamports
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", "10"))
+
+# Window -> length in hours (None = all time)
+WINDOWS: Dict[str, Optional[int]] = {"24h": 24, "7d": 7 * 24, "all": None}
+
+# Board -> LeaderboardStats field it ranks by
+BOARDS = {"winners": "won", "volume": "wagered", "biggest_wins": "best_win"}
+
+# Per-player totals in lamports: [wagered, won, best_win, best_game_id]
+Totals = list
+_FIELD_INDEX = {"wagered": 0, "won": 1, "best_win": 2}
+
+
+class TopK:
+    """The k largest values seen per user_id, for values that only ever grow.
+
+    Ties rank the lower user_id first, so a board rebuilt from the rollup
+    after a restart matches the one built incrementally. A min-heap over
+    the current members finds the entry to evict; entries left behind
+    when a member's value grows are skipped lazily.
+    """
+
+    def __init__(self, k: int):
+        self.k = max(1, k)
+        self._members: Dict[int, Tuple[int, object]] = {}  # user_id -> (value, payload)
+        self._heap: List[Tuple[int, int]] = []  # (value, -user_id): smallest is evicted first
+
+    def offer(self, key: int, value: int, payload: object = None) -> bool:
+        """Record a key's new value. Returns True if the top-K changed."""
+        if value <= 0:
+            return False
+        current = self._members.get(key)
+        if current is not None:
+            if value <= current[0]:
+                return False  # Out-of-order or unchanged
+        elif len(self._members) >= self.k:
+            self._drop_stale()
+            if (value, -key) <= self._heap[0]:
+                return False
+            _, evicted = heapq.heappop(self._heap)
+            del self._members[-evicted]
+
+        self._members[key] = (value, payload)
+        heapq.heappush(self._heap, (value, -key))
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(value, -key) for key, (value, _) in self._members.items()]
+            heapq.heapify(self._heap)
+        return True
+
+    def rebuild(self, items: Iterable[Tuple[int, int, object]]):
+        """Replace the contents with the top k of (user_id, value, payload) items."""
+        top = heapq.nlargest(self.k, (item for item in items if item[1] > 0), key=lambda item: (item[1], -item[0]))
+        self._members = {key: (value, payload) for key, value, payload in top}
+        self._heap = [(value, -key) for key, value, _ in top]
+        heapq.heapify(self._heap)
+
+    def top(self) -> List[Tuple[int, int, object]]:
+        """Members as (user_id, value, payload), largest first."""
+        ranked = sorted(self._members.items(), key=lambda member: (-member[1][0], member[0]))
+        return [(key, value, payload) for key, (value, payload) in ranked]
+
+    def _drop_stale(self):
+        while self._heap:
+            value, neg_key = self._heap[0]
+            member = self._members.get(-neg_key)
+            if member is not None and member[0] == value:
+                return
+            heapq.heappop(self._heap)
+
+
+class Leaderboards:
+    """Top-K boards per window, fed by settlements.
+
+    Not thread-safe: call it from the event loop only.
+    """
+
+    def __init__(self, size: int = LEADERBOARD_SIZE):
+        self.size = size
+        # Hour key -> user_id -> Totals, for the longest window
+        self._hours: Dict[str, Dict[int, Totals]] = {}
+        # Windowed per-player totals, summed over that window's hours
+        self._totals: Dict[str, Dict[int, Totals]] = {w: {} for w, hours in WINDOWS.items() if hours}
+        self._boards: Dict[str, Dict[str, TopK]] = {
+            window: {board: TopK(size) for board in BOARDS} for window in WINDOWS
+        }
+        self._current_hour: Optional[str] = None
+
+    def load(self, hours: Iterable[LeaderboardStats], all_time: Iterable[LeaderboardStats]):
+        """Rebuild from the leaderboard rollup (hourly rows + top all-time rows)."""
+        self._hours = {}
+        for row in hours:
+            self._hours.setdefault(row.period, {})[row.user_id] = [
+                to_lamports(row.wagered), to_lamports(row.won), to_lamports(row.best_win), row.best_game_id
+            ]
+        for row in all_time:
+            self._offer("all", row.user_id, [
+                to_lamports(row.wagered), to_lamports(row.won), to_lamports(row.best_win), row.best_game_id
+            ])
+        self._current_hour = None
+        self.roll(datetime.utcnow())
+        logger.info(f"Leaderboards loaded from {len(self._hours)} hourly rollups")
+
+    def record(self, settled_at: datetime, game_id: str, player_ids: Iterable[int], winner_id: int,
+               amount: int, payout: int, all_time: Iterable[LeaderboardStats]):
+        """Add one settled game.
+
+        Args:
+            settled_at: Settlement time (picks the hour bucket)
+            amount: Stake per player (lamports)
+            payout: Credited to the winner (lamports)
+            all_time: The players' all-time rollup rows after this game
+                (from Database.record_game_result)
+        """
+        self.roll(datetime.utcnow())
+        hour = rollup_hour(settled_at)
+        if hour >= self._window_start("7d"):
+            bucket = self._hours.setdefault(hour, {})
+            for player_id in player_ids:
+                won = payout if player_id == winner_id else 0
+                self._add(bucket, player_id, amount, won, game_id)
+                for window, hours in WINDOWS.items():
+                    if hours and hour >= self._window_start(window):
+                        self._add(self._totals[window], player_id, amount, won, game_id)
+                        self._offer(window, player_id, self._totals[window][player_id])
+
+        for row in all_time:
+            self._offer("all", row.user_id, [
+                to_lamports(row.wagered), to_lamports(row.won), to_lamports(row.best_win), row.best_game_id
+            ])
+
+    def roll(self, now: datetime) -> bool:
+        """Move the windows to the hour holding `now`. Returns True if they moved."""
+        hour = rollup_hour(now)
+        if hour == self._current_hour:
+            return False
+        self._current_hour = hour
+
+        oldest = self._window_start("7d")
+        self._hours = {h: bucket for h, bucket in self._hours.items() if h >= oldest}
+
+        # Expired hours can't be subtracted from a max, so windows are re-summed (hourly)
+        for window, totals in self._totals.items():
+            start = self._window_start(window)
+            totals.clear()
+            for h, bucket in sorted(self._hours.items()):
+                if h >= start:
+                    for user_id, (wagered, won, best_win, best_game_id) in bucket.items():
+                        self._add(totals, user_id, wagered, won, best_game_id, best_win)
+            for board, field in BOARDS.items():
+                index = _FIELD_INDEX[field]
+                self._boards[window][board].rebuild(
+                    (user_id, t[index], t[3] if field == "best_win" else None) for user_id, t in totals.items()
+                )
+        return True
+
+    def top(self, window: str) -> Dict[str, List[Tuple[int, int, Optional[str]]]]:
+        """Each board of a window as (user_id, lamports, best_game_id or None), best first."""
+        return {board: topk.top() for board, topk in self._boards[window].items()}
+
+    def seconds_until_roll(self) -> float:
+        """Seconds until the windows next move (the top of the hour)."""
+        now = datetime.utcnow()
+        return 3600 - (now.minute * 60 + now.second + now.microsecond / 1e6)
+
+    def _window_start(self, window: str) -> str:
+        """Oldest hour key inside a window."""
+        now = datetime.strptime(self._current_hour, "%Y-%m-%dT%H") if self._current_hour else datetime.utcnow()
+        return rollup_hour(now - timedelta(hours=WINDOWS[window] - 1))
+
+    @staticmethod
+    def _add(totals: Dict[int, Totals], user_id: int, wagered: int, won: int,
+             game_id: Optional[str], best_win: Optional[int] = None):
+        best_win = won if best_win is None else best_win
+        entry = totals.get(user_id)
+        if entry is None:
+            totals[user_id] = [wagered, won, best_win, game_id if best_win else None]
+            return
+        entry[0] += wagered
+        entry[1] += won
+        if best_win > entry[2]:
+            entry[2], entry[3] = best_win, game_id
+
+    def _offer(self, window: str, user_id: int, totals: Totals):
+        boards = self._boards[window]
+        boards["winners"].offer(user_id, totals[1])
+        boards["volume"].offer(user_id, totals[0])
+        boards["biggest_wins"].offer(user_id, totals[2], totals[3])
+
@@ -0,0 +1,66 @@
+"""
+Integer lamport arithmetic for fees, payouts and commissions.
+
+SOL amounts are converted to lamports once, at the edge (user input,
+database rows, RPC balances). Every split after that is integer-only, so
+the parts always add up exactly to the whole and nothing is lost to
+float rounding between the calculation and the transfer.
+"""
+from typing import List, Sequence, Tuple
+
+LAMPORTS_PER_SOL = 1_000_000_000
+
+# Fee and commission rates are applied in parts per million
+RATE_SCALE = 1_000_000
+
+
+def to_lamports(sol: float) -> int:
+    """SOL -> lamports, rounded to the nearest lamport.
+
+    Rounds rather than truncates: 0.29 SOL is 289999999.99999994 as a
+    float product, and must still become 290000000 lamports.
+    """
+    return round(sol * LAMPORTS_PER_SOL)
+
+
+def to_sol(lamports: int) -> float:
+    """Lamports -> SOL, for display and API responses."""
+    return lamports / LAMPORTS_PER_SOL
+
+
+def rate_ppm(rate: float) -> int:
+    """Fractional rate (e.g. 0.019) -> parts per million (19000)."""
+    return round(rate * RATE_SCALE)
+
+
+def apply_rate(lamports: int, rate: float) -> int:
+    """`rate` of an amount, rounded down to a whole lamport."""
+    return lamports * rate_ppm(rate) // RATE_SCALE
+
+
+def split_fee(lamports: int, fee_rate: float) -> Tuple[int, int]:
+    """Split an amount into (payout, fee).
+
+    The payout is rounded down and the fee takes the remainder, so
+    payout + fee == lamports exactly.
+    """
+    payout = lamports * (RATE_SCALE - rate_ppm(fee_rate)) // RATE_SCALE
+    return payout, lamports - payout
+
+
+def pro_rata(total: int, weights: Sequence[int]) -> List[int]:
+    """Divide `total` lamports in proportion to integer weights.
+
+    Largest-remainder rounding: every share is within one lamport of its
+    exact value and the shares sum to exactly `total`.
+    """
+    weight_sum = sum(weights)
+    if weight_sum <= 0:
+        return [0] * len(weights)
+
+    shares = [total * w // weight_sum for w in weights]
+    leftover = total - sum(shares)
+    by_remainder = sorted(range(len(weights)), key=lambda i: (total * weights[i]) % weight_sum, reverse=True)
+    for i in by_remainder[:leftover]:
+        shares[i] += 1
+    return shares
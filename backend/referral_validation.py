@@ -7,6 +7,7 @@ circular referrals, and wallet-based abuse detection.
 import logging
 from typing import Tuple
 from database import Database, User
+from money import LAMPORTS_PER_SOL, to_sol
 
 logger = logging.getLogger(__name__)
 
@@ -232,17 +233,18 @@ def check_referral_abuse_patterns(db: Database) -> list:
             total_wagered,
             referral_earnings
         FROM users
-        WHERE total_referrals > 10 AND total_wagered < 1.0
-    """)
+        WHERE total_referrals > 10 AND total_wagered < ?
+    """, (LAMPORTS_PER_SOL,))
 
     for row in cursor.fetchall():
+        total_wagered = to_sol(row[2])
         suspicious.append({
             "type": "high_refs_low_volume",
             "user_id": row[0],
             "total_referrals": row[1],
-            "total_wagered": row[2],
-            "referral_earnings": row[3],
-            "details": f"User {row[0]} has {row[1]} referrals but only {row[2]} SOL wagered"
+            "total_wagered": total_wagered,
+            "referral_earnings": to_sol(row[3]),
+            "details": f"User {row[0]} has {row[1]} referrals but only {total_wagered} SOL wagered"
         })
 
     conn.close()
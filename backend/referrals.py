@@ -8,8 +8,9 @@ import logging
 from typing import Tuple
 from solders.keypair import Keypair
 
-from database import Database, User
-from game.solana_ops import transfer_sol, get_sol_balance
+from database import AsyncDatabase, User
+from game.solana_ops import transfer_lamports, get_sol_balance
+from money import to_lamports, to_sol, apply_rate
 from utils.encryption import encrypt_secret, decrypt_secret
 from security import audit_logger, AuditEventType, AuditSeverity
 
@@ -19,14 +20,14 @@ logger = logging.getLogger(__name__)
 async def get_or_create_referral_escrow(
     user: User,
     encryption_key: str,
-    db: Database
+    db: AsyncDatabase
 ) -> Tuple[str, str]:
     """Get or create referral payout escrow for user.
 
     Args:
         user: User object
         encryption_key: Encryption key for storing private key
-        db: Database instance
+        db: AsyncDatabase instance
 
     Returns:
         Tuple of (escrow_address, encrypted_secret)
@@ -43,7 +44,7 @@ async def get_or_create_referral_escrow(
     # Save to user
     user.referral_payout_escrow_address = escrow_address
     user.referral_payout_escrow_secret = encrypted_secret
-    db.save_user(user)
+    await db.save_user(user)
 
     logger.info(f"Created referral escrow for user {user.user_id}: {escrow_address}")
 
@@ -60,22 +61,22 @@ async def get_or_create_referral_escrow(
 
 async def send_referral_commission(
     referrer: User,
-    commission_amount: float,
+    commission_lamports: int,
     from_wallet_secret: str,
     rpc_url: str,
     encryption_key: str,
-    db: Database,
+    db: AsyncDatabase,
     game_id: str
 ) -> str:
     """Send referral commission to referrer's escrow wallet.
 
     Args:
         referrer: Referrer user object
-        commission_amount: Amount to send (in SOL)
+        commission_lamports: Amount to send (in lamports)
         from_wallet_secret: Treasury wallet secret key
         rpc_url: Solana RPC URL
         encryption_key: Encryption key
-        db: Database instance
+        db: AsyncDatabase instance
         game_id: Game ID for tracking
 
     Returns:
@@ -85,19 +86,18 @@ async def send_referral_commission(
     escrow_address, _ = await get_or_create_referral_escrow(referrer, encryption_key, db)
 
     # Send commission to escrow
-    tx_sig = await transfer_sol(
-        rpc_url=rpc_url,
-        from_secret=from_wallet_secret,
-        to_pubkey=escrow_address,
-        amount_sol=commission_amount
+    tx_sig = await transfer_lamports(
+        rpc_url,
+        from_wallet_secret,
+        escrow_address,
+        commission_lamports
     )
 
-    # Update referrer's total earnings
-    referrer.referral_earnings += commission_amount
-    db.save_user(referrer)
+    # Update referrer's total earnings (atomic increment, safe against concurrent settlements)
+    await db.add_referral_totals(referrer.user_id, earnings=commission_lamports)
 
     logger.info(
-        f"Sent {commission_amount:.6f} SOL referral commission to user {referrer.user_id} "
+        f"Sent {to_sol(commission_lamports):.6f} SOL referral commission to user {referrer.user_id} "
         f"(escrow: {escrow_address[:8]}...{escrow_address[-4:]}) | TX: {tx_sig}"
     )
 
@@ -106,7 +106,7 @@ async def send_referral_commission(
         event_type=AuditEventType.REFERRAL_COMMISSION,
         severity=AuditSeverity.INFO,
         user_id=referrer.user_id,
-        details=f"Referral commission: {commission_amount:.6f} SOL for game {game_id} | TX: {tx_sig}"
+        details=f"Referral commission: {to_sol(commission_lamports):.6f} SOL for game {game_id} | TX: {tx_sig}"
     )
 
     return tx_sig
@@ -115,6 +115,10 @@ async def send_referral_commission(
 # Minimum SOL to keep in referral escrow for rent + future tx fees
 REFERRAL_ESCROW_RENT_MINIMUM = 0.01
 
+# Treasury fee on referral claims, and the network fee reserved per transfer
+CLAIM_FEE_RATE = 0.01
+TX_FEE_LAMPORTS = 5_000
+
 
 async def get_referral_escrow_balance(
     user: User,
@@ -170,7 +174,7 @@ async def claim_referral_earnings(
     rpc_url: str,
     encryption_key: str,
     treasury_wallet: str,
-    db: Database
+    db: AsyncDatabase
 ) -> Tuple[bool, str, float]:
     """Claim referral earnings from escrow to payout wallet.
 
@@ -182,7 +186,7 @@ async def claim_referral_earnings(
         rpc_url: Solana RPC URL
         encryption_key: Encryption key for decrypting escrow secret
         treasury_wallet: Treasury wallet address (receives 1% fee)
-        db: Database instance
+        db: AsyncDatabase instance
 
     Returns:
         Tuple of (success, message, amount_claimed)
@@ -195,8 +199,8 @@ async def claim_referral_earnings(
     if not user.referral_payout_escrow_address or not user.referral_payout_escrow_secret:
         return False, "You have no referral earnings to claim yet.", 0.0
 
-    # Get claimable balance (amount above rent threshold)
-    claimable = await get_claimable_referral_balance(user, rpc_url)
+    # Get claimable balance (amount above rent threshold), in lamports from here on
+    claimable = to_lamports(await get_claimable_referral_balance(user, rpc_url))
 
     if claimable <= 0:
         raw_balance = await get_referral_escrow_balance(user, rpc_url)
@@ -210,35 +214,37 @@ async def claim_referral_earnings(
         return False, "Error accessing your referral escrow. Please contact support.", 0.0
 
     # Calculate amounts (1% treasury fee on claimable amount)
-    treasury_fee_amount = claimable * 0.01
-    tx_fee_reserve = 0.000005 * 2  # Two transactions (to treasury, to user)
-    user_claim_amount = claimable - treasury_fee_amount - tx_fee_reserve
+    treasury_fee = apply_rate(claimable, CLAIM_FEE_RATE)
+    tx_fee_reserve = TX_FEE_LAMPORTS * 2  # Two transactions (to treasury, to user)
+    user_claim = claimable - treasury_fee - tx_fee_reserve
+
+    if user_claim <= 0:
+        return False, f"Claimable amount too low after fees ({to_sol(claimable):.6f} SOL).", 0.0
 
-    if user_claim_amount <= 0:
-        return False, f"Claimable amount too low after fees ({claimable:.6f} SOL).", 0.0
+    user_claim_amount = to_sol(user_claim)
+    treasury_fee_amount = to_sol(treasury_fee)
 
     try:
         # Send treasury fee
-        treasury_tx = await transfer_sol(
-            rpc_url=rpc_url,
-            from_secret=escrow_secret,
-            to_pubkey=treasury_wallet,
-            amount_sol=treasury_fee_amount
+        treasury_tx = await transfer_lamports(
+            rpc_url,
+            escrow_secret,
+            treasury_wallet,
+            treasury_fee
         )
 
         logger.info(f"Treasury fee collected: {treasury_fee_amount:.6f} SOL from user {user.user_id} claim | TX: {treasury_tx}")
 
         # Send remainder to user's payout wallet (leaving rent minimum in escrow)
-        payout_tx = await transfer_sol(
-            rpc_url=rpc_url,
-            from_secret=escrow_secret,
-            to_pubkey=user.payout_wallet,
-            amount_sol=user_claim_amount
+        payout_tx = await transfer_lamports(
+            rpc_url,
+            escrow_secret,
+            user.payout_wallet,
+            user_claim
         )
 
-        # Update user stats
-        user.total_referral_claimed += user_claim_amount
-        db.save_user(user)
+        # Update user stats (atomic increment; re-read the user to see the new total)
+        await db.add_referral_totals(user.user_id, claimed=user_claim)
 
         logger.info(
             f"Referral claim successful: User {user.user_id} claimed {user_claim_amount:.6f} SOL "
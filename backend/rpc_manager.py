@@ -3,17 +3,60 @@ RPC Manager with automatic failover and circuit breaker pattern.
 
 CRITICAL: Prevents platform downtime when primary RPC fails.
 Automatically switches to backup RPC endpoints.
+
+Every Solana call in game.solana_ops and token_checker goes through a
+manager. Endpoints are ranked per method class (reads vs. sends) by their
+expected time to a successful answer: an EWMA of latency divided by the
+EWMA success rate. A request goes to the best-ranked endpoint whose
+circuit is closed and fails over down the ranking. A JSON-RPC error
+answer (RPCException, e.g. an unknown account) is the endpoint working
+and is raised straight away; only transport and HTTP errors fail over.
+Send failover re-sends the same signed transaction bytes, which is safe:
+a transaction can only land once per signature.
+
+Hedged reads (opt-in, RPC_HEDGING_ENABLED): when an idempotent read in
+HEDGED_METHODS hasn't been answered within the primary endpoint's rolling
+p90 for that method, the same request is also sent to the next endpoint
+and the first answer wins. A token bucket caps hedges at RPC_HEDGE_MAX_RATE
+of hedgeable reads, so a struggling endpoint can't double the load on the
+others.
 """
 import logging
 import os
+import time
 import asyncio
-from typing import List, Callable, Any
+from typing import Awaitable, Callable, Dict, List, Optional, Any
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import defaultdict, deque
 from enum import Enum
 
+from solana.rpc.core import RPCException
+
 logger = logging.getLogger(__name__)
 
+# Endpoint scoring (override via environment)
+RPC_EWMA_ALPHA = float(os.getenv("RPC_EWMA_ALPHA", "0.2"))  # Weight of the newest sample
+RPC_LATENCY_PRIOR_MS = float(os.getenv("RPC_LATENCY_PRIOR_MS", "250"))  # Assumed for unmeasured endpoints
+RPC_PROBE_INTERVAL_SECONDS = int(os.getenv("RPC_PROBE_INTERVAL_SECONDS", "30"))
+
+# Hedged reads (override via environment)
+RPC_HEDGING_ENABLED = os.getenv("RPC_HEDGING_ENABLED", "false").lower() == "true"
+RPC_HEDGE_MAX_RATE = float(os.getenv("RPC_HEDGE_MAX_RATE", "0.05"))  # Hedges per hedgeable read
+RPC_HEDGE_BURST = float(os.getenv("RPC_HEDGE_BURST", "10"))  # Hedges allowed back to back
+RPC_HEDGE_WINDOW = 100  # Latest latencies per (endpoint, method) behind the p90
+RPC_HEDGE_MIN_SAMPLES = 20  # No hedging until the p90 means something
+
+# Idempotent reads that may be sent to two endpoints at once
+HEDGED_METHODS = frozenset({"getBalance", "getTransaction", "getSignaturesForAddress", "getLatestBlockhash"})
+
+# Method classes, scored separately
+READ = "read"
+SEND = "send"
+METHOD_CLASSES = (READ, SEND)
+
+# Request: runs one RPC call on the client it is given
+RPCRequest = Callable[[Any], Awaitable[Any]]
+
 
 class CircuitState(Enum):
     """Circuit breaker states."""
@@ -22,6 +65,37 @@ class CircuitState(Enum):
     HALF_OPEN = "half_open"  # Testing if service recovered
 
 
+class MethodStats:
+    """EWMA latency and error rate of one endpoint for one method class."""
+
+    __slots__ = ("latency_ms", "error_rate", "requests", "errors")
+
+    def __init__(self):
+        self.latency_ms: Optional[float] = None  # Successful calls only
+        self.error_rate = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    def record(self, ok: bool, latency_ms: Optional[float] = None):
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+        self.error_rate += RPC_EWMA_ALPHA * ((0.0 if ok else 1.0) - self.error_rate)
+        if ok and latency_ms is not None:
+            if self.latency_ms is None:
+                self.latency_ms = latency_ms
+            else:
+                self.latency_ms += RPC_EWMA_ALPHA * (latency_ms - self.latency_ms)
+
+    def get_status(self) -> dict:
+        return {
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "error_rate": round(self.error_rate, 4),
+            "requests": self.requests,
+            "errors": self.errors,
+        }
+
+
 class RPCEndpoint:
     """RPC endpoint with circuit breaker."""
 
@@ -34,17 +108,20 @@ class RPCEndpoint:
         self.last_failure_time = None
         self.last_success_time = None
         self.circuit_state = CircuitState.CLOSED
+        self.methods: Dict[str, MethodStats] = {method_class: MethodStats() for method_class in METHOD_CLASSES}
+        self.latencies: Dict[str, deque] = defaultdict(lambda: deque(maxlen=RPC_HEDGE_WINDOW))  # RPC method -> ms
 
         # Circuit breaker thresholds
         self.failure_threshold = 3  # Open circuit after 3 failures
         self.success_threshold = 2  # Close circuit after 2 successes in half-open
         self.timeout_seconds = 60  # Try again after 60 seconds
 
-    def record_success(self):
+    def record_success(self, method_class: str = READ, latency_ms: Optional[float] = None):
         """Record successful request."""
         self.success_count += 1
         self.total_requests += 1
         self.last_success_time = datetime.utcnow()
+        self.methods[method_class].record(True, latency_ms)
 
         # Reset failure count on success
         self.failure_count = 0
@@ -56,11 +133,12 @@ class RPCEndpoint:
                 self.circuit_state = CircuitState.CLOSED
                 self.success_count = 0  # Reset for next time
 
-    def record_failure(self):
+    def record_failure(self, method_class: str = READ):
         """Record failed request."""
         self.failure_count += 1
         self.total_requests += 1
         self.last_failure_time = datetime.utcnow()
+        self.methods[method_class].record(False)
 
         # Open circuit if threshold exceeded
         if self.failure_count >= self.failure_threshold:
@@ -96,6 +174,28 @@ class RPCEndpoint:
 
         return True
 
+    def p90_ms(self, method: str) -> Optional[float]:
+        """Rolling p90 latency of an RPC method here (None until there are enough samples)."""
+        window = self.latencies.get(method)
+        if window is None or len(window) < RPC_HEDGE_MIN_SAMPLES:
+            return None
+        return sorted(window)[int(0.9 * (len(window) - 1))]
+
+    def expected_ms(self, method_class: str, rank: int = 0) -> float:
+        """Expected time to a successful answer (lower is better).
+
+        Sends that haven't been measured yet borrow the read latency, and a
+        never-measured endpoint gets a prior that keeps the configured
+        order (`rank`) until probes or traffic measure it.
+        """
+        stats = self.methods[method_class]
+        latency = stats.latency_ms
+        if latency is None:
+            latency = self.methods[READ].latency_ms
+        if latency is None:
+            latency = RPC_LATENCY_PRIOR_MS * (rank + 1)
+        return latency / max(1.0 - stats.error_rate, 0.05)
+
     def get_status(self) -> dict:
         """Get endpoint status."""
         return {
@@ -107,42 +207,87 @@ class RPCEndpoint:
             "total_requests": self.total_requests,
             "last_success": self.last_success_time.isoformat() if self.last_success_time else None,
             "last_failure": self.last_failure_time.isoformat() if self.last_failure_time else None,
+            "methods": {method_class: stats.get_status() for method_class, stats in self.methods.items()},
         }
 
 
 class RPCManager:
     """Manage multiple RPC endpoints with automatic failover."""
 
-    def __init__(self):
-        """Initialize RPC manager with multiple endpoints."""
+    def __init__(self, primary_rpc: Optional[str] = None):
+        """Initialize RPC manager with multiple endpoints.
+
+        Args:
+            primary_rpc: Primary endpoint. Defaults to RPC_URL; the configured
+                backups (and the public fallback) only join the configured
+                primary, so a custom endpoint is never failed over to a
+                different network.
+        """
         self.endpoints: List[RPCEndpoint] = []
 
         # Load RPC URLs from environment
-        primary_rpc = os.getenv("RPC_URL") or os.getenv("HELIUS_RPC_URL")
+        configured_rpc = os.getenv("RPC_URL") or os.getenv("HELIUS_RPC_URL")
         backup1_rpc = os.getenv("BACKUP_RPC_URL_1") or os.getenv("QUICKNODE_RPC_URL")
         backup2_rpc = os.getenv("BACKUP_RPC_URL_2")
 
-        if primary_rpc:
-            self.endpoints.append(RPCEndpoint(primary_rpc, "Primary (Helius)"))
+        if primary_rpc and primary_rpc != configured_rpc:
+            self.endpoints.append(RPCEndpoint(primary_rpc, "Custom"))
+        else:
+            if configured_rpc:
+                self.endpoints.append(RPCEndpoint(configured_rpc, "Primary (Helius)"))
 
-        if backup1_rpc:
-            self.endpoints.append(RPCEndpoint(backup1_rpc, "Backup 1 (QuickNode)"))
+            if backup1_rpc:
+                self.endpoints.append(RPCEndpoint(backup1_rpc, "Backup 1 (QuickNode)"))
 
-        if backup2_rpc:
-            self.endpoints.append(RPCEndpoint(backup2_rpc, "Backup 2"))
+            if backup2_rpc:
+                self.endpoints.append(RPCEndpoint(backup2_rpc, "Backup 2"))
 
-        # Public fallback (rate limited but always available)
-        self.endpoints.append(
-            RPCEndpoint("https://api.mainnet-beta.solana.com", "Public Fallback")
-        )
+            # Public fallback (rate limited but always available)
+            public_rpc = "https://api.mainnet-beta.solana.com"
+            if public_rpc not in (e.url for e in self.endpoints):
+                self.endpoints.append(RPCEndpoint(public_rpc, "Public Fallback"))
 
         if not self.endpoints:
             raise ValueError("No RPC endpoints configured! Set RPC_URL environment variable.")
 
+        # Hedging: token bucket and counters
+        self.hedge_tokens = RPC_HEDGE_BURST
+        self.hedgeable_reads = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedges_throttled = 0
+
         logger.info(f"RPC Manager initialized with {len(self.endpoints)} endpoints:")
         for endpoint in self.endpoints:
             logger.info(f"  - {endpoint.name}: {endpoint.url[:50]}...")
 
+    def ranked(self, method_class: str) -> List[RPCEndpoint]:
+        """Endpoints worth trying for a method class, best first.
+
+        If every circuit is open, all endpoints are returned anyway - an
+        attempt that may fail beats refusing every call.
+        """
+        order = sorted(
+            enumerate(self.endpoints),
+            key=lambda item: item[1].expected_ms(method_class, item[0])
+        )
+        endpoints = [endpoint for _, endpoint in order]
+        available = [endpoint for endpoint in endpoints if endpoint.should_attempt()]
+        return available or endpoints
+
+    async def read(self, request: RPCRequest, method: Optional[str] = None, max_retries: int = None) -> Any:
+        """Run an idempotent RPC read, e.g. `manager.read(lambda c: c.get_balance(pubkey), "getBalance")`.
+
+        Args:
+            request: Makes the call on the client it is given (may run on two endpoints at once)
+            method: JSON-RPC method name; reads in HEDGED_METHODS are hedged when enabled
+        """
+        return await self._call(READ, lambda endpoint: request(_client(endpoint)), max_retries, method)
+
+    async def send(self, request: RPCRequest, max_retries: int = None) -> Any:
+        """Submit a transaction. The request must re-send the same signed bytes on every endpoint."""
+        return await self._call(SEND, lambda endpoint: request(_client(endpoint)), max_retries)
+
     async def call_with_failover(
         self,
         method: Callable,
@@ -164,45 +309,78 @@ class RPCManager:
         Raises:
             Exception: If all endpoints fail
         """
-        if max_retries is None:
-            max_retries = len(self.endpoints)
-
-        last_error = None
-        attempts = 0
-
-        for endpoint in self.endpoints:
-            if attempts >= max_retries:
-                break
-
-            # Check circuit breaker
-            if not endpoint.should_attempt():
-                logger.debug(f"Skipping {endpoint.name} - circuit breaker open")
-                continue
-
-            attempts += 1
-
-            try:
-                logger.debug(f"Attempting RPC call via {endpoint.name}...")
-
-                # Call method with this RPC URL
-                result = await method(endpoint.url, *args, **kwargs)
-
-                # Success!
-                endpoint.record_success()
-                logger.debug(f"✅ RPC call succeeded via {endpoint.name}")
+        return await self._call(READ, lambda endpoint: method(endpoint.url, *args, **kwargs), max_retries)
 
-                return result
+    async def _call(self, method_class: str, attempt: Callable[[RPCEndpoint], Awaitable[Any]],
+                    max_retries: Optional[int], method: Optional[str] = None) -> Any:
+        """Try the ranked endpoints in turn until one answers, hedging the first if allowed."""
+        endpoints = self.ranked(method_class)
+        if max_retries is not None:
+            endpoints = endpoints[:max_retries]
 
-            except Exception as e:
-                last_error = e
-                endpoint.record_failure()
+        hedge = (
+            RPC_HEDGING_ENABLED and method_class == READ and method in HEDGED_METHODS and len(endpoints) > 1
+        )
+        if hedge:
+            self.hedgeable_reads += 1
+            self.hedge_tokens = min(RPC_HEDGE_BURST, self.hedge_tokens + RPC_HEDGE_MAX_RATE)
+            hedge_after_ms = endpoints[0].p90_ms(method)
+            hedge = hedge_after_ms is not None
 
-                logger.warning(
-                    f"❌ RPC call failed via {endpoint.name}: {str(e)[:100]}"
-                )
+        last_error = None
+        attempts = 0
+        queue = list(endpoints)
+        in_flight: Dict[asyncio.Task, RPCEndpoint] = {}
+        hedge_endpoint = None
 
-                # Continue to next endpoint
-                continue
+        try:
+            while queue or in_flight:
+                if not in_flight:
+                    # Nothing left running: fail over to the next endpoint
+                    endpoint = queue.pop(0)
+                    attempts += 1
+                    in_flight[asyncio.ensure_future(self._timed(endpoint, method_class, attempt, method))] = endpoint
+
+                # Only the primary's first attempt is hedged
+                timeout = hedge_after_ms / 1000 if hedge and attempts == 1 and queue else None
+                done, _ = await asyncio.wait(in_flight, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    hedge = False
+                    if self.hedge_tokens >= 1:
+                        self.hedge_tokens -= 1
+                        self.hedges += 1
+                        hedge_endpoint = queue.pop(0)
+                        attempts += 1
+                        logger.debug(f"Hedging {method} to {hedge_endpoint.name} after {hedge_after_ms:.0f}ms")
+                        in_flight[asyncio.ensure_future(
+                            self._timed(hedge_endpoint, method_class, attempt, method)
+                        )] = hedge_endpoint
+                    else:
+                        self.hedges_throttled += 1
+                    continue
+
+                for task in done:
+                    endpoint = in_flight.pop(task)
+                    try:
+                        result = task.result()
+                    except RPCException:
+                        raise  # The endpoint answered - with an error another endpoint would repeat
+                    except Exception as e:
+                        last_error = e
+                        logger.warning(
+                            f"❌ RPC {method or method_class} failed via {endpoint.name}: {str(e)[:100]}"
+                        )
+                        continue
+
+                    if endpoint is hedge_endpoint:
+                        self.hedge_wins += 1
+                    logger.debug(f"✅ RPC {method or method_class} succeeded via {endpoint.name}")
+                    return result
+        finally:
+            # The first answer won (or the caller gave up) - stop the rest
+            for task in in_flight:
+                task.cancel()
 
         # All endpoints failed
         logger.error(
@@ -224,6 +402,61 @@ class RPCManager:
 
         raise Exception(f"All RPC endpoints failed. Last error: {last_error}")
 
+    @staticmethod
+    async def _timed(endpoint: RPCEndpoint, method_class: str,
+                     attempt: Callable[[RPCEndpoint], Awaitable[Any]], method: Optional[str]) -> Any:
+        """Run one attempt and record its outcome on the endpoint."""
+        started = time.perf_counter()
+        try:
+            result = await attempt(endpoint)
+        except asyncio.CancelledError:
+            # Lost to a hedge: its latency is at least this, which keeps slow tails in the p90
+            if method:
+                endpoint.latencies[method].append((time.perf_counter() - started) * 1000)
+            raise
+        except RPCException:
+            endpoint.record_success(method_class, (time.perf_counter() - started) * 1000)
+            raise
+        except Exception:
+            endpoint.record_failure(method_class)
+            raise
+        latency_ms = (time.perf_counter() - started) * 1000
+        endpoint.record_success(method_class, latency_ms)
+        if method:
+            endpoint.latencies[method].append(latency_ms)
+        return result
+
+    async def probe(self) -> List[dict]:
+        """Time a cheap read (getSlot) on every endpoint, feeding its read stats.
+
+        Keeps the ranking current for endpoints that get no traffic, and
+        lets an open circuit close once its endpoint is back.
+        """
+        async def probe_one(endpoint: RPCEndpoint) -> dict:
+            started = time.perf_counter()
+            try:
+                await _client(endpoint).get_slot()
+            except RPCException:
+                pass  # Answered
+            except Exception as e:
+                endpoint.record_failure(READ)
+                return {
+                    "endpoint": endpoint.name,
+                    "status": "unhealthy",
+                    "error": str(e)[:100],
+                    "circuit_state": endpoint.circuit_state.value,
+                }
+            latency_ms = (time.perf_counter() - started) * 1000
+            endpoint.record_success(READ, latency_ms)
+            return {
+                "endpoint": endpoint.name,
+                "status": "healthy",
+                "latency_ms": latency_ms,
+                "circuit_state": endpoint.circuit_state.value,
+            }
+
+        return list(await asyncio.gather(*(probe_one(e) for e in self.endpoints)))
+
     def get_status(self) -> dict:
         """Get status of all RPC endpoints."""
         return {
@@ -235,6 +468,19 @@ class RPCManager:
             "failed_endpoints": sum(
                 1 for e in self.endpoints if e.circuit_state == CircuitState.OPEN
             ),
+            # Where the next call of each class goes
+            "preferred": {
+                method_class: self.ranked(method_class)[0].name for method_class in METHOD_CLASSES
+            },
+            "hedging": {
+                "enabled": RPC_HEDGING_ENABLED,
+                "max_rate": RPC_HEDGE_MAX_RATE,
+                "hedgeable_reads": self.hedgeable_reads,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "throttled": self.hedges_throttled,
+                "hedge_rate": round(self.hedges / self.hedgeable_reads, 4) if self.hedgeable_reads else 0.0,
+            },
         }
 
     def reset_all_circuits(self):
@@ -247,8 +493,30 @@ class RPCManager:
         logger.info("All circuit breakers reset")
 
 
-# Global RPC manager instance
-rpc_manager = RPCManager()
+def _client(endpoint: RPCEndpoint):
+    """Shared pooled client for an endpoint."""
+    # Imported here: game.solana_ops imports this module while the game package loads
+    from game.rpc_clients import get_client
+
+    return get_client(endpoint.url)
+
+
+# Managers by primary endpoint, created on first use (after .env is loaded)
+_managers: Dict[Optional[str], RPCManager] = {}
+
+
+def get_rpc_manager(rpc_url: Optional[str] = None) -> RPCManager:
+    """Get the manager whose primary endpoint is rpc_url (default: RPC_URL).
+
+    The configured RPC_URL gets the configured backups; any other URL gets
+    a manager of its own with just that endpoint.
+    """
+    configured_rpc = os.getenv("RPC_URL") or os.getenv("HELIUS_RPC_URL")
+    key = None if rpc_url in (None, configured_rpc) else rpc_url
+    manager = _managers.get(key)
+    if manager is None:
+        manager = _managers[key] = RPCManager(rpc_url)
+    return manager
 
 
 # Helper functions for common RPC operations
@@ -256,10 +524,7 @@ async def get_sol_balance_with_failover(wallet_address: str) -> float:
     """Get SOL balance with automatic RPC failover."""
     from game.solana_ops import get_sol_balance
 
-    return await rpc_manager.call_with_failover(
-        get_sol_balance,
-        wallet_address
-    )
+    return await get_sol_balance(get_rpc_manager().endpoints[0].url, wallet_address)
 
 
 async def transfer_sol_with_failover(
@@ -270,21 +535,14 @@ async def transfer_sol_with_failover(
     """Transfer SOL with automatic RPC failover."""
     from game.solana_ops import transfer_sol
 
-    return await rpc_manager.call_with_failover(
-        transfer_sol,
-        from_secret,
-        to_pubkey,
-        amount_sol
-    )
+    return await transfer_sol(get_rpc_manager().endpoints[0].url, from_secret, to_pubkey, amount_sol)
 
 
 async def get_latest_blockhash_with_failover() -> str:
     """Get latest blockhash with automatic RPC failover."""
     from game.solana_ops import get_latest_blockhash
 
-    return await rpc_manager.call_with_failover(
-        get_latest_blockhash
-    )
+    return await get_latest_blockhash(get_rpc_manager().endpoints[0].url)
 
 
 async def verify_transaction_with_failover(
@@ -293,10 +551,10 @@ async def verify_transaction_with_failover(
     expected_amount: float
 ) -> bool:
     """Verify transaction with automatic RPC failover."""
-    from game.solana_ops import verify_deposit_transaction
+    from game.solana_ops import verify_deposit_to_escrow
 
-    return await rpc_manager.call_with_failover(
-        verify_deposit_transaction,
+    return await verify_deposit_to_escrow(
+        get_rpc_manager().endpoints[0].url,
         tx_signature,
         expected_recipient,
         expected_amount
@@ -310,38 +568,12 @@ async def check_rpc_health() -> dict:
     Returns:
         Dict with health status
     """
-    results = []
-
-    for endpoint in rpc_manager.endpoints:
-        try:
-            # Try simple balance check
-            from game.solana_ops import get_sol_balance
-
-            test_wallet = "So11111111111111111111111111111111111111112"  # Wrapped SOL mint
-            start_time = datetime.utcnow()
-
-            balance = await get_sol_balance(endpoint.url, test_wallet)
-
-            latency_ms = (datetime.utcnow() - start_time).total_seconds() * 1000
-
-            results.append({
-                "endpoint": endpoint.name,
-                "status": "healthy",
-                "latency_ms": latency_ms,
-                "circuit_state": endpoint.circuit_state.value,
-            })
-
-        except Exception as e:
-            results.append({
-                "endpoint": endpoint.name,
-                "status": "unhealthy",
-                "error": str(e)[:100],
-                "circuit_state": endpoint.circuit_state.value,
-            })
+    manager = get_rpc_manager()
+    results = await manager.probe()
 
     return {
         "timestamp": datetime.utcnow().isoformat(),
-        "total_endpoints": len(rpc_manager.endpoints),
+        "total_endpoints": len(manager.endpoints),
         "healthy": sum(1 for r in results if r["status"] == "healthy"),
         "unhealthy": sum(1 for r in results if r["status"] == "unhealthy"),
         "results": results,
@@ -378,10 +610,12 @@ if __name__ == "__main__":
 
         # Show circuit breaker status
         print("\n3. Circuit Breaker Status:")
-        status = rpc_manager.get_status()
+        status = get_rpc_manager().get_status()
         for endpoint in status['endpoints']:
             state_icon = {"closed": "🟢", "open": "🔴", "half_open": "🟡"}[endpoint['circuit_state']]
             print(f"   {state_icon} {endpoint['name']}: {endpoint['circuit_state']}")
             print(f"      Requests: {endpoint['total_requests']}, Failures: {endpoint['failure_count']}")
+            for method_class, stats in endpoint['methods'].items():
+                print(f"      {method_class}: {stats['latency_ms']} ms EWMA, {stats['error_rate']:.1%} errors")
 
     asyncio.run(test())
@@ -0,0 +1,173 @@
+"""
+Database connection pool benchmark.
+
+Compares request throughput of the pooled Database against the previous
+open/close-per-call pattern (fresh sqlite3.connect() on every method call,
+default rollback journal) using the same read-heavy request mix the API
+serves: session lookups, open wager listing, wager/user fetches and a
+wager update.
+
+Usage:
+    python scripts/bench_db_pool.py --seconds 5 --threads 4
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database, User, Wager, CoinSide
+from database.pool import archive_path, close_all_pools
+from database.writer import close_all_writers
+
+
+class OpenPerCallPool:
+    """Stand-in for the pool that reproduces the old connect-per-call behaviour."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.archive_path = archive_path(db_path)
+
+    @contextmanager
+    def connection(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        # Repository reads fall back to the archive, so attach it like ConnectionPool does
+        if self.archive_path:
+            conn.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def close(self):
+        pass
+
+
+class OpenPerCallWriter:
+    """Stand-in for the write queue: every write commits on its own connection."""
+
+    def __init__(self, pool: OpenPerCallPool):
+        self._pool = pool
+
+    def execute(self, func):
+        with self._pool.connection() as conn:
+            result = func(conn)
+            conn.commit()
+        return result
+
+    def close(self):
+        pass
+
+
+def seed(db: Database, users: int, wagers: int):
+    """Populate a fresh database with users and open wagers."""
+    expires = datetime.utcnow() + timedelta(days=1)
+    for i in range(users):
+        user_id = db.save_user(User(
+            user_id=None,
+            email=f"user{i}@example.com",
+            username=f"user{i}",
+            connected_wallet=f"Wallet{i:040d}",
+        ))
+        db.create_session(user_id, f"token-{i}", expires)
+    for i in range(wagers):
+        db.save_wager(Wager(
+            wager_id=f"wager_{i}",
+            creator_id=random.randint(1, users),
+            creator_wallet=f"Wallet{i % users:040d}",
+            creator_side=CoinSide.HEADS,
+            amount=0.1,
+        ))
+
+
+def run_mix(db: Database, users: int, wagers: int, seconds: float, threads: int) -> int:
+    """Run the request mix on `threads` threads and return completed requests."""
+    deadline = time.perf_counter() + seconds
+    counts = [0] * threads
+
+    def worker(slot: int):
+        rng = random.Random(slot)
+        done = 0
+        while time.perf_counter() < deadline:
+            db.get_user_by_session(f"token-{rng.randrange(users)}")
+            db.get_open_wagers(20)
+            wager = db.get_wager(f"wager_{rng.randrange(wagers)}")
+            db.get_user(wager.creator_id)
+            if rng.random() < 0.1:
+                db.save_wager(wager)
+            done += 1
+        counts[slot] = done
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return sum(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pooled vs per-call SQLite connections")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration of each run")
+    parser.add_argument("--threads", type=int, default=4, help="Concurrent request threads")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--wagers", type=int, default=500)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="coinflip-bench-")
+    try:
+        pooled_path = os.path.join(workdir, "pooled.db")
+        legacy_path = os.path.join(workdir, "legacy.db")
+
+        pooled = Database(pooled_path)
+        seed(pooled, args.users, args.wagers)
+        pooled.close()
+        # Closing the last connection checkpoints the WAL, so the copy below has every row
+        close_all_writers()
+        close_all_pools()
+
+        # Legacy copy runs on the default rollback journal like the old code did
+        shutil.copy(pooled_path, legacy_path)
+        conn = sqlite3.connect(legacy_path)
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.close()
+
+        legacy = Database(legacy_path)
+        legacy._pool.close()
+        legacy._pool = OpenPerCallPool(legacy_path)
+        legacy._writer.close()
+        legacy._writer = OpenPerCallWriter(legacy._pool)
+
+        pooled = Database(pooled_path)
+        pooled._pool.warm()
+
+        print(f"Request mix: 4 reads + 10% wager writes, {args.threads} threads, {args.seconds:.0f}s each")
+        results = {}
+        for name, db in (("open/close per call", legacy), ("pooled", pooled)):
+            completed = run_mix(db, args.users, args.wagers, args.seconds, args.threads)
+            results[name] = completed / args.seconds
+            print(f"  {name:<22} {results[name]:>10,.0f} requests/sec")
+
+        if results["open/close per call"]:
+            speedup = results["pooled"] / results["open/close per call"]
+            print(f"  speedup: {speedup:.1f}x")
+        pooled.close()
+        close_all_writers()
+        close_all_pools()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
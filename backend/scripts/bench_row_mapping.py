@@ -0,0 +1,165 @@
+"""
+Row hydration micro-benchmark.
+
+Measures how many `users` rows per second the repository turns into User
+objects, and how many bytes each model instance takes, comparing the
+previous approach (per-row `row.keys()` membership checks into a regular
+dataclass) with the compiled row mappers and slotted models.
+
+Usage:
+    python scripts/bench_row_mapping.py --rows 5000 --repeat 20
+"""
+
+import argparse
+import dataclasses
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database, User, Game, Wager, Transaction, GameType, GameStatus, CoinSide
+from database.pool import close_all_pools
+from database.writer import close_all_writers
+
+
+def unslotted(model: type) -> type:
+    """Rebuild a model as a plain (__dict__-based) dataclass, as it was before."""
+    specs = []
+    for f in dataclasses.fields(model):
+        if not f.init:
+            continue
+        if f.default is not dataclasses.MISSING:
+            spec = dataclasses.field(default=f.default)
+        elif f.default_factory is not dataclasses.MISSING:
+            spec = dataclasses.field(default_factory=f.default_factory)
+        else:
+            spec = dataclasses.field()
+        specs.append((f.name, f.type, spec))
+    return dataclasses.make_dataclass(f"Legacy{model.__name__}", specs)
+
+
+LegacyUser = unslotted(User)
+
+
+def legacy_row_to_user(row: sqlite3.Row):
+    """The pre-mapper _row_to_user, verbatim apart from the target class."""
+    keys = row.keys()
+    return LegacyUser(
+        user_id=row["user_id"],
+        platform=row["platform"],
+        email=row["email"] if "email" in keys else None,
+        password_hash=row["password_hash"] if "password_hash" in keys else None,
+        email_verified=bool(row["email_verified"]) if "email_verified" in keys else False,
+        wallet_address=row["wallet_address"],
+        encrypted_secret=row["encrypted_secret"],
+        connected_wallet=row["connected_wallet"],
+        payout_wallet=row["payout_wallet"] if "payout_wallet" in keys else None,
+        games_played=row["games_played"],
+        games_won=row["games_won"],
+        total_wagered=row["total_wagered"],
+        total_won=row["total_won"],
+        total_lost=row["total_lost"],
+        tier=row["tier"] if "tier" in keys else "Starter",
+        tier_fee_rate=row["tier_fee_rate"] if "tier_fee_rate" in keys else 0.02,
+        referral_code=row["referral_code"] if "referral_code" in keys else None,
+        referred_by=row["referred_by"] if "referred_by" in keys else None,
+        referral_earnings=row["referral_earnings"] if "referral_earnings" in keys else 0.0,
+        pending_referral_earnings=row["pending_referral_earnings"] if "pending_referral_earnings" in keys else 0.0,
+        total_referrals=row["total_referrals"] if "total_referrals" in keys else 0,
+        referral_payout_escrow_address=row["referral_payout_escrow_address"] if "referral_payout_escrow_address" in keys else None,
+        referral_payout_escrow_secret=row["referral_payout_escrow_secret"] if "referral_payout_escrow_secret" in keys else None,
+        total_referral_claimed=row["total_referral_claimed"] if "total_referral_claimed" in keys else 0.0,
+        username=row["username"] if "username" in keys else None,
+        display_name=row["display_name"] if "display_name" in keys else None,
+        created_at=datetime.fromisoformat(row["created_at"]) if row["created_at"] else datetime.utcnow(),
+        last_active=datetime.fromisoformat(row["last_active"]) if row["last_active"] else datetime.utcnow(),
+        last_login=datetime.fromisoformat(row["last_login"]) if ("last_login" in keys and row["last_login"]) else None,
+        is_admin=bool(row["is_admin"]) if "is_admin" in keys else False,
+    )
+
+
+def object_size(obj) -> int:
+    """Shallow instance size including its attribute dict and change-tracking snapshot."""
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    if getattr(obj, "_snapshot", None) is not None:
+        size += sys.getsizeof(obj._snapshot)
+    return size
+
+
+def rows_per_second(hydrate, rows, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for row in rows:
+            hydrate(row)
+    return len(rows) * repeat / (time.perf_counter() - start)
+
+
+def sample_objects():
+    """One representative instance of each model."""
+    now = datetime.utcnow()
+    return {
+        User: dict(user_id=1, email="a@example.com", username="alice", connected_wallet="W" * 44,
+                   last_login=now),
+        Game: dict(game_id="game_1", game_type=GameType.PVP, player1_id=1, player1_side=CoinSide.HEADS,
+                   player1_wallet="A" * 44, player2_id=2, player2_side=CoinSide.TAILS, player2_wallet="B" * 44,
+                   amount=0.5, status=GameStatus.COMPLETED, result=CoinSide.HEADS, winner_id=1,
+                   blockhash="H" * 44, completed_at=now),
+        Wager: dict(wager_id="wager_1", creator_id=1, creator_wallet="A" * 44, creator_side=CoinSide.HEADS,
+                    amount=0.5, creator_escrow_address="E" * 44, creator_deposit_tx="S" * 88),
+        Transaction: dict(tx_id="tx_1", user_id=1, tx_type="game_win", amount=0.98, signature="S" * 88,
+                          game_id="game_1"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark repository row hydration")
+    parser.add_argument("--rows", type=int, default=5000, help="Users to hydrate per pass")
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the rows")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="coinflip-bench-")
+    try:
+        db = Database(os.path.join(workdir, "bench.db"))
+        now = datetime.utcnow()
+        for i in range(args.rows):
+            db.save_user(User(
+                user_id=None, email=f"user{i}@example.com", username=f"user{i}",
+                connected_wallet=f"Wallet{i:040d}", last_login=now,
+            ))
+
+        with db._connection() as conn:
+            rows = conn.execute("SELECT * FROM users").fetchall()
+
+        legacy = rows_per_second(legacy_row_to_user, rows, args.repeat)
+        mapped = rows_per_second(db._row_to_user, rows, args.repeat)
+
+        print(f"Hydrating {len(rows):,} users x {args.repeat} passes")
+        print(f"  {'keys() checks + dict dataclass':<34} {legacy:>12,.0f} rows/sec")
+        print(f"  {'compiled mapper + slots dataclass':<34} {mapped:>12,.0f} rows/sec")
+        print(f"  speedup: {mapped / legacy:.2f}x")
+
+        print("\nBytes per object (instance + attribute dict)")
+        for model, kwargs in sample_objects().items():
+            before = object_size(unslotted(model)(**kwargs))
+            after = object_size(model(**kwargs))
+            print(f"  {model.__name__:<12} {before:>6} -> {after:>6} bytes")
+        loaded = object_size(db._row_to_user(rows[0]))
+        print(f"  {'User (loaded, with change-tracking snapshot)':<12} {loaded:>6} bytes")
+
+        db.close()
+        close_all_writers()
+        close_all_pools()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+RPC client pooling benchmark.
+
+Compares balance lookups per second through the shared, keep-alive RPC
+clients (game.rpc_clients) against the previous pattern of opening a
+fresh `AsyncClient(rpc_url)` - and so a new TCP + TLS connection - for
+every call. Both runs issue the same getBalance requests with the same
+number of concurrent callers against a real RPC endpoint.
+
+Usage:
+    RPC_URL=https://... python scripts/bench_rpc_clients.py --seconds 10 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Confirmed
+from solders.pubkey import Pubkey
+
+from game.rpc_clients import get_client, close_clients, HTTP2_AVAILABLE, RPC_HTTP2
+
+# Wrapped SOL mint: always exists, so every lookup returns a balance
+DEFAULT_WALLET = "So11111111111111111111111111111111111111112"
+
+
+async def per_call_balance(rpc_url: str, pubkey: Pubkey) -> int:
+    """The old pattern: a new client (and connection) per lookup."""
+    async with AsyncClient(rpc_url) as client:
+        return (await client.get_balance(pubkey, Confirmed)).value
+
+
+async def pooled_balance(rpc_url: str, pubkey: Pubkey) -> int:
+    """The shared client for the endpoint."""
+    return (await get_client(rpc_url).get_balance(pubkey, Confirmed)).value
+
+
+async def run(lookup, rpc_url: str, pubkey: Pubkey, seconds: float, concurrency: int):
+    """Run `concurrency` callers in a loop; return (completed lookups, errors)."""
+    deadline = time.perf_counter() + seconds
+    counts = [0] * concurrency
+    errors = [0] * concurrency
+
+    async def worker(slot: int):
+        while time.perf_counter() < deadline:
+            try:
+                await lookup(rpc_url, pubkey)
+                counts[slot] += 1
+            except Exception:
+                errors[slot] += 1
+
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    return sum(counts), sum(errors)
+
+
+async def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Benchmark pooled vs per-call Solana RPC clients")
+    parser.add_argument("--rpc-url", default=os.getenv("RPC_URL", "https://api.devnet.solana.com"))
+    parser.add_argument("--wallet", default=DEFAULT_WALLET, help="Address whose balance is looked up")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duration of each run")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent callers")
+    args = parser.parse_args()
+
+    pubkey = Pubkey.from_string(args.wallet)
+    print(
+        f"getBalance against {args.rpc_url[:50]}, {args.concurrency} callers, {args.seconds:.0f}s each "
+        f"(http2={RPC_HTTP2 and HTTP2_AVAILABLE})"
+    )
+
+    results = {}
+    try:
+        # Warm the shared client so its first handshake isn't counted
+        await pooled_balance(args.rpc_url, pubkey)
+        for name, lookup in (("AsyncClient per call", per_call_balance), ("shared client", pooled_balance)):
+            completed, errors = await run(lookup, args.rpc_url, pubkey, args.seconds, args.concurrency)
+            results[name] = completed / args.seconds
+            print(f"  {name:<22} {results[name]:>8,.1f} lookups/sec  ({errors} errors)")
+    finally:
+        await close_clients()
+
+    if results.get("AsyncClient per call"):
+        speedup = results["shared client"] / results["AsyncClient per call"]
+        print(f"  speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
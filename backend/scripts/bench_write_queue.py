@@ -0,0 +1,118 @@
+"""
+Write throughput benchmark for the group-commit write queue.
+
+Runs N concurrent writer threads, each recording used signatures and
+transactions (the two hottest inserts on the deposit/settlement path) plus
+the occasional wager accept, and reports committed writes per second.
+Compares the single-writer queue against the previous pattern, where each
+thread opened its own write transaction on a pooled connection and
+committed it alone.
+
+Usage:
+    python scripts/bench_write_queue.py --seconds 3 --writers 1 10 100
+"""
+
+import argparse
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database, User, Wager, Transaction, UsedSignature, CoinSide
+from database.pool import ConnectionPool, close_all_pools
+from database.writer import close_all_writers
+
+
+class CommitPerCallWriter:
+    """Stand-in for the write queue: every call commits its own transaction."""
+
+    def __init__(self, pool: ConnectionPool):
+        self._pool = pool
+
+    def execute(self, func):
+        with self._pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(conn)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return result
+
+    def close(self):
+        pass
+
+
+def run_writers(db: Database, writers: int, seconds: float, user_id: int) -> int:
+    """Run `writers` threads for `seconds` and return completed writes."""
+    deadline = time.perf_counter() + seconds
+    counts = [0] * writers
+    ids = itertools.count()
+
+    def worker(slot: int):
+        done = 0
+        while time.perf_counter() < deadline:
+            n = next(ids)
+            db.save_used_signature(UsedSignature(
+                signature=f"sig-{slot}-{n}", user_wallet=f"Wallet{slot}", used_for=f"wager_{n}"))
+            db.save_transaction(Transaction(
+                tx_id=f"tx-{slot}-{n}", user_id=user_id, tx_type="deposit", amount=0.1,
+                signature=f"sig-{slot}-{n}"))
+            done += 2
+            if n % 10 == 0:
+                db.save_wager(Wager(wager_id=f"wager_{n}", creator_id=user_id, creator_wallet="WalletA",
+                                    creator_side=CoinSide.HEADS, amount=0.1))
+                db.atomic_accept_wager(f"wager_{n}", user_id)
+                done += 2
+        counts[slot] = done
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark group-commit writes vs commit-per-call")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Duration of each run")
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 10, 100],
+                        help="Concurrent writer counts to measure")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="coinflip-bench-")
+    try:
+        print(f"Writes/sec ({args.seconds:.0f}s per run)")
+        print(f"  {'writers':>7}  {'commit per call':>16}  {'group commit':>13}  {'speedup':>7}  {'avg batch':>9}")
+        for writers in args.writers:
+            results = {}
+            for mode in ("direct", "queue"):
+                db = Database(os.path.join(workdir, f"{mode}-{writers}.db"))
+                # Enough reader slots that the direct mode isn't capped by the pool
+                db._pool.size = max(db._pool.size, writers)
+                if mode == "direct":
+                    db._writer.close()
+                    db._writer = CommitPerCallWriter(db._pool)
+                user_id = db.save_user(User(user_id=None, username="bench", connected_wallet="WalletA"))
+                results[mode] = run_writers(db, writers, args.seconds, user_id) / args.seconds
+                batch = db._writer.stats()["avg_batch"] if mode == "queue" else 1.0
+                db.close()
+                close_all_writers()
+                close_all_pools()
+
+            print(f"  {writers:>7}  {results['direct']:>16,.0f}  {results['queue']:>13,.0f}"
+                  f"  {results['queue'] / results['direct']:>6.1f}x  {batch:>9.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+EXPLAIN QUERY PLAN regression check for the database repository.
+
+Runs every public Database method against a scratch database, captures
+each SQL statement it executes and asserts that the query plan never
+scans a table - neither a full table scan nor a walk of a whole index
+(`SCAN t USING [COVERING] INDEX`). Scans a method needs on purpose are
+listed in SCAN_ALLOWED per (method, table) with the reason. Exits
+non-zero on a regression, so it can gate CI or a deploy.
+
+Every public Database method must have an entry in `exercise()` - adding a
+repo method without one fails the check, so new queries get covered too.
+
+Usage:
+    python scripts/check_query_plans.py [--verbose]
+    python scripts/check_query_plans.py --self-test   # prove the detector flags scans
+"""
+
+import argparse
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Set, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database, User, Game, Wager, Transaction, UsedSignature, SupportTicket, GameType, GameStatus, CoinSide
+from database.pool import close_all_pools
+from database.writer import close_all_writers
+from database.pagination import encode_cursor
+
+# (method, table) pairs allowed to scan, with the reason
+SCAN_ALLOWED = {
+    ("get_all_wagers", "wagers"): "admin list: walks idx_wagers_created newest first, stops at LIMIT",
+    ("get_tickets", "support_tickets"): "admin list: walks idx_tickets_created newest first, stops at LIMIT",
+    ("get_user_count", "users"): "COUNT(*) of the whole table (smallest covering index)",
+    ("get_ticket_count", "support_tickets"): "COUNT(*) of the whole table (smallest covering index)",
+    ("search_users", "users"): "admin search under 3 characters: leading-% LIKE cannot seek an index",
+}
+
+# Statement kinds that are planned (INSERTs, DDL and PRAGMAs are not)
+PLANNED = re.compile(r"^\s*(SELECT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+# Any SCAN of a table, with or without an index; FTS5 lookups show as
+# "SCAN <table> VIRTUAL TABLE INDEX ..." but are index seeks
+TABLE_SCAN = re.compile(r"^SCAN (\w+)(?! VIRTUAL TABLE)")
+
+
+def scanned_tables(conn: sqlite3.Connection, statement: str, tables: Set[str]) -> Tuple[List[str], List[str]]:
+    """Plan a statement; return (plan lines, tables it scans)."""
+    plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}")]
+    scans = [m.group(1) for detail in plan if (m := TABLE_SCAN.match(detail)) and m.group(1) in tables]
+    return plan, scans
+
+
+def self_test():
+    """Assert the detector flags an unindexed lookup and a full index walk, and passes a seek."""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE users (user_id INTEGER PRIMARY KEY, wallet TEXT, email TEXT, created_at TEXT)")
+    conn.execute("CREATE INDEX idx_users_email ON users(email)")
+    conn.execute("CREATE INDEX idx_users_created ON users(created_at)")
+    tables = {"users"}
+    cases = [
+        ("unindexed wallet lookup", "SELECT * FROM users WHERE wallet = 'W'", True),
+        ("full index walk", "SELECT * FROM users ORDER BY created_at DESC", True),
+        ("covering index walk", "SELECT COUNT(*) FROM users", True),
+        ("index seek", "SELECT * FROM users WHERE email = 'a@b.c'", False),
+    ]
+    for name, statement, should_scan in cases:
+        plan, scans = scanned_tables(conn, statement, tables)
+        assert bool(scans) == should_scan, f"{name}: expected scan={should_scan}, plan {plan}"
+        print(f"ok: {name} -> {'flagged' if scans else 'passes'} ({'; '.join(plan)})")
+    conn.close()
+
+
+def exercise(db: Database) -> Dict[str, Callable[[], object]]:
+    """One representative call per public Database method."""
+    now = datetime.utcnow()
+    alice = User(user_id=None, email="alice@example.com", username="alice", connected_wallet="WalletA",
+                 payout_wallet="PayoutA", referral_code="ALICE1")
+    bob = User(user_id=None, email="bob@example.com", username="bob", connected_wallet="WalletB")
+    alice_id = db.save_user(alice)
+    bob_id = db.save_user(bob)
+    db.create_session(alice_id, "token-a", now + timedelta(days=1))
+    db.create_session(bob_id, "token-b", now + timedelta(days=1))
+
+    wager = Wager(wager_id="wager_1", creator_id=alice_id, creator_wallet="WalletA",
+                  creator_side=CoinSide.HEADS, amount=0.1)
+    game = Game(game_id="game_1", game_type=GameType.PVP, player1_id=alice_id, player1_side=CoinSide.HEADS,
+                player1_wallet="WalletA", player2_id=bob_id, player2_side=CoinSide.TAILS,
+                player2_wallet="WalletB", amount=0.1, status=GameStatus.COMPLETED,
+                result=CoinSide.TAILS, winner_id=bob_id, completed_at=now)
+    ticket = SupportTicket(ticket_id="ticket_1", email="alice@example.com", ticket_type="support",
+                           subject="Help", message="Hi", user_id=alice_id)
+
+    page_cursor = encode_cursor(now.isoformat(), "zzz")
+
+    def update_user():
+        user = db.get_user(alice_id)
+        user.last_active = datetime.utcnow()
+        return db.save_user(user)
+
+    return {
+        "save_user": update_user,
+        "get_user": lambda: db.get_user(alice_id),
+        "get_user_by_email": lambda: db.get_user_by_email("alice@example.com"),
+        "get_user_by_username": lambda: db.get_user_by_username("alice"),
+        "get_user_by_wallet": lambda: db.get_user_by_wallet("WalletA"),
+        "get_user_by_session": lambda: db.get_user_by_session("token-a"),
+        "get_user_by_referral_code": lambda: db.get_user_by_referral_code("ALICE1"),
+        "email_exists": lambda: db.email_exists("alice@example.com"),
+        "username_exists": lambda: db.username_exists("alice"),
+        "create_session": lambda: db.create_session(alice_id, "token-a2", now + timedelta(days=1)),
+        "delete_session": lambda: db.delete_session("token-a2"),
+        "delete_user_sessions": lambda: db.delete_user_sessions(bob_id),
+        "purge_expired_sessions": db.purge_expired_sessions,
+        "save_wager": lambda: db.save_wager(wager),
+        "get_open_wagers": lambda: db.get_open_wagers(20),
+        "get_open_wager_listings": lambda: db.get_open_wager_listings(20),
+        "clear_expired_accepting": lambda: db.clear_expired_accepting(now - timedelta(seconds=60)),
+        "get_wager": lambda: db.get_wager("wager_1"),
+        "get_all_wagers": lambda: (db.get_all_wagers(), db.get_all_wagers(status="open")),
+        "get_wagers_page": lambda: (db.get_wagers_page(cursor=page_cursor),
+                                    db.get_wagers_page(status="open", cursor=page_cursor)),
+        "get_user_wagers": lambda: db.get_user_wagers(alice_id),
+        "atomic_accept_wager": lambda: db.atomic_accept_wager("wager_1", bob_id),
+        "save_game": lambda: db.save_game(game),
+        "get_game": lambda: db.get_game("game_1"),
+        "get_user_games": lambda: db.get_user_games(alice_id),
+        "get_user_games_page": lambda: db.get_user_games_page(alice_id, cursor=page_cursor),
+        "get_recent_games": lambda: db.get_recent_games(10),
+        "record_game_result": lambda: db.record_game_result(game, wager, 196_000_000, 4_000_000, "Starter",
+                                                             alice_id, 400_000),
+        "add_referral_totals": lambda: db.add_referral_totals(alice_id, claimed=1_000_000),
+        "get_daily_stats": lambda: db.get_daily_stats(30),
+        "get_daily_tier_stats": lambda: db.get_daily_tier_stats(30),
+        "get_active_player_count": lambda: db.get_active_player_count(30),
+        "get_leaderboard_hours": lambda: db.get_leaderboard_hours(now - timedelta(days=7)),
+        "get_leaderboard_top": lambda: [db.get_leaderboard_top(column) for column in ("wagered", "won", "best_win")],
+        "prune_leaderboard_hours": lambda: db.prune_leaderboard_hours(now - timedelta(days=7)),
+        "save_transaction": lambda: db.save_transaction(Transaction(
+            tx_id="tx_1", user_id=alice_id, tx_type="game_win", amount=0.196, signature="sig_1")),
+        "get_user_transactions": lambda: db.get_user_transactions(alice_id),
+        "get_user_transactions_page": lambda: db.get_user_transactions_page(alice_id, cursor=page_cursor),
+        "archive_settled": lambda: db.archive_settled(now + timedelta(days=1)),
+        "save_used_signature": lambda: db.save_used_signature(UsedSignature(
+            signature="sig_1", user_wallet="WalletA", used_for="wager_1")),
+        "claim_signature": lambda: db.claim_signature(UsedSignature(
+            signature="sig_1", user_wallet="WalletB", used_for="wager_2")),
+        "signature_already_used": lambda: db.signature_already_used("sig_1"),
+        "get_used_signature": lambda: db.get_used_signature("sig_1"),
+        "save_ticket": lambda: db.save_ticket(ticket),
+        "get_ticket": lambda: db.get_ticket("ticket_1"),
+        "get_tickets": lambda: (db.get_tickets(), db.get_tickets(status="open"),
+                                db.get_tickets(ticket_type="support")),
+        "get_tickets_page": lambda: (db.get_tickets_page(cursor=page_cursor),
+                                     db.get_tickets_page(status="open", cursor=page_cursor),
+                                     db.get_tickets_page(ticket_type="support", cursor=page_cursor)),
+        "get_users_page": lambda: db.get_users_page(limit=10, cursor=encode_cursor(now.isoformat(), bob_id)),
+        "get_user_count": lambda: db.get_user_count(),
+        "get_ticket_count": lambda: (db.get_ticket_count(), db.get_ticket_count(status="open")),
+        # Trigram FTS path, and the LIKE fallback for queries under 3 characters
+        "search_users": lambda: (db.search_users("ali"), db.search_users("al")),
+    }
+
+
+# Public methods that run no queries of their own
+NOT_QUERIES = {"close", "cache_stats"}
+
+
+def capture_statements(db: Database, calls: Dict[str, Callable]) -> List[Tuple[str, str]]:
+    """Run each call with SQL tracing on and return (method, statement) pairs."""
+    captured: List[Tuple[str, str]] = []
+    current = {"method": None}
+
+    def trace(statement: str):
+        if current["method"] and PLANNED.match(statement):
+            captured.append((current["method"], statement))
+
+    # Reads run on the pool, writes on the writer's own connection
+    for pool in (db._pool, db._writer._pool):
+        pool.warm()
+        for conn in pool._connections:
+            conn.set_trace_callback(trace)
+
+    for method, call in calls.items():
+        # Start cold, so cached lookups still run (and plan) their query
+        for cache in (db._sessions, db._users, db._signatures):
+            cache.clear()
+        current["method"] = method
+        call()
+    current["method"] = None
+    return captured
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Assert every repository query uses an index")
+    parser.add_argument("--verbose", action="store_true", help="Print the plan of every statement")
+    parser.add_argument("--self-test", action="store_true", help="Only check that the scan detector works")
+    args = parser.parse_args()
+
+    if args.self_test:
+        self_test()
+        return
+
+    workdir = tempfile.mkdtemp(prefix="coinflip-plans-")
+    try:
+        db = Database(os.path.join(workdir, "plans.db"))
+        calls = exercise(db)
+
+        public = {name for name in dir(Database) if not name.startswith("_")} - NOT_QUERIES
+        missing = sorted(public - set(calls))
+        if missing:
+            print(f"FAIL: no exercise() entry for: {', '.join(missing)}")
+            sys.exit(1)
+
+        statements = capture_statements(db, calls)
+
+        with db._connection() as conn:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            failures = []
+            allowed_seen = set()
+            for method, statement in statements:
+                plan, scans = scanned_tables(conn, statement, tables)
+                for table in scans:
+                    if (method, table) in SCAN_ALLOWED:
+                        allowed_seen.add((method, table))
+                    else:
+                        failures.append((method, statement, plan))
+                        break
+                if args.verbose:
+                    flat = " ".join(statement.split())
+                    print(f"{method}: {flat}")
+                    for detail in plan:
+                        print(f"    {detail}")
+
+        for (method, table), reason in SCAN_ALLOWED.items():
+            if (method, table) in allowed_seen:
+                print(f"allowed scan: {method} on {table} ({reason})")
+
+        if failures:
+            for method, statement, plan in failures:
+                print(f"\nFAIL: {method} scans a table")
+                print(f"  {' '.join(statement.split())}")
+                for detail in plan:
+                    print(f"    {detail}")
+            sys.exit(1)
+
+        print(f"OK: {len(statements)} statements from {len(calls)} repo methods use indexes "
+              f"({len(allowed_seen)} allowed scans)")
+        db.close()
+        close_all_writers()
+        close_all_pools()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
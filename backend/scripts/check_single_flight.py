@@ -0,0 +1,89 @@
+"""
+Freshness check for RPC read coalescing (game.single_flight).
+
+Pollers may share an identical read that is already in flight, but a
+fresh read (max_age=0) - such as the balance check right after a sweep -
+must never be answered by a request sent before it was made. Runs
+SingleFlight against a slow fake RPC call and asserts how many calls go
+out. Exits non-zero on a regression.
+
+Usage:
+    python scripts/check_single_flight.py
+"""
+
+import asyncio
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game.single_flight import SingleFlight
+
+
+class FakeRPC:
+    """Counts calls; each one answers with the balance current when it was sent."""
+
+    def __init__(self):
+        self.calls = 0
+        self.balance = 100
+
+    async def get_balance(self) -> int:
+        self.calls += 1
+        sent_balance = self.balance
+        await asyncio.sleep(0.05)
+        return sent_balance
+
+
+async def fresh_read_during_flight():
+    """A fresh read issued while an older read is in flight makes its own call."""
+    flight, rpc = SingleFlight(max_age_seconds=0.5), FakeRPC()
+    stale = asyncio.ensure_future(flight.do("balance", rpc.get_balance, max_age=0.5))
+    await asyncio.sleep(0.01)
+    rpc.balance = 0  # The transfer lands while the first read is in flight
+    fresh = await flight.do("balance", rpc.get_balance)
+    assert rpc.calls == 2, f"fresh read joined the in-flight read ({rpc.calls} call)"
+    assert fresh == 0, f"fresh read saw the pre-transfer balance {fresh}"
+    assert await stale == 100
+    print("ok: fresh read during an in-flight read makes a second call")
+
+
+async def pollers_share_flight():
+    """Polling reads issued together share one call, and reuse its result afterwards."""
+    flight, rpc = SingleFlight(max_age_seconds=0.5), FakeRPC()
+    results = await asyncio.gather(*(flight.do("balance", rpc.get_balance, max_age=0.5) for _ in range(10)))
+    await flight.do("balance", rpc.get_balance, max_age=0.5)
+    assert rpc.calls == 1, f"10 concurrent polls + 1 repeat made {rpc.calls} calls"
+    assert results == [100] * 10
+    print("ok: concurrent polls share one call")
+
+
+async def pollers_join_newest_flight():
+    """Polls after a fresh read share the fresh read, not the older one."""
+    flight, rpc = SingleFlight(max_age_seconds=0.5), FakeRPC()
+    stale = asyncio.ensure_future(flight.do("balance", rpc.get_balance, max_age=0.5))
+    await asyncio.sleep(0.01)
+    rpc.balance = 0
+    fresh = asyncio.ensure_future(flight.do("balance", rpc.get_balance))
+    await asyncio.sleep(0)
+    poll = await flight.do("balance", rpc.get_balance, max_age=0.5)
+    assert rpc.calls == 2, f"made {rpc.calls} calls"
+    assert poll == 0, f"poll joined the older read ({poll})"
+    await asyncio.gather(stale, fresh)
+    # The older read finishing last must not replace the newer result
+    assert await flight.do("balance", rpc.get_balance, max_age=0.5) == 0
+    print("ok: polls after a fresh read share the newest call")
+
+
+async def main():
+    await fresh_read_during_flight()
+    await pollers_share_flight()
+    await pollers_join_newest_flight()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except AssertionError as e:
+        print(f"FAIL: {e}")
+        sys.exit(1)
@@ -39,6 +39,8 @@ from solders.message import Message
 import base58
 import httpx
 
+from money import to_lamports, to_sol, pro_rata
+
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
@@ -52,7 +54,7 @@ HELIUS_API_KEY = os.getenv("HELIUS_API_KEY", "")  # For fetching top holders
 # Distribution settings
 TOP_HOLDERS_COUNT = 100  # Distribute to top 100 holders
 MIN_BALANCE_FOR_REWARDS = 100_000  # Minimum tokens to qualify (100K)
-MIN_PAYOUT_AMOUNT = 0.001  # Minimum SOL payout (to avoid dust)
+MIN_PAYOUT_LAMPORTS = to_lamports(0.001)  # Minimum payout (to avoid dust)
 
 # Excluded wallets (LP only - team wallets receive their share!)
 EXCLUDED_WALLETS = [
@@ -66,9 +68,14 @@ class HolderInfo:
     """Token holder information."""
     wallet: str
     balance: float  # Token balance
-    sqrt_balance: float = 0.0  # Square root of balance
-    share_percent: float = 0.0  # Percentage share
-    payout_amount: float = 0.0  # SOL to receive
+    sqrt_weight: int = 0  # Integer square root of balance (in millionths of a token)
+    share_percent: float = 0.0  # Percentage share (for display)
+    payout_lamports: int = 0  # Lamports to receive
+
+    @property
+    def payout_amount(self) -> float:
+        """Payout in SOL (for display)."""
+        return to_sol(self.payout_lamports)
 
 
 async def get_top_holders_helius(token_mint: str, limit: int = 100) -> List[Dict]:
@@ -137,23 +144,25 @@ def calculate_sqrt_distribution(
     """
     Calculate distribution using square root model.
 
-    Each holder's share = sqrt(their_balance) / sum(sqrt(all_balances))
+    Each holder's share = sqrt(their_balance) / sum(sqrt(all_balances)),
+    split in integer lamports so the payouts sum exactly to total_sol.
     """
-    # Calculate square root of each balance
+    # Exact integer sqrt weight of each balance
     for holder in holders:
-        holder.sqrt_balance = math.sqrt(holder.balance)
+        holder.sqrt_weight = math.isqrt(round(holder.balance * 1_000_000))
 
     # Calculate total sqrt
-    total_sqrt = sum(h.sqrt_balance for h in holders)
+    total_sqrt = sum(h.sqrt_weight for h in holders)
 
     if total_sqrt == 0:
         logger.error("Total sqrt balance is 0 - no distribution possible")
         return holders
 
     # Calculate each holder's share
-    for holder in holders:
-        holder.share_percent = (holder.sqrt_balance / total_sqrt) * 100
-        holder.payout_amount = (holder.sqrt_balance / total_sqrt) * total_sol
+    payouts = pro_rata(to_lamports(total_sol), [h.sqrt_weight for h in holders])
+    for holder, payout in zip(holders, payouts):
+        holder.share_percent = (holder.sqrt_weight / total_sqrt) * 100
+        holder.payout_lamports = payout
 
     return holders
 
@@ -183,7 +192,7 @@ def print_distribution_preview(
         print(f"... and {len(sorted_holders) - 20} more recipients")
 
     # Summary stats
-    total_payout = sum(h.payout_amount for h in holders)
+    total_payout = to_sol(sum(h.payout_lamports for h in holders))
     avg_payout = total_payout / len(holders) if holders else 0
     max_payout = max(h.payout_amount for h in holders) if holders else 0
     min_payout = min(h.payout_amount for h in holders) if holders else 0
@@ -200,7 +209,7 @@ def print_distribution_preview(
 async def send_sol_batch(
     rpc_url: str,
     sender_keypair: Keypair,
-    recipients: List[Tuple[str, float]],  # [(wallet, amount), ...]
+    recipients: List[Tuple[str, int]],  # [(wallet, lamports), ...]
     batch_size: int = 10
 ) -> List[str]:
     """
@@ -220,13 +229,11 @@ async def send_sol_batch(
 
             # Create transfer instructions for this batch
             instructions = []
-            for wallet, amount in batch:
-                if amount < MIN_PAYOUT_AMOUNT:
-                    logger.info(f"Skipping {wallet} - amount {amount:.6f} below minimum")
+            for wallet, lamports in batch:
+                if lamports < MIN_PAYOUT_LAMPORTS:
+                    logger.info(f"Skipping {wallet} - amount {to_sol(lamports):.6f} below minimum")
                     continue
 
-                lamports = int(amount * 1_000_000_000)  # Convert SOL to lamports
-
                 ix = transfer(TransferParams(
                     from_pubkey=sender_keypair.pubkey(),
                     to_pubkey=Pubkey.from_string(wallet),
@@ -358,8 +365,8 @@ async def distribute_rewards(
         logger.error(f"Invalid sender private key: {e}")
         return {"error": "Invalid sender key"}
 
-    # Prepare recipients list
-    recipients = [(h.wallet, h.payout_amount) for h in holders if h.payout_amount >= MIN_PAYOUT_AMOUNT]
+    # Prepare recipients list - (wallet, lamports), sent as-is
+    recipients = [(h.wallet, h.payout_lamports) for h in holders if h.payout_lamports >= MIN_PAYOUT_LAMPORTS]
 
     # Send transactions
     signatures = await send_sol_batch(RPC_URL, sender_keypair, recipients)
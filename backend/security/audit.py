@@ -2,14 +2,42 @@
 Security audit logging system.
 Tracks all security-relevant events for forensics and monitoring.
 """
+import asyncio
 import logging
 import sqlite3
 from datetime import datetime
 from typing import Optional
 from enum import Enum
 
+from database.migrations import MigrationRegistry
+from database.writer import get_writer
+
 logger = logging.getLogger(__name__)
 
+AUDIT_SCHEMA = MigrationRegistry("audit")
+
+
+@AUDIT_SCHEMA.migration(1, "Create audit_logs table")
+def _create_audit_table(cursor: sqlite3.Cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS audit_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_type TEXT NOT NULL,
+            user_id INTEGER,
+            ip_address TEXT,
+            user_agent TEXT,
+            details TEXT,
+            severity TEXT NOT NULL,
+            timestamp TEXT NOT NULL
+        )
+    """)
+
+    # Indexes for common queries
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_timestamp ON audit_logs(timestamp)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_user ON audit_logs(user_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_severity ON audit_logs(severity)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_event_type ON audit_logs(event_type)")
+
 
 class AuditEventType(Enum):
     """Types of security events to audit."""
@@ -57,31 +85,12 @@ class AuditLogger:
         self._init_audit_table()
 
     def _init_audit_table(self):
-        """Initialize audit log table."""
+        """Initialize audit log table (runs only pending migrations)."""
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS audit_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                event_type TEXT NOT NULL,
-                user_id INTEGER,
-                ip_address TEXT,
-                user_agent TEXT,
-                details TEXT,
-                severity TEXT NOT NULL,
-                timestamp TEXT NOT NULL
-            )
-        """)
-
-        # Indexes for common queries
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_timestamp ON audit_logs(timestamp)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_user ON audit_logs(user_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_severity ON audit_logs(severity)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_event_type ON audit_logs(event_type)")
-
-        conn.commit()
-        conn.close()
+        try:
+            AUDIT_SCHEMA.migrate(conn)
+        finally:
+            conn.close()
 
     def log(
         self,
@@ -94,6 +103,10 @@ class AuditLogger:
     ):
         """Log a security event.
 
+        Called from the event loop, the insert is handed to a worker thread
+        so the loop never waits on the commit; elsewhere it is written before
+        returning.
+
         Args:
             event_type: Type of event
             severity: Severity level
@@ -103,14 +116,7 @@ class AuditLogger:
             details: Additional details (JSON string or text)
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            cursor.execute("""
-                INSERT INTO audit_logs (
-                    event_type, user_id, ip_address, user_agent, details, severity, timestamp
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
+            params = (
                 event_type.value,
                 user_id,
                 ip_address,
@@ -118,10 +124,15 @@ class AuditLogger:
                 details,
                 severity.value,
                 datetime.utcnow().isoformat()
-            ))
-
-            conn.commit()
-            conn.close()
+            )
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            if loop:
+                loop.run_in_executor(None, self._write, params)
+            else:
+                self._write(params)
 
             # Also log to application logger
             log_msg = f"[AUDIT] {event_type.value}"
@@ -142,6 +153,18 @@ class AuditLogger:
         except Exception as e:
             logger.error(f"Failed to write audit log: {e}", exc_info=True)
 
+    def _write(self, params: tuple):
+        """Insert one audit row and wait for its commit (blocks the calling thread)."""
+        try:
+            # Shares the database's group-commit writer with repository writes
+            get_writer(self.db_path).execute(lambda conn: conn.execute("""
+                INSERT INTO audit_logs (
+                    event_type, user_id, ip_address, user_agent, details, severity, timestamp
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, params))
+        except Exception as e:
+            logger.error(f"Failed to write audit log: {e}", exc_info=True)
+
     def get_recent_events(
         self,
         limit: int = 100,
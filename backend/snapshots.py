@@ -0,0 +1,107 @@
+"""
+Versioned, pre-serialized response snapshots.
+
+Hot polled endpoints (the open wager lobby) return the same JSON to every
+client until something changes. A VersionedSnapshot builds the response
+once, keeps it as bytes with a strong ETag, and serves it until its
+version is bumped by a write - so an unchanged poll costs no database
+query and no JSON encoding, and a client that already has it gets a 304.
+"""
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response
+
+logger = logging.getLogger(__name__)
+
+# Build function: returns (JSON-serializable payload, seconds until it goes stale or None)
+SnapshotBuilder = Callable[[], Awaitable[Tuple[Any, Optional[float]]]]
+
+
+class Snapshot(NamedTuple):
+    version: int
+    body: bytes
+    etag: str
+    stale_at: Optional[float]  # time.monotonic() deadline, None = until invalidated
+
+
+class VersionedSnapshot:
+    """A cached response body, rebuilt only after invalidate() or its own deadline.
+
+    Usage:
+        open_wagers = VersionedSnapshot("open_wagers", build_open_wagers)
+
+        open_wagers.invalidate()                          # after every write
+        return await open_wagers.respond(http_request)    # in the GET handler
+    """
+
+    def __init__(self, name: str, build: SnapshotBuilder):
+        self.name = name
+        self._build = build
+        self._version = 0
+        self._snapshot: Optional[Snapshot] = None
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.builds = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def invalidate(self):
+        """Mark the snapshot out of date (call after any write that affects it)."""
+        self._version += 1
+
+    def _is_current(self, snapshot: Optional[Snapshot]) -> bool:
+        return (
+            snapshot is not None
+            and snapshot.version == self._version
+            and (snapshot.stale_at is None or time.monotonic() < snapshot.stale_at)
+        )
+
+    async def get(self) -> Snapshot:
+        """Return the current snapshot, building it if a write invalidated it."""
+        snapshot = self._snapshot
+        if self._is_current(snapshot):
+            self.hits += 1
+            return snapshot
+
+        # One rebuild at a time - concurrent pollers wait for it instead of all querying
+        async with self._lock:
+            snapshot = self._snapshot
+            if self._is_current(snapshot):
+                self.hits += 1
+                return snapshot
+
+            if snapshot is not None and snapshot.version == self._version:
+                self._version += 1  # Content changes with time alone (deadline passed)
+            version = self._version
+
+            payload, ttl = await self._build()
+            body = json.dumps(payload, separators=(",", ":")).encode()
+            # Content hash, so an ETag from before a restart can never match different data
+            etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+            stale_at = time.monotonic() + ttl if ttl is not None else None
+
+            snapshot = Snapshot(version, body, etag, stale_at)
+            self._snapshot = snapshot
+            self.builds += 1
+            return snapshot
+
+    async def respond(self, request: Request) -> Response:
+        """Serve the snapshot, or 304 Not Modified if the client already has it."""
+        snapshot = await self.get()
+        headers = {
+            "ETag": snapshot.etag,
+            "Cache-Control": "no-cache",  # Always revalidate - the 304 is nearly free
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and snapshot.etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+
+        return Response(content=snapshot.body, media_type="application/json", headers=headers)
@@ -5,6 +5,7 @@ import logging
 import secrets
 from typing import Tuple
 from database import User
+from money import apply_rate, to_sol
 
 logger = logging.getLogger(__name__)
 
@@ -108,20 +109,20 @@ def get_referral_commission_rate(referrer: User) -> float:
     return tier_data["referral_commission"]
 
 
-def calculate_referral_commission(fee_amount: float, referrer: User) -> float:
+def calculate_referral_commission(fee_lamports: int, referrer: User) -> int:
     """Calculate referral commission from a game's fees.
 
     Args:
-        fee_amount: Total fees collected from game
+        fee_lamports: Total fees collected from game (lamports)
         referrer: Referrer user object
 
     Returns:
-        Commission amount to pay referrer
+        Commission to pay referrer (lamports, rounded down)
     """
     commission_rate = get_referral_commission_rate(referrer)
-    commission = fee_amount * commission_rate
+    commission = apply_rate(fee_lamports, commission_rate)
 
-    logger.info(f"Referral commission: {commission:.6f} SOL ({commission_rate*100:.1f}% of {fee_amount:.6f} SOL) for tier {referrer.tier}")
+    logger.info(f"Referral commission: {to_sol(commission):.6f} SOL ({commission_rate*100:.1f}% of {to_sol(fee_lamports):.6f} SOL) for tier {referrer.tier}")
 
     return commission
 
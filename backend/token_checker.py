@@ -10,9 +10,10 @@ from datetime import datetime, timedelta
 from typing import Optional, Tuple
 import base58
 
-from solana.rpc.async_api import AsyncClient
 from solders.pubkey import Pubkey
 
+from rpc_manager import get_rpc_manager
+
 from token_config import (
     TOKEN_MINT,
     TOKEN_DECIMALS,
@@ -67,18 +68,18 @@ async def fetch_token_balance(rpc_url: str, wallet: str) -> float:
         # Get the Associated Token Account address
         ata_address = get_associated_token_address(wallet, TOKEN_MINT)
 
-        async with AsyncClient(rpc_url) as client:
-            # Fetch token account info
-            response = await client.get_token_account_balance(Pubkey.from_string(ata_address))
+        # Fetch token account info
+        ata_pubkey = Pubkey.from_string(ata_address)
+        response = await get_rpc_manager(rpc_url).read(lambda client: client.get_token_account_balance(ata_pubkey))
 
-            if response.value is None:
-                # No token account = 0 balance
-                return 0.0
+        if response.value is None:
+            # No token account = 0 balance
+            return 0.0
 
-            # Parse balance (already in UI amount with decimals)
-            balance = float(response.value.ui_amount or 0)
-            logger.debug(f"Token balance for {wallet[:8]}...: {balance:,.0f} {TOKEN_MINT[:8]}...")
-            return balance
+        # Parse balance (already in UI amount with decimals)
+        balance = float(response.value.ui_amount or 0)
+        logger.debug(f"Token balance for {wallet[:8]}...: {balance:,.0f} {TOKEN_MINT[:8]}...")
+        return balance
 
     except Exception as e:
         # Account doesn't exist or other error = 0 balance
@@ -522,7 +522,8 @@ async function loadActiveWagers() {
     const container = document.getElementById('activeWagers');
 
     try {
-        const response = await fetch(`${API_BASE}/api/wagers/open`);
+        // Revalidate with the server's ETag - an unchanged list comes back as a cheap 304
+        const response = await fetch(`${API_BASE}/api/wagers/open`, { cache: 'no-cache' });
 
         if (!response.ok) {
             throw new Error('Failed to fetch wagers');